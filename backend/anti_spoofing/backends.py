@@ -0,0 +1,224 @@
+"""
+Inference backends for the MiniFASNetV2 spoof model.
+
+All backends take a preprocessed float32 batch of shape (N, 3, 80, 80)
+and return raw logits of shape (N, 3) as a NumPy array:
+
+    torch        eager PyTorch (reference)
+    torchscript  traced and frozen TorchScript module
+    onnx         exported ONNX graph run with onnxruntime on CPU
+    onnx-int8    calibrated int8 ONNX graph (see anti_spoofing.quantize)
+
+Thread counts are process-wide and set with configure_threads(), so
+several gunicorn workers on one box do not each spawn a thread per core.
+"""
+import os
+import sys
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+WEIGHTS_PATH = os.path.join(BASE_DIR, "2.7_80x80_MiniFASNetV2.pth")
+ONNX_PATH = os.path.join(BASE_DIR, "2.7_80x80_MiniFASNetV2.onnx")
+INT8_ONNX_PATH = os.path.join(BASE_DIR, "2.7_80x80_MiniFASNetV2.int8.onnx")
+
+INPUT_SIZE = (80, 80)
+
+_threads = {"intra_op": None, "inter_op": None}
+
+
+def configure_threads(num_threads=None, interop_threads=None):
+    """
+    Set intra-op / inter-op thread counts for this process. Applies to
+    torch now if it is already imported, and to every backend loaded later.
+    """
+    if num_threads:
+        _threads["intra_op"] = num_threads
+    if interop_threads:
+        _threads["inter_op"] = interop_threads
+
+    if "torch" in sys.modules:
+        _apply_torch_threads()
+
+
+def _apply_torch_threads():
+    import torch
+
+    if _threads["intra_op"]:
+        torch.set_num_threads(_threads["intra_op"])
+
+    if _threads["inter_op"]:
+        try:
+            torch.set_num_interop_threads(_threads["inter_op"])
+        except RuntimeError:
+            # Only settable once, before any inter-op work in this process
+            pass
+
+
+def preprocess(face_imgs, size=INPUT_SIZE):
+    """
+    BGR uint8 images -> normalised RGB float32 batch (N, 3, H, W).
+    Same maths as ToTensor() + Normalize(0.5, 0.5), without PIL.
+    """
+    import cv2
+
+    batch = np.empty((len(face_imgs), size[1], size[0], 3), dtype=np.float32)
+
+    for i, face_img in enumerate(face_imgs):
+        if face_img.shape[1::-1] != size:
+            face_img = cv2.resize(face_img, size, interpolation=cv2.INTER_AREA)
+        batch[i] = face_img[:, :, ::-1]
+
+    batch *= 1 / 127.5
+    batch -= 1.0
+
+    return np.ascontiguousarray(batch.transpose(0, 3, 1, 2))
+
+
+def softmax(logits):
+    logits = logits - logits.max(axis=1, keepdims=True)
+    exp = np.exp(logits)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+def build_model(weights_path=WEIGHTS_PATH):
+    import torch
+
+    from .model import MiniFASNetV2
+
+    _apply_torch_threads()
+
+    model = MiniFASNetV2(
+        embedding_size=128,
+        conv6_kernel=(5, 5),
+        drop_p=0.2,
+        num_classes=3,
+        img_channel=3
+    )
+
+    state_dict = torch.load(weights_path, map_location=torch.device("cpu"))
+
+    clean_state = {
+        k.replace("module.", ""): v for k, v in state_dict.items()
+    }
+
+    model.load_state_dict(clean_state, strict=True)
+    model.eval()
+
+    return model
+
+
+class TorchBackend:
+    name = "torch"
+
+    def __init__(self, weights_path=WEIGHTS_PATH):
+        self.model = build_model(weights_path)
+
+    def run(self, batch):
+        import torch
+
+        with torch.inference_mode():
+            return self.model(torch.from_numpy(batch)).numpy()
+
+
+class TorchScriptBackend(TorchBackend):
+    name = "torchscript"
+
+    def __init__(self, weights_path=WEIGHTS_PATH):
+        import torch
+
+        model = build_model(weights_path)
+        example = torch.zeros((1, 3, INPUT_SIZE[1], INPUT_SIZE[0]))
+
+        with torch.inference_mode():
+            traced = torch.jit.trace(model, example)
+        self.model = torch.jit.freeze(traced)
+
+
+class OnnxBackend:
+    name = "onnx"
+    default_path = ONNX_PATH
+    build_command = "python -m anti_spoofing.export_model"
+
+    def __init__(self, onnx_path=None):
+        onnx_path = onnx_path or self.default_path
+        if not os.path.exists(onnx_path):
+            raise FileNotFoundError(
+                f"{onnx_path} not found; run `{self.build_command}`"
+            )
+
+        # onnxruntime starts its thread pool when a session is created and
+        # those threads do not survive fork, so only the model bytes are
+        # loaded here and each process builds its own session.
+        with open(onnx_path, "rb") as f:
+            self.model_bytes = f.read()
+
+        self._session = None
+        self._session_pid = None
+
+    def _session_for_process(self):
+        if self._session is None or self._session_pid != os.getpid():
+            import onnxruntime as ort
+
+            options = ort.SessionOptions()
+            if _threads["intra_op"]:
+                options.intra_op_num_threads = _threads["intra_op"]
+            if _threads["inter_op"]:
+                options.inter_op_num_threads = _threads["inter_op"]
+
+            self._session = ort.InferenceSession(
+                self.model_bytes,
+                options,
+                providers=["CPUExecutionProvider"],
+            )
+            self._session_pid = os.getpid()
+            self._input_name = self._session.get_inputs()[0].name
+
+        return self._session
+
+    def run(self, batch):
+        session = self._session_for_process()
+        return session.run(None, {self._input_name: batch})[0]
+
+
+class QuantizedOnnxBackend(OnnxBackend):
+    name = "onnx-int8"
+    default_path = INT8_ONNX_PATH
+    build_command = "python -m anti_spoofing.quantize --calibration-dir <face crops>"
+
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (TorchBackend, TorchScriptBackend, OnnxBackend, QuantizedOnnxBackend)
+}
+
+
+def load_backend(name):
+    try:
+        backend_class = BACKENDS[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown spoof backend {name!r}; choose from {sorted(BACKENDS)}"
+        )
+
+    return backend_class()
+
+
+def export_onnx(weights_path=WEIGHTS_PATH, onnx_path=ONNX_PATH):
+    import torch
+
+    model = build_model(weights_path)
+    example = torch.zeros((1, 3, INPUT_SIZE[1], INPUT_SIZE[0]))
+
+    torch.onnx.export(
+        model,
+        example,
+        onnx_path,
+        input_names=["input"],
+        output_names=["logits"],
+        dynamic_axes={"input": {0: "batch"}, "logits": {0: "batch"}},
+        opset_version=17,
+        dynamo=False,
+    )
+
+    return onnx_path
@@ -0,0 +1,11 @@
+"""
+Export MiniFASNetV2 to ONNX for the "onnx" spoof backend. torch's
+exporter needs the onnx package (requirements.txt).
+
+Run from the backend folder:
+    python -m anti_spoofing.export_model
+"""
+from .backends import export_onnx
+
+if __name__ == "__main__":
+    print("Exported", export_onnx())
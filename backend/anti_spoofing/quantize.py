@@ -0,0 +1,91 @@
+"""
+Calibrate and quantize MiniFASNetV2 to int8 for the "onnx-int8" backend.
+
+Uses onnxruntime static post-training quantization (QDQ, per-channel
+int8 weights, uint8 activations). Activation ranges are calibrated on
+a folder of face crops, ideally real frames from the deployment
+cameras, cut the same way as face_analysis.spoof_crop. Exporting and
+pre-processing the graph also need the onnx package (requirements.txt).
+
+Run from the backend folder:
+    python -m anti_spoofing.quantize --calibration-dir path/to/crops
+"""
+import argparse
+import glob
+import os
+import tempfile
+
+from .backends import INT8_ONNX_PATH, ONNX_PATH, export_onnx, preprocess
+
+IMAGE_PATTERNS = ("*.jpg", "*.jpeg", "*.png")
+
+
+def load_calibration_images(directory, limit=None):
+    import cv2
+
+    paths = sorted(
+        path
+        for pattern in IMAGE_PATTERNS
+        for path in glob.glob(os.path.join(directory, "**", pattern), recursive=True)
+    )[:limit]
+
+    images = [cv2.imread(path) for path in paths]
+    return [img for img in images if img is not None]
+
+
+def quantize(calibration_images, onnx_path=ONNX_PATH, output_path=INT8_ONNX_PATH):
+    from onnxruntime.quantization import (
+        CalibrationDataReader,
+        QuantFormat,
+        QuantType,
+        quantize_static,
+    )
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    if not calibration_images:
+        raise ValueError("No calibration images")
+
+    if not os.path.exists(onnx_path):
+        export_onnx(onnx_path=onnx_path)
+
+    class Reader(CalibrationDataReader):
+        def __init__(self):
+            self.images = iter(calibration_images)
+
+        def get_next(self):
+            img = next(self.images, None)
+            if img is None:
+                return None
+            return {"input": preprocess([img])}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        prepared = os.path.join(tmp, "prepared.onnx")
+        quant_pre_process(onnx_path, prepared)
+
+        quantize_static(
+            prepared,
+            output_path,
+            Reader(),
+            quant_format=QuantFormat.QDQ,
+            per_channel=True,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+        )
+
+    return output_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calibration-dir", required=True)
+    parser.add_argument("--limit", type=int, default=500)
+    parser.add_argument("--output", default=INT8_ONNX_PATH)
+    args = parser.parse_args()
+
+    images = load_calibration_images(args.calibration_dir, args.limit)
+    print(f"Calibrating on {len(images)} images")
+    print("Wrote", quantize(images, output_path=args.output))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,70 +1,52 @@
-import torch
-import cv2
-import os
-from torchvision import transforms
-from PIL import Image
-
-from .model import MiniFASNetV2
+import threading
 
 
 class SpoofDetector:
     """
     CNN-based spoof detector using MiniFASNetV2 (80x80)
+
+    The inference backend ("torch", "torchscript", "onnx" or "onnx-int8", see
+    anti_spoofing.backends) is imported and loaded on first use, so
+    importing this module stays cheap for processes that never score a
+    face (migrate, admin, notices, ...).
     """
 
-    def __init__(self):
-        self.device = torch.device("cpu")
+    def __init__(self, backend="torch"):
+        self.backend_name = backend
+        self.threshold = 0.2
+
+        self.backend = None
+        self._load_lock = threading.Lock()
 
-        self.model = MiniFASNetV2(
-            embedding_size=128,
-            conv6_kernel=(5, 5),   
-            drop_p=0.2,
-            num_classes=3,       
-            img_channel=3
-        ).to(self.device)
+    def load(self):
+        if self.backend is not None:
+            return
 
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        model_path = os.path.join(base_dir, "2.7_80x80_MiniFASNetV2.pth")
+        with self._load_lock:
+            if self.backend is None:
+                from .backends import load_backend
 
-        state_dict = torch.load(model_path, map_location=self.device)
+                self.backend = load_backend(self.backend_name)
 
-        
-        clean_state = {
-            k.replace("module.", ""): v for k, v in state_dict.items()
-        }
+    def spoof_scores(self, face_imgs):
+        """
+        Score a batch of BGR face images with a single forward pass.
+        Returns one spoof probability per image.
+        """
+        from .backends import preprocess, softmax
 
-        self.model.load_state_dict(clean_state, strict=True)
-        self.model.eval()
+        self.load()
 
-        self.transform = transforms.Compose([
-            transforms.Resize((80, 80)),
-            transforms.ToTensor(),
-            transforms.Normalize(
-                mean=[0.5, 0.5, 0.5],
-                std=[0.5, 0.5, 0.5]
-            )
-        ])
+        logits = self.backend.run(preprocess(face_imgs))
+        probs = softmax(logits)
+
+        return probs[:, 1].tolist()
 
     def is_real(self, face_img):
         if face_img is None:
             return False
 
-        import cv2
-        from PIL import Image
-        import torch
-
-        face_img = cv2.cvtColor(face_img, cv2.COLOR_BGR2RGB)
-        face_img = Image.fromarray(face_img)
-
-        tensor = self.transform(face_img).unsqueeze(0).to(self.device)
-
-        with torch.no_grad():
-            logits = self.model(tensor)
-            probs = torch.softmax(logits, dim=1)
-
-            spoof_score = probs[0][1].item()  
-            print("SPOOF SCORE:", spoof_score)
-
-        return spoof_score < 0.2
-
+        spoof_score = self.spoof_scores([face_img])[0]
+        print("SPOOF SCORE:", spoof_score)
 
+        return spoof_score < self.threshold
@@ -1,8 +1,8 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.utils.crypto import get_random_string
-from django.core.mail import send_mail
-from django.conf import settings
+
+from apps.mailer.outbox import enqueue
 
 from .models import User
 from .forms import AdminTeacherCreationForm
@@ -46,17 +46,15 @@ class CustomUserAdmin(UserAdmin):
             obj.save()
 
             # Send credentials
-            send_mail(
+            enqueue(
                 subject="Your Smart Attendance Teacher Account",
-                message=(
+                body=(
                     "Your teacher account has been created.\n\n"
                     f"Login ID (Email): {obj.email}\n"
                     f"Temporary Password: {temp_password}\n\n"
                     "Please login and change your password immediately."
                 ),
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[obj.email],
-                fail_silently=False,
+                to=[obj.email],
             )
         else:
             obj.save()
@@ -0,0 +1,180 @@
+"""
+JWT authentication that answers the common questions from the token.
+
+Tokens from tokens_for_user() carry the user's role and teacher/student
+profile ids as claims. ClaimsJWTAuthentication authenticates requests
+with a ClaimsUser: id, role and the profile ids are read from those
+claims, and the User row is loaded only when something else is read.
+It comes from a short-TTL cache, or from the database with the
+teacher/student profile joined in (the User manager defers
+face_embedding). Role checks and queries filtered by request.user cost
+no query of their own.
+
+Every request does check the user's current is_active and role against
+a small cached (is_active, role) entry (one tiny query on a miss):
+deactivated users are refused, and so are tokens whose role claim no
+longer matches.
+
+Both cache entries are dropped when the user or one of their profiles
+is saved (apps.accounts.signals). AUTH_USER_CACHE_SECONDS bounds how
+stale they can get otherwise: after queryset.update() writes, or in
+other processes unless the cache is shared (set REDIS_URL). Tokens
+issued before the claims existed still work; they load the user for
+the role.
+
+Because request.user may be that cached copy, views write only the
+fields they change (save(update_fields=...) or update()), never a full
+save() that would put stale columns back.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.functional import SimpleLazyObject, empty
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+User = get_user_model()
+
+
+def user_cache_key(user_id):
+    return f"auth:user:{user_id}"
+
+
+def state_cache_key(user_id):
+    return f"auth:state:{user_id}"
+
+
+def forget_user(user_id):
+    cache.delete_many([user_cache_key(user_id), state_cache_key(user_id)])
+
+
+def user_state(user_id):
+    """
+    (is_active, role) for user_id from the cache, or from the database
+    (one single-row query) on a miss.
+    """
+    key = state_cache_key(user_id)
+    state = cache.get(key)
+
+    if state is None:
+        state = User.objects.filter(pk=user_id).values_list("is_active", "role").first()
+        if state is None:
+            raise AuthenticationFailed("User not found", code="user_not_found")
+        cache.set(key, state, settings.AUTH_USER_CACHE_SECONDS)
+
+    return state
+
+
+def load_user(user_id):
+    """
+    The User for user_id from the cache, or from the database (one
+    query) on a miss.
+    """
+    key = user_cache_key(user_id)
+    user = cache.get(key)
+
+    if user is None:
+        user = (
+            User.objects
+            .select_related("teacher_profile", "student_profile")
+            .filter(pk=user_id)
+            .first()
+        )
+        if user is None:
+            raise AuthenticationFailed("User not found", code="user_not_found")
+        cache.set(key, user, settings.AUTH_USER_CACHE_SECONDS)
+
+    if not user.is_active:
+        raise AuthenticationFailed("User is inactive", code="user_inactive")
+
+    return user
+
+
+def _profile_id(user, name):
+    profile = getattr(user, name, None)
+    return profile.pk if profile else None
+
+
+def tokens_for_user(user):
+    """
+    Refresh token (and, through it, access tokens) for user, with the
+    claims ClaimsUser reads.
+    """
+    refresh = RefreshToken.for_user(user)
+    refresh["role"] = user.role
+    refresh["teacher_profile_id"] = _profile_id(user, "teacher_profile")
+    refresh["student_profile_id"] = _profile_id(user, "student_profile")
+    return refresh
+
+
+class ClaimsUser(SimpleLazyObject):
+    """
+    request.user backed by token claims, loading the User on first use
+    of anything the claims do not carry.
+    """
+
+    def __init__(self, token):
+        user_id = int(token[api_settings.USER_ID_CLAIM])
+        super().__init__(lambda: load_user(user_id))
+
+        # LazyObject forwards attribute writes to the wrapped user
+        self.__dict__["_user_id"] = user_id
+        self.__dict__["_claims"] = token.payload
+
+    def _user(self):
+        if self._wrapped is empty:
+            self._setup()
+        return self._wrapped
+
+    def _claim(self, name, fallback):
+        claims = self.__dict__["_claims"]
+        if name in claims:
+            return claims[name]
+        # Token issued before this claim existed
+        return fallback(self._user())
+
+    @property
+    def id(self):
+        return self.__dict__["_user_id"]
+
+    pk = id
+
+    @property
+    def role(self):
+        return self._claim("role", lambda user: user.role)
+
+    @property
+    def teacher_profile_id(self):
+        return self._claim(
+            "teacher_profile_id", lambda user: _profile_id(user, "teacher_profile")
+        )
+
+    @property
+    def student_profile_id(self):
+        return self._claim(
+            "student_profile_id", lambda user: _profile_id(user, "student_profile")
+        )
+
+    is_authenticated = True
+    is_anonymous = False
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken("Token contained no recognizable user identification")
+
+        user = ClaimsUser(validated_token)
+
+        is_active, role = user_state(user.pk)
+        if not is_active:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        if validated_token.get("role", role) != role:
+            raise AuthenticationFailed(
+                "Role changed since this token was issued", code="token_stale"
+            )
+
+        return user
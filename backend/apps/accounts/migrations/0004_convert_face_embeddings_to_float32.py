@@ -0,0 +1,71 @@
+# Generated by Django 5.0.6 on 2026-10-18 09:12
+
+import pickle
+import struct
+
+import numpy as np
+from django.db import migrations
+
+# Frozen copy of apps.face_liveness.embedding_codec format v1 so this
+# migration keeps working if the codec changes later.
+MAGIC = b"FE"
+HEADER = struct.Struct("<2sBBI")
+
+
+def encode_v1(embedding):
+    values = np.asarray(embedding, dtype="<f4").ravel()
+    return HEADER.pack(MAGIC, 1, 1, values.size) + values.tobytes()
+
+
+def decode_v1(blob):
+    _, _, _, dim = HEADER.unpack_from(blob)
+    return np.frombuffer(blob, dtype="<f4", count=dim, offset=HEADER.size)
+
+
+def pickled_to_float32(apps, schema_editor):
+    User = apps.get_model("accounts", "User")
+
+    rows = (
+        User.objects.filter(face_embedding__isnull=False)
+        .values_list("id", "face_embedding")
+        .iterator(chunk_size=500)
+    )
+
+    for user_id, blob in rows:
+        blob = bytes(blob)
+        if blob[:2] == MAGIC:
+            continue
+
+        embedding = pickle.loads(blob)
+        new_value = encode_v1(embedding) if embedding is not None else None
+
+        User.objects.filter(id=user_id).update(face_embedding=new_value)
+
+
+def float32_to_pickled(apps, schema_editor):
+    User = apps.get_model("accounts", "User")
+
+    rows = (
+        User.objects.filter(face_embedding__isnull=False)
+        .values_list("id", "face_embedding")
+        .iterator(chunk_size=500)
+    )
+
+    for user_id, blob in rows:
+        blob = bytes(blob)
+        if blob[:2] != MAGIC:
+            continue
+
+        embedding = decode_v1(blob).astype(np.float64)
+        User.objects.filter(id=user_id).update(face_embedding=pickle.dumps(embedding))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0003_user_is_first_login"),
+    ]
+
+    operations = [
+        migrations.RunPython(pickled_to_float32, float32_to_pickled),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-18 17:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0004_convert_face_embeddings_to_float32"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="face_embedding_version",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
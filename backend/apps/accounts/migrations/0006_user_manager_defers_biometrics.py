@@ -0,0 +1,28 @@
+# Generated by Django 5.0.6 on 2026-10-18 17:58
+
+import apps.accounts.models
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0005_user_face_embedding_version"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="user",
+            options={
+                "base_manager_name": "objects",
+                "verbose_name": "user",
+                "verbose_name_plural": "users",
+            },
+        ),
+        migrations.AlterModelManagers(
+            name="user",
+            managers=[
+                ("objects", apps.accounts.models.UserManager()),
+            ],
+        ),
+    ]
@@ -1,6 +1,19 @@
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager as BaseUserManager
 from django.db import models
-import pickle
+
+# Columns only the face registration / verification path reads
+BIOMETRIC_FIELDS = ("face_embedding",)
+
+
+class UserManager(BaseUserManager):
+    """
+    Defers the biometric columns (a few KB per user). The face path
+    reads them with values() / values_list() naming the column, which
+    still selects it.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().defer(*BIOMETRIC_FIELDS)
 
 
 class User(AbstractUser):
@@ -11,7 +24,15 @@ class User(AbstractUser):
 
     role = models.CharField(max_length=10, choices=ROLE_CHOICES)
     face_embedding = models.BinaryField(null=True, blank=True)
+    # Bumped on every write to face_embedding; keys the embedding cache
+    face_embedding_version = models.PositiveIntegerField(default=0)
     is_first_login = models.BooleanField(default=True)
 
+    objects = UserManager()
+
+    class Meta(AbstractUser.Meta):
+        # Related lookups (record.student, profile.user) defer them too
+        base_manager_name = "objects"
+
     def __str__(self):
         return f"{self.username} ({self.role})"
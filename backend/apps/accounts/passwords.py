@@ -0,0 +1,92 @@
+"""
+Password hashing for many accounts at once.
+
+make_password() is deliberately slow (PBKDF2, hundreds of thousands of
+iterations), so hashing a few thousand temporary passwords one after
+another takes minutes. make_passwords() spreads them over a process
+pool instead.
+
+The pool uses the "spawn" start method: gunicorn workers are threaded,
+and forking a threaded process can leave the child holding locks that
+no thread will release. Spawned children only import this module and
+read the password hasher settings; they do not load the app registry.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+
+# Below this many passwords starting the pool costs more than it saves
+POOL_MIN_PASSWORDS = 16
+
+
+def _hash_chunk(passwords):
+    return [make_password(password) for password in passwords]
+
+
+class PasswordPool:
+    """
+    Process pool shared by several make_passwords() calls, so a chunked
+    import starts the interpreters once. The pool starts on the first
+    call big enough to use it; close() (or leaving the with block)
+    shuts it down.
+    """
+
+    def __init__(self, workers=None):
+        self.workers = workers or settings.PASSWORD_HASH_WORKERS or os.cpu_count() or 1
+        self._executor = None
+
+    def executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def make_passwords(passwords, workers=None, pool=None):
+    """
+    make_password() for each raw password, in order. Uses pool if given,
+    otherwise a pool of its own for this call.
+    """
+    passwords = list(passwords)
+    if pool is not None:
+        workers = pool.workers
+    workers = workers or settings.PASSWORD_HASH_WORKERS or os.cpu_count() or 1
+    workers = min(workers, max(1, len(passwords) // POOL_MIN_PASSWORDS))
+
+    if workers <= 1:
+        return _hash_chunk(passwords)
+
+    # Contiguous chunks, a few per worker, so results come back in order
+    # without one task per password
+    size = -(-len(passwords) // (workers * 4))
+    chunks = [passwords[i:i + size] for i in range(0, len(passwords), size)]
+
+    if pool is not None:
+        return _map_chunks(pool, chunks)
+
+    with PasswordPool(workers) as pool:
+        return _map_chunks(pool, chunks)
+
+
+def _map_chunks(pool, chunks):
+    return [
+        hashed
+        for chunk in pool.executor().map(_hash_chunk, chunks)
+        for hashed in chunk
+    ]
@@ -0,0 +1,22 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import forget_user
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_cached_user(sender, instance, **kwargs):
+    forget_user(instance.pk)
+
+
+# The cached user carries its profile (select_related)
+@receiver(post_save, sender="teachers.TeacherProfile")
+@receiver(post_delete, sender="teachers.TeacherProfile")
+@receiver(post_save, sender="students.StudentProfile")
+@receiver(post_delete, sender="students.StudentProfile")
+def forget_cached_profile_user(sender, instance, **kwargs):
+    forget_user(instance.user_id)
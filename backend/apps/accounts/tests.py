@@ -0,0 +1,306 @@
+import pickle
+from datetime import timedelta
+from importlib import import_module
+
+import numpy as np
+from django.apps import apps
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.attendance.models import AttendanceRecord, AttendanceSession
+from apps.face_liveness.embedding_cache import embedding_cache
+from apps.face_liveness.embedding_codec import decode_embedding, encode_embedding
+from apps.students.models import StudentProfile
+
+from .authentication import ClaimsJWTAuthentication, tokens_for_user
+from .models import User
+
+
+class ClaimsJWTAuthenticationTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.teacher = User.objects.create_user(
+            username="teacher@example.com", email="teacher@example.com",
+            password="secret-pass", role="TEACHER",
+        )
+        self.teacher.face_embedding = b"\x00" * 4096
+        self.teacher.save()
+
+    def authenticate(self, token):
+        request = APIRequestFactory().get(
+            "/", HTTP_AUTHORIZATION=f"Bearer {token}"
+        )
+        user, _ = ClaimsJWTAuthentication().authenticate(request)
+        return user
+
+    def test_login_tokens_carry_role_and_profile_claims(self):
+        response = APIClient().post(
+            "/api/accounts/login/",
+            {"email": "teacher@example.com", "password": "secret-pass"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+
+        user = self.authenticate(response.data["access"])
+        with self.assertNumQueries(0):
+            self.assertEqual(user.role, "TEACHER")
+            self.assertEqual(user.pk, self.teacher.pk)
+            self.assertEqual(user.teacher_profile_id, self.teacher.teacher_profile.pk)
+            self.assertIsNone(user.student_profile_id)
+            self.assertTrue(user.is_authenticated)
+
+    def test_user_is_loaded_once_without_face_embedding(self):
+        token = tokens_for_user(self.teacher).access_token
+
+        # Its (is_active, role), then the user
+        with self.assertNumQueries(2):
+            user = self.authenticate(token)
+            self.assertEqual(user.email, "teacher@example.com")
+            self.assertEqual(user.teacher_profile.pk, self.teacher.teacher_profile.pk)
+            self.assertIn("face_embedding", user.get_deferred_fields())
+
+        # Cached for the next request
+        with self.assertNumQueries(0):
+            user = self.authenticate(token)
+            self.assertEqual(user.email, "teacher@example.com")
+            self.assertIsInstance(user, User)
+
+    def test_saving_the_user_drops_the_cached_copy(self):
+        token = tokens_for_user(self.teacher).access_token
+        self.authenticate(token).email
+
+        self.teacher.is_active = False
+        self.teacher.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(token)
+
+    def test_every_request_checks_is_active_and_role(self):
+        token = tokens_for_user(self.teacher).access_token
+        self.authenticate(token)
+
+        # Checked from the cache
+        with self.assertNumQueries(0):
+            self.authenticate(token)
+
+        # Changed by another worker; seen once the entry is gone
+        User.objects.filter(pk=self.teacher.pk).update(role="STUDENT")
+        self.authenticate(token)
+        cache.clear()
+        with self.assertRaises(AuthenticationFailed) as raised:
+            self.authenticate(token)
+        self.assertEqual(raised.exception.get_codes(), "token_stale")
+
+        User.objects.filter(pk=self.teacher.pk).update(role="TEACHER", is_active=False)
+        cache.clear()
+        with self.assertRaises(AuthenticationFailed) as raised:
+            self.authenticate(token)
+        self.assertEqual(raised.exception.get_codes(), "user_inactive")
+
+    def test_tokens_without_claims_fall_back_to_the_user(self):
+        token = RefreshToken.for_user(self.teacher).access_token
+
+        user = self.authenticate(token)
+        with self.assertNumQueries(1):
+            self.assertEqual(user.role, "TEACHER")
+            self.assertEqual(user.teacher_profile_id, self.teacher.teacher_profile.pk)
+
+
+class BiometricDeferralTests(TestCase):
+    """
+    face_embedding is read only on the face registration / verification
+    path; other endpoints never select it.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.teacher = User.objects.create_user(
+            username="teacher", email="teacher@example.com", password="x", role="TEACHER"
+        )
+        self.session = AttendanceSession.objects.create(
+            teacher=self.teacher,
+            subject="Maths",
+            duration_minutes=10,
+            end_time=timezone.now() + timedelta(minutes=10),
+        )
+
+        self.students = []
+        for n in range(3):
+            student = User.objects.create_user(
+                username=f"student{n}", email=f"student{n}@example.com",
+                password="x", role="STUDENT", is_first_login=False,
+            )
+            student.face_embedding = b"\x01" * 2048
+            student.save()
+            StudentProfile.objects.create(
+                user=student, teacher=self.teacher.teacher_profile,
+                roll_no=str(n), full_name=f"Student {n}",
+                phone="0", batch="A", department="CS",
+            )
+            AttendanceRecord.objects.create(
+                student=student, session=self.session, method="FACE"
+            )
+            self.students.append(student)
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {tokens_for_user(user).access_token}"
+        )
+        return client
+
+    def assertNoEmbeddingSelected(self, client, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+            # Streaming exports run their queries while being consumed
+            if response.streaming:
+                b"".join(response.streaming_content)
+
+        self.assertEqual(response.status_code, 200, url)
+        for query in queries:
+            # face-status filters on the column but must not select it
+            columns = query["sql"].split(" FROM ")[0]
+            self.assertNotIn('"face_embedding"', columns, url)
+
+    def test_non_face_endpoints_never_select_the_embedding(self):
+        teacher = self.client_for(self.teacher)
+        for url in (
+            "/api/teachers/students/",
+            "/api/teachers/attendance-report/",
+            "/api/teachers/profile/",
+            "/api/attendance/live/",
+            "/api/attendance/active/",
+            "/api/accounts/face-status/",
+        ):
+            self.assertNoEmbeddingSelected(teacher, url)
+
+        student = self.client_for(self.students[0])
+        for url in (
+            "/api/students/attendance-history/",
+            "/api/accounts/face-status/",
+        ):
+            self.assertNoEmbeddingSelected(student, url)
+
+    def test_related_lookups_defer_the_embedding(self):
+        record = AttendanceRecord.objects.get(student=self.students[0])
+        self.assertIn("face_embedding", record.student.get_deferred_fields())
+        self.assertIn("face_embedding", record.session.teacher.get_deferred_fields())
+
+    def test_values_list_reads_the_embedding(self):
+        blob = User.objects.filter(pk=self.students[0].pk).values_list(
+            "face_embedding", flat=True
+        ).get()
+        self.assertEqual(bytes(blob), b"\x01" * 2048)
+
+    def test_face_status_reports_registration(self):
+        response = self.client_for(self.students[0]).get("/api/accounts/face-status/")
+        self.assertEqual(response.data, {"face_registered": True})
+
+        response = self.client_for(self.teacher).get("/api/accounts/face-status/")
+        self.assertEqual(response.data, {"face_registered": False})
+
+
+class CachedUserWriteTests(TestCase):
+    """
+    Writes through a cached request.user never put stale columns back.
+    "Another worker" is a queryset update(), which this process's cache
+    does not hear about.
+    """
+
+    def setUp(self):
+        cache.clear()
+        embedding_cache.clear()
+        self.teacher = User.objects.create_user(
+            username="teacher", email="teacher@example.com",
+            password="old-pass", role="TEACHER",
+        )
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {tokens_for_user(self.teacher).access_token}"
+        )
+
+    def test_profile_update_keeps_a_password_changed_elsewhere(self):
+        # Caches the teacher
+        self.assertEqual(self.client.get("/api/teachers/profile/").status_code, 200)
+
+        User.objects.filter(pk=self.teacher.pk).update(password=make_password("new-pass"))
+
+        response = self.client.put(
+            "/api/teachers/profile/", {"name": "renamed"}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+
+        teacher = User.objects.get(pk=self.teacher.pk)
+        self.assertEqual(teacher.username, "renamed")
+        self.assertTrue(teacher.check_password("new-pass"))
+
+    def test_embedding_version_is_read_from_the_database(self):
+        stale = User.objects.get(pk=self.teacher.pk)
+        embedding_cache.store(stale.pk, encode_embedding(np.ones(4)))
+        self.assertEqual(embedding_cache.get_or_load(stale).tolist(), [1.0] * 4)
+
+        # Re-registered in another worker; stale still has version 0
+        User.objects.filter(pk=stale.pk).update(
+            face_embedding=encode_embedding(np.full(4, 2.0)),
+            face_embedding_version=F("face_embedding_version") + 1,
+        )
+        self.assertEqual(embedding_cache.get_or_load(stale).tolist(), [2.0] * 4)
+
+        embedding_cache.store(stale.pk, None)
+        self.assertEqual(
+            User.objects.get(pk=stale.pk).face_embedding_version, 3
+        )
+        self.assertIsNone(embedding_cache.get_or_load(stale))
+
+
+class FaceEmbeddingMigrationTests(TestCase):
+    """
+    0004 rewrites pickled float64 embeddings in the float32 format and
+    back.
+    """
+
+    migration = import_module("apps.accounts.migrations.0004_convert_face_embeddings_to_float32")
+
+    def add_user(self, username, face_embedding):
+        user = User.objects.create_user(username=username, password="x", role="STUDENT")
+        User.objects.filter(pk=user.pk).update(face_embedding=face_embedding)
+        return user.pk
+
+    def stored(self, pk):
+        return User.objects.filter(pk=pk).values_list("face_embedding", flat=True).get()
+
+    def test_legacy_embeddings_are_converted_and_back(self):
+        embedding = np.random.default_rng(0).standard_normal(128)
+        legacy = self.add_user("legacy", pickle.dumps(embedding))
+        current = self.add_user("current", encode_embedding(np.ones(128)))
+        cleared = self.add_user("cleared", pickle.dumps(None))
+        absent = self.add_user("absent", None)
+        current_blob = self.stored(current)
+
+        self.migration.pickled_to_float32(apps, None)
+
+        np.testing.assert_array_equal(
+            decode_embedding(self.stored(legacy)), embedding.astype(np.float32)
+        )
+        self.assertEqual(self.stored(current), current_blob)
+        self.assertIsNone(self.stored(cleared))
+        self.assertIsNone(self.stored(absent))
+
+        # Running it again leaves converted rows alone
+        converted = self.stored(legacy)
+        self.migration.pickled_to_float32(apps, None)
+        self.assertEqual(self.stored(legacy), converted)
+
+        self.migration.float32_to_pickled(apps, None)
+        restored = pickle.loads(bytes(self.stored(legacy)))
+        self.assertEqual(restored.dtype, np.float64)
+        np.testing.assert_allclose(restored, embedding, rtol=1e-6)
@@ -2,20 +2,21 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import AllowAny, IsAuthenticated
-from rest_framework_simplejwt.tokens import RefreshToken
 
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.utils.encoding import force_bytes, force_str
-from django.core.mail import send_mail
 from django.conf import settings
 from django.contrib.auth import get_user_model
 
+from .authentication import tokens_for_user
 from .serializers import LoginSerializer
-import pickle
-from apps.face_liveness.face_matcher import FaceMatcher
+from apps.mailer.outbox import enqueue
+from apps.face_liveness.embedding_cache import embedding_cache
+from apps.face_liveness.embedding_codec import encode_embedding
+from apps.face_liveness.image_ingest import ImageRejected, decode_face_image
+from apps.face_liveness.model_registry import get_face_matcher
 
-face_matcher = FaceMatcher()
 User = get_user_model()
 token_generator = PasswordResetTokenGenerator()
 
@@ -25,7 +26,9 @@ class RegisterFaceAPIView(APIView):
     def post(self, request):
         user = request.user
 
-        if user.is_first_login:
+        # From the database: request.user may be a cached copy from
+        # before the password change
+        if User.objects.filter(pk=user.pk, is_first_login=True).exists():
             return Response(
                 {"detail": "Please change password before face registration"},
                 status=status.HTTP_403_FORBIDDEN,
@@ -44,16 +47,22 @@ class RegisterFaceAPIView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        new_embedding = face_matcher.extract_embedding(face_image)
+        try:
+            decoded = decode_face_image(face_image)
+        except ImageRejected as exc:
+            return Response({"detail": exc.detail}, status=exc.status)
+
+        face_matcher = get_face_matcher()
+        new_embedding = face_matcher.get_embedding(decoded.image)
         if new_embedding is None:
             return Response(
                 {"detail": "Face not detected"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        if user.face_embedding:
-            stored_embedding = pickle.loads(user.face_embedding)
+        stored_embedding = embedding_cache.get_or_load(user)
 
+        if stored_embedding is not None:
             match, distance = face_matcher.match(
                 stored_embedding, new_embedding
             )
@@ -68,8 +77,7 @@ class RegisterFaceAPIView(APIView):
                     status=status.HTTP_403_FORBIDDEN,
                 )
 
-        user.face_embedding = pickle.dumps(new_embedding)
-        user.save()
+        embedding_cache.store(user.pk, encode_embedding(new_embedding))
 
         return Response(
             {"detail": "Face registered successfully"},
@@ -85,7 +93,7 @@ class LoginAPIView(APIView):
         serializer.is_valid(raise_exception=True)
 
         user = serializer.validated_data["user"]
-        refresh = RefreshToken.for_user(user)
+        refresh = tokens_for_user(user)
 
         return Response(
             {
@@ -112,9 +120,10 @@ class ChangePasswordAPIView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
+        # Only these fields: request.user may be a cached copy
         user.set_password(new_password)
         user.is_first_login = False
-        user.save()
+        user.save(update_fields=["password", "is_first_login"])
 
         return Response(
             {"detail": "Password updated successfully"},
@@ -127,7 +136,11 @@ class FaceStatusAPIView(APIView):
 
     def get(self, request):
         return Response(
-            {"face_registered": bool(request.user.face_embedding)},
+            {
+                "face_registered": User.objects.filter(
+                    pk=request.user.pk, face_embedding__isnull=False
+                ).exists()
+            },
             status=status.HTTP_200_OK,
         )
 
@@ -157,12 +170,10 @@ class ForgotPasswordAPIView(APIView):
 
         reset_link = f"{settings.FRONTEND_URL}/reset-password/{uid}/{token}"
 
-        send_mail(
+        enqueue(
             subject="Reset your Smart Attendance password",
-            message=f"Click the link to reset your password:\n{reset_link}",
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[user.email],
-            fail_silently=False,
+            body=f"Click the link to reset your password:\n{reset_link}",
+            to=[user.email],
         )
 
         return Response(
@@ -200,9 +211,10 @@ class ResetPasswordAPIView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
+        # Only these fields: request.user may be a cached copy
         user.set_password(new_password)
         user.is_first_login = False
-        user.save()
+        user.save(update_fields=["password", "is_first_login"])
 
         return Response(
             {"detail": "Password reset successful"},
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 class AttendanceConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.attendance"
+
+    def ready(self):
+        import apps.attendance.live_events
@@ -0,0 +1,224 @@
+"""
+Push channel for the teacher's live attendance roster.
+
+A committed AttendanceRecord is published once with Postgres NOTIFY.
+Every ASGI process keeps one LISTEN connection, and fans each
+notification out to the server-sent-event streams open on that session
+(see views.live_attendance_stream). Teachers get a snapshot on connect
+and then one small event per mark instead of re-reading the whole
+session every few seconds.
+"""
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+
+from django.core.cache import cache
+from django.db import connection, connections, transaction
+from django.db.models import Count, Max
+from django.dispatch import receiver
+
+from .signals import session_ended
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "attendance_live"
+
+# Seconds between LISTEN polls / reconnect attempts
+LISTEN_POLL_SECONDS = 5
+RECONNECT_DELAY_SECONDS = 2
+
+
+def present_student(record):
+    profile = record.student.student_profile
+
+    return {
+        "student_id": record.student_id,
+        "roll_no": profile.roll_no,
+        "full_name": profile.full_name,
+        "marked_at": record.marked_at.strftime("%H:%M:%S"),
+        "method": record.method,
+    }
+
+
+def roster_size(session):
+    """
+    Number of students on the session teacher's roster. Cached for the
+    session's lifetime rather than counted on every dashboard refresh.
+    """
+    return cache.get_or_set(
+        f"attendance:roster-size:{session.id}",
+        lambda: session.teacher.teacher_profile.students.count(),
+        timeout=session.duration_minutes * 60,
+    )
+
+
+def session_progress(session):
+    """
+    (present count, highest record id) for a session: one indexed
+    aggregate, cheap enough to build the live roster ETag from.
+    """
+    from .models import AttendanceRecord
+
+    progress = AttendanceRecord.objects.filter(session=session).aggregate(
+        count=Count("id"),
+        last_id=Max("id"),
+    )
+    return progress["count"], progress["last_id"] or 0
+
+
+def live_snapshot(session, since_id=None, since_time=None, progress=None):
+    """
+    The roster state served by LiveAttendanceAPIView and sent as the
+    first event of every stream.
+
+    With since_id / since_time only records after that cursor are listed
+    (present_count is still the session total); "cursor" is the record
+    id to pass as ``since`` next time.
+    """
+    from .models import AttendanceRecord
+
+    present_count, last_id = progress or session_progress(session)
+
+    records = (
+        AttendanceRecord.objects
+        .filter(session=session)
+        .select_related("student__student_profile")
+        .defer("student__face_embedding")
+        .order_by("marked_at")
+    )
+    if since_id is not None:
+        records = records.filter(id__gt=since_id)
+    if since_time is not None:
+        records = records.filter(marked_at__gt=since_time)
+
+    present_students = []
+    for r in records:
+        present_students.append(present_student(r))
+        last_id = max(last_id, r.id)
+
+    return {
+        "active": True,
+        "session_id": session.id,
+        "subject": session.subject,
+        "total_students": roster_size(session),
+        "present_count": max(present_count, len(present_students)),
+        "present_students": present_students,
+        "cursor": last_id,
+        "partial": since_id is not None or since_time is not None,
+    }
+
+
+def publish_marked(record):
+    event = {"type": "marked", "session_id": record.session_id}
+    event.update(present_student(record))
+    _publish_on_commit(event)
+
+
+@receiver(session_ended)
+def publish_ended(sender, session, **kwargs):
+    _publish_on_commit({"type": "ended", "session_id": session.id})
+
+
+def _publish_on_commit(event):
+    transaction.on_commit(lambda: _publish(event))
+
+
+def _publish(event):
+    if connection.vendor != "postgresql":
+        # No NOTIFY outside Postgres; only streams in this process hear it
+        live_broker.dispatch(event)
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_notify(%s, %s)", [CHANNEL, json.dumps(event)])
+
+
+class LiveAttendanceBroker:
+    """
+    Per-process fan-out from the LISTEN connection to asyncio queues,
+    one queue per open stream, keyed by session id.
+    """
+
+    def __init__(self):
+        self._subscribers = {}
+        self._lock = threading.Lock()
+        self._listener = None
+
+    def subscribe(self, session_id):
+        queue = asyncio.Queue()
+        loop = asyncio.get_running_loop()
+
+        with self._lock:
+            self._subscribers.setdefault(session_id, set()).add((loop, queue))
+
+        self._ensure_listener()
+        return queue
+
+    def unsubscribe(self, session_id, queue):
+        with self._lock:
+            subscribers = self._subscribers.get(session_id, set())
+            subscribers.difference_update(
+                {entry for entry in subscribers if entry[1] is queue}
+            )
+            if not subscribers:
+                self._subscribers.pop(session_id, None)
+
+    def dispatch(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(event["session_id"], ()))
+
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(queue.put_nowait, event)
+
+    def _ensure_listener(self):
+        if connection.vendor != "postgresql":
+            return
+        if self._listener is not None and self._listener.is_alive():
+            return
+
+        with self._lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(
+                    target=self._listen_forever,
+                    name="attendance-live-listener",
+                    daemon=True,
+                )
+                self._listener.start()
+
+    def _listen_forever(self):
+        while True:
+            try:
+                self._listen()
+            except Exception:
+                logger.exception("Live attendance listener failed; reconnecting")
+                time.sleep(RECONNECT_DELAY_SECONDS)
+
+    def _listen(self):
+        # A dedicated connection: LISTEN needs autocommit and must not be
+        # shared with request threads or closed by CONN_MAX_AGE handling.
+        db = connections.create_connection("default")
+        db.ensure_connection()
+
+        try:
+            raw = db.connection
+            raw.autocommit = True
+
+            with raw.cursor() as cursor:
+                cursor.execute(f"LISTEN {CHANNEL}")
+
+            while True:
+                if select.select([raw], [], [], LISTEN_POLL_SECONDS) == ([], [], []):
+                    continue
+
+                raw.poll()
+                while raw.notifies:
+                    notify = raw.notifies.pop(0)
+                    self.dispatch(json.loads(notify.payload))
+        finally:
+            db.close()
+
+
+live_broker = LiveAttendanceBroker()
@@ -0,0 +1,137 @@
+"""
+Periodic clean-up for attendance tables.
+
+reap() closes sessions whose end_time has passed (instead of waiting
+for someone to hit the API after expiry) and deletes stale QR token
+rows in bounded batches, so neither token table grows with uptime.
+Expired report export jobs and their files, and sent emails older
+than a week, go in the same pass.
+It runs from the reap_attendance management command and from a
+background thread in each gunicorn worker; a Postgres advisory lock
+makes sure only one process reaps at a time.
+"""
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DELETE_BATCH_SIZE = 5000
+
+# Any QR token row older than this is unusable (tokens live seconds)
+STALE_TOKEN_AGE = timedelta(minutes=1)
+
+# Arbitrary 64-bit key for pg_try_advisory_lock, shared by all workers
+REAPER_LOCK_KEY = 0x5A7E_0001
+
+
+def expire_ended_sessions(now=None):
+    from .models import AttendanceSession
+
+    now = now or timezone.now()
+
+    expired = AttendanceSession.objects.filter(is_active=True, end_time__lt=now)
+
+    return sum(session.end() for session in expired)
+
+
+def delete_in_batches(queryset, batch_size=DELETE_BATCH_SIZE):
+    """
+    Delete the rows of a queryset batch_size at a time, each batch in its
+    own short transaction. Returns the number of rows deleted.
+    """
+    model = queryset.model
+    deleted = 0
+
+    while True:
+        ids = list(queryset.values_list("pk", flat=True)[:batch_size])
+        if not ids:
+            return deleted
+
+        count, _ = model.objects.filter(pk__in=ids).delete()
+        deleted += count
+
+
+def reap(batch_size=DELETE_BATCH_SIZE, now=None):
+    """
+    Run one clean-up pass. Returns the rows touched per table.
+    """
+    from apps.qr_attendance.models import QRToken as QRAttendanceToken
+    from apps.mailer.outbox import purge_sent
+    from apps.reports.jobs import reap_export_jobs
+
+    from .models import QRToken
+
+    now = now or timezone.now()
+    cutoff = now - STALE_TOKEN_AGE
+
+    return {
+        "sessions_expired": expire_ended_sessions(now),
+        "attendance_qr_tokens_deleted": delete_in_batches(
+            QRToken.objects.filter(created_at__lt=cutoff), batch_size
+        ),
+        "qr_attendance_tokens_deleted": delete_in_batches(
+            QRAttendanceToken.objects.filter(expires_at__lt=cutoff), batch_size
+        ),
+        "export_jobs_deleted": reap_export_jobs(now),
+        "sent_emails_deleted": purge_sent(now=now, batch_size=batch_size),
+    }
+
+
+def reap_if_leader(batch_size=DELETE_BATCH_SIZE):
+    """
+    reap() unless another process holds the reaper lock. Returns the
+    report, or None if this process skipped the pass.
+    """
+    if connection.vendor != "postgresql":
+        return reap(batch_size)
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_try_advisory_lock(%s)", [REAPER_LOCK_KEY])
+        if not cursor.fetchone()[0]:
+            return None
+
+    try:
+        return reap(batch_size)
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_unlock(%s)", [REAPER_LOCK_KEY])
+
+
+def _run_forever(interval):
+    while True:
+        time.sleep(interval)
+
+        try:
+            report = reap_if_leader()
+            if report and any(report.values()):
+                logger.info("Attendance reaper: %s", report)
+        except Exception:
+            logger.exception("Attendance reaper pass failed")
+        finally:
+            # Do not keep an idle connection open between passes
+            connection.close()
+
+
+def start_reaper(interval=None):
+    """
+    Start the background reaper thread for this process. An interval of
+    0 disables it.
+    """
+    interval = settings.ATTENDANCE_REAPER_INTERVAL_SECONDS if interval is None else interval
+    if not interval:
+        return None
+
+    thread = threading.Thread(
+        target=_run_forever,
+        args=(interval,),
+        name="attendance-reaper",
+        daemon=True,
+    )
+    thread.start()
+    return thread
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from apps.attendance.maintenance import DELETE_BATCH_SIZE, reap_if_leader
+
+
+class Command(BaseCommand):
+    help = "Close expired attendance sessions and delete stale QR tokens"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DELETE_BATCH_SIZE,
+            help="Rows deleted per transaction",
+        )
+
+    def handle(self, *args, **options):
+        # Takes the same lock as the worker threads so passes never overlap
+        report = reap_if_leader(batch_size=options["batch_size"])
+        if report is None:
+            self.stdout.write("Another process is reaping; skipped")
+            return
+
+        for name, count in report.items():
+            self.stdout.write(f"{name.replace('_', ' ')}: {count}")
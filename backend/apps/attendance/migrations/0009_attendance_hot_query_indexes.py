@@ -0,0 +1,39 @@
+# Generated by Django 5.0.6 on 2026-10-18 17:29
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("attendance", "0008_alter_attendancesession_radius_meters"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="attendancerecord",
+            index=models.Index(
+                fields=["session", "marked_at"],
+                include=("id", "student", "method"),
+                name="att_record_session_marked",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="attendancesession",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["teacher"],
+                name="att_session_active_teacher",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="attendancesession",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["-start_time"],
+                name="att_session_active_recent",
+            ),
+        ),
+    ]
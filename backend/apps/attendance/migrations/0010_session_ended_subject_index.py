@@ -0,0 +1,23 @@
+# Generated by Django 5.0.6 on 2026-10-18 18:14
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("attendance", "0009_attendance_hot_query_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="attendancesession",
+            index=models.Index(
+                condition=models.Q(("is_active", False)),
+                fields=["teacher", "subject"],
+                name="att_session_ended_subject",
+            ),
+        ),
+    ]
@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Q
 from django.conf import settings
 from django.utils import timezone
 from datetime import timedelta
@@ -27,9 +28,57 @@ class AttendanceSession(models.Model):
 
     is_active = models.BooleanField(default=True)
 
+    class Meta:
+        indexes = [
+            # Only a handful of sessions are ever active; partial indexes
+            # keep these lookups small however many have ended.
+            models.Index(
+                fields=["teacher"],
+                condition=Q(is_active=True),
+                name="att_session_active_teacher",
+            ),
+            models.Index(
+                fields=["-start_time"],
+                condition=Q(is_active=True),
+                name="att_session_active_recent",
+            ),
+            # Ended sessions per subject, for AttendanceSummary totals
+            models.Index(
+                fields=["teacher", "subject"],
+                condition=Q(is_active=False),
+                name="att_session_ended_subject",
+            ),
+        ]
+
     def has_expired(self):
         return timezone.now() > self.end_time
 
+    def end(self, end_time=None):
+        """
+        Mark the session inactive and send session_ended. Only the call
+        that actually flips is_active sends the signal, so concurrent
+        or repeated ends are counted once. Returns True if it did.
+        """
+        from .signals import session_ended
+
+        fields = {"is_active": False}
+        if end_time is not None:
+            fields["end_time"] = end_time
+
+        with transaction.atomic():
+            ended = AttendanceSession.objects.filter(
+                pk=self.pk,
+                is_active=True,
+            ).update(**fields)
+
+            for name, value in fields.items():
+                setattr(self, name, value)
+
+            if ended:
+                session_ended.send(sender=AttendanceSession, session=self)
+
+        return bool(ended)
+
     def __str__(self):
         return f"{self.subject} ({self.teacher})"
 
@@ -67,6 +116,15 @@ class AttendanceRecord(models.Model):
                 name="unique_attendance_per_student_per_session"
             )
         ]
+        indexes = [
+            # Per-session roster in marking order, answered from the index
+            # alone (live roster, its cursor and count)
+            models.Index(
+                fields=["session", "marked_at"],
+                include=["id", "student", "method"],
+                name="att_record_session_marked",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.student} - {self.session.subject}"
@@ -0,0 +1,70 @@
+"""
+Stateless rotating QR tokens.
+
+A token is "<session id>.<window>.<signature>", where window is the
+index of the current QR_TOKEN_WINDOW_SECONDS slot and the signature is
+an HMAC (SECRET_KEY) over the first two parts. Generating a token is
+pure computation and validating one needs no lookup; a scanned token is
+accepted for QR_TOKEN_SKEW_WINDOWS windows either side of the current
+one. Replays within that span hit the unique attendance constraint.
+"""
+import time
+
+from django.conf import settings
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+SALT = "apps.attendance.qr_tokens"
+
+
+class InvalidQRToken(Exception):
+    def __init__(self, detail):
+        super().__init__(detail)
+        self.detail = detail
+
+
+def current_window(now=None):
+    now = time.time() if now is None else now
+    return int(now // settings.QR_TOKEN_WINDOW_SECONDS)
+
+
+def seconds_left(now=None):
+    """
+    Seconds until the current window rolls over.
+    """
+    now = time.time() if now is None else now
+    window_seconds = settings.QR_TOKEN_WINDOW_SECONDS
+    return max(1, round(window_seconds - now % window_seconds))
+
+
+def _signature(session_id, window):
+    return salted_hmac(
+        SALT,
+        f"{session_id}.{window}",
+        algorithm="sha256",
+    ).hexdigest()[:32]
+
+
+def make_token(session_id, now=None):
+    window = current_window(now)
+    return f"{session_id}.{window}.{_signature(session_id, window)}"
+
+
+def validate_token(token, now=None):
+    """
+    Session id a token was issued for. Raises InvalidQRToken if it is
+    malformed, forged or outside the accepted windows.
+    """
+    try:
+        session_id, window, signature = str(token).split(".")
+        session_id = int(session_id)
+        window = int(window)
+    except ValueError:
+        raise InvalidQRToken("Invalid QR code")
+
+    if not constant_time_compare(signature, _signature(session_id, window)):
+        raise InvalidQRToken("Invalid QR code")
+
+    if abs(current_window(now) - window) > settings.QR_TOKEN_SKEW_WINDOWS:
+        raise InvalidQRToken("QR code expired")
+
+    return session_id
@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+# Sent once per session when it stops being active, whether the teacher
+# ended it, it expired or a new session replaced it. Arguments: session.
+session_ended = Signal()
@@ -0,0 +1,75 @@
+"""
+Attendance statistics for a teacher's roster.
+
+Present counts come from the AttendanceSummary table (apps.reports),
+so the cost does not grow in queries with the size of the class or
+with the number of sessions held.
+"""
+from django.db.models import IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from apps.reports.models import AttendanceSummary
+from apps.students.models import StudentProfile
+
+from .models import AttendanceSession
+
+
+def attendance_percentage(present_sessions, total_sessions):
+    if total_sessions <= 0:
+        return 0
+    return round(present_sessions / total_sessions * 100, 2)
+
+
+def iter_roster_attendance(teacher, chunk_size=2000):
+    """
+    Yield one dict per student of ``teacher`` (a User) with their present
+    sessions, the teacher's ended sessions and the percentage.
+
+    Two queries whatever the roster size; the roster is read with
+    iterator(), i.e. a server-side cursor on Postgres, so rows are never
+    all held in memory at once.
+    """
+    total_sessions = AttendanceSession.objects.filter(
+        teacher=teacher,
+        is_active=False,
+    ).count()
+
+    # Sessions marked present with this teacher, including running ones
+    marked = (
+        AttendanceSummary.objects
+        .filter(teacher=teacher, student=OuterRef("user_id"))
+        .values("student")
+        .annotate(marked=Sum("present_sessions") + Sum("pending_sessions"))
+        .values("marked")
+    )
+
+    students = (
+        StudentProfile.objects
+        .filter(teacher__user=teacher)
+        .select_related("user")
+        .only("roll_no", "full_name", "batch", "department", "user__email")
+        .annotate(
+            present_sessions=Coalesce(
+                Subquery(marked, output_field=IntegerField()), 0
+            )
+        )
+        .order_by("id")
+    )
+
+    for student in students.iterator(chunk_size=chunk_size):
+        yield {
+            "roll_no": student.roll_no,
+            "full_name": student.full_name,
+            "email": student.user.email,
+            "batch": student.batch,
+            "department": student.department,
+            "present_sessions": student.present_sessions,
+            "total_sessions": total_sessions,
+            "attendance_percentage": attendance_percentage(
+                student.present_sessions, total_sessions
+            ),
+        }
+
+
+def roster_attendance(teacher):
+    return list(iter_roster_attendance(teacher))
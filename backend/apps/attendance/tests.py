@@ -0,0 +1,433 @@
+from datetime import timedelta
+from unittest import mock, skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import AsyncClient, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.accounts.authentication import tokens_for_user
+from apps.qr_attendance.models import QRToken as QRAttendanceToken
+from apps.students.models import StudentProfile
+
+from . import maintenance
+from .models import AttendanceRecord, AttendanceSession
+from .qr_tokens import InvalidQRToken, make_token, validate_token
+
+User = get_user_model()
+
+
+@skipUnless(connection.vendor == "postgresql", "EXPLAIN plans are Postgres-specific")
+class HotQueryIndexTests(TestCase):
+    """
+    The hot attendance queries can be answered from their tailored
+    indexes. Sequential scans are disabled so the planner shows which
+    index it would use on a large table rather than scanning this tiny
+    one; tests/attendance_index_benchmark.py records the real plans on
+    1M seeded records.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+
+        cls.teacher = User.objects.create_user(
+            username="teacher", password="x", role="TEACHER"
+        )
+        cls.student = User.objects.create_user(
+            username="student", password="x", role="STUDENT"
+        )
+
+        cls.ended = AttendanceSession.objects.create(
+            teacher=cls.teacher,
+            subject="Maths",
+            duration_minutes=10,
+            end_time=now - timedelta(days=1),
+            is_active=False,
+        )
+        cls.session = AttendanceSession.objects.create(
+            teacher=cls.teacher,
+            subject="Maths",
+            duration_minutes=10,
+            end_time=now + timedelta(minutes=10),
+        )
+
+        AttendanceRecord.objects.create(
+            student=cls.student, session=cls.session, method="FACE"
+        )
+
+    def explain(self, queryset):
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        return queryset.explain()
+
+    def test_active_session_for_teacher_uses_partial_index(self):
+        plan = self.explain(
+            AttendanceSession.objects.filter(teacher=self.teacher, is_active=True)
+        )
+        self.assertIn("att_session_active_teacher", plan)
+
+    def test_latest_active_session_uses_partial_index(self):
+        plan = self.explain(
+            AttendanceSession.objects.filter(is_active=True).order_by("-start_time")[:1]
+        )
+        self.assertIn("att_session_active_recent", plan)
+
+    def test_session_roster_uses_covering_index(self):
+        plan = self.explain(
+            AttendanceRecord.objects
+            .filter(session=self.session)
+            .order_by("marked_at")
+            .values_list("id", "student_id", "method", "marked_at")
+        )
+        # Index Only once the table is vacuumed (see the benchmark)
+        self.assertIn("att_record_session_marked", plan)
+
+
+class LiveAttendanceTests(TestCase):
+    """
+    The polled live roster: cursors, ETags and the cached roster size.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.teacher = User.objects.create_user(
+            username="teacher", password="x", role="TEACHER"
+        )
+        self.students = [self.add_student(n) for n in range(3)]
+        self.session = AttendanceSession.objects.create(
+            teacher=self.teacher,
+            subject="Maths",
+            duration_minutes=10,
+            end_time=timezone.now() + timedelta(minutes=10),
+        )
+        self.started = timezone.now().replace(microsecond=0)
+        self.records = [self.mark(student, minutes=n) for n, student in enumerate(self.students[:2])]
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.teacher)
+
+    def add_student(self, n):
+        user = User.objects.create_user(
+            username=f"student{n}", password="x", role="STUDENT"
+        )
+        StudentProfile.objects.create(
+            user=user,
+            teacher=self.teacher.teacher_profile,
+            roll_no=str(n),
+            full_name=f"Student {n}",
+            phone="0",
+            batch="A",
+            department="CS",
+        )
+        return user
+
+    def mark(self, student, minutes):
+        record = AttendanceRecord.objects.create(
+            student=student, session=self.session, method="QR"
+        )
+        AttendanceRecord.objects.filter(pk=record.pk).update(
+            marked_at=self.started + timedelta(minutes=minutes)
+        )
+        return record
+
+    def live(self, **headers):
+        since = headers.pop("since", None)
+        return self.client.get(
+            "/api/attendance/live/", {"since": since} if since is not None else {}, **headers
+        )
+
+    def listed(self, response):
+        return [row["student_id"] for row in response.data["present_students"]]
+
+    def test_full_snapshot(self):
+        response = self.live()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.listed(response), [s.pk for s in self.students[:2]])
+        self.assertEqual(response.data["present_count"], 2)
+        self.assertEqual(response.data["total_students"], 3)
+        self.assertEqual(response.data["cursor"], self.records[-1].pk)
+        self.assertFalse(response.data["partial"])
+
+    def test_id_cursor(self):
+        response = self.live(since=str(self.records[0].pk))
+
+        self.assertEqual(self.listed(response), [self.students[1].pk])
+        self.assertEqual(response.data["present_count"], 2)
+        self.assertTrue(response.data["partial"])
+
+        response = self.live(since=str(response.data["cursor"]))
+        self.assertEqual(self.listed(response), [])
+        self.assertEqual(response.data["cursor"], self.records[-1].pk)
+
+    def test_iso_cursor(self):
+        since = (self.started + timedelta(seconds=30)).isoformat()
+        response = self.live(since=since)
+
+        self.assertEqual(self.listed(response), [self.students[1].pk])
+        self.assertTrue(response.data["partial"])
+
+        # Naive times are read in the current time zone
+        naive = timezone.make_naive(self.started + timedelta(seconds=30)).isoformat()
+        self.assertEqual(self.listed(self.live(since=naive)), [self.students[1].pk])
+
+    def test_bad_cursor(self):
+        response = self.live(since="yesterday")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["detail"], "Invalid since cursor")
+
+    def test_unchanged_roster_is_not_modified(self):
+        etag = self.live()["ETag"]
+
+        self.assertEqual(self.live(HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # Other cursors and new marks change the ETag
+        self.assertEqual(
+            self.live(since=str(self.records[0].pk), HTTP_IF_NONE_MATCH=etag).status_code, 200
+        )
+        self.mark(self.students[2], minutes=2)
+        self.assertEqual(self.live(HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_total_students_is_cached(self):
+        self.assertEqual(self.live().data["total_students"], 3)
+
+        self.add_student(3)
+        self.assertEqual(self.live().data["total_students"], 3)
+
+        cache.clear()
+        self.assertEqual(self.live().data["total_students"], 4)
+
+
+class LiveStreamTests(TestCase):
+    """
+    The SSE stream only runs under ASGI; WSGI requests are refused so
+    the dashboard falls back to polling.
+    """
+
+    def setUp(self):
+        teacher = User.objects.create_user(
+            username="teacher", password="x", role="TEACHER"
+        )
+        self.auth = f"Bearer {tokens_for_user(teacher).access_token}"
+
+    def test_stream_is_refused_under_wsgi(self):
+        response = self.client.get(
+            "/api/attendance/live/stream/", HTTP_AUTHORIZATION=self.auth
+        )
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()["error_code"], "LIVE_STREAM_UNAVAILABLE")
+
+    async def test_stream_answers_under_asgi(self):
+        response = await AsyncClient().get(
+            "/api/attendance/live/stream/", headers={"Authorization": self.auth}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"active": False})
+
+
+@override_settings(QR_TOKEN_WINDOW_SECONDS=5, QR_TOKEN_SKEW_WINDOWS=1)
+class QRTokenTests(SimpleTestCase):
+
+    def assertRejected(self, token, detail, now=1000.0):
+        with self.assertRaises(InvalidQRToken) as raised:
+            validate_token(token, now=now)
+        self.assertEqual(raised.exception.detail, detail)
+
+    def test_valid_token(self):
+        self.assertEqual(validate_token(make_token(42, now=1000.0), now=1000.0), 42)
+
+    def test_forged_or_truncated_signature(self):
+        session_id, window, signature = make_token(42, now=1000.0).split(".")
+        forged = "0" if signature[0] != "0" else "1"
+
+        self.assertRejected(f"{session_id}.{window}.{forged}{signature[1:]}", "Invalid QR code")
+        self.assertRejected(f"{session_id}.{window}.{signature[:-1]}", "Invalid QR code")
+        # Re-pointed at another session or window
+        self.assertRejected(f"43.{window}.{signature}", "Invalid QR code")
+        self.assertRejected(f"{session_id}.{int(window) + 1}.{signature}", "Invalid QR code")
+
+    def test_malformed_token(self):
+        for token in ("", "42", "42.200", "42.200.sig.extra", "x.200.sig", "42.y.sig", None):
+            with self.subTest(token=token):
+                self.assertRejected(token, "Invalid QR code")
+
+    def test_skew_windows(self):
+        token = make_token(42, now=1000.0)  # window 200
+
+        self.assertEqual(validate_token(token, now=995.0), 42)
+        self.assertEqual(validate_token(token, now=1009.9), 42)
+        self.assertRejected(token, "QR code expired", now=994.9)
+        self.assertRejected(token, "QR code expired", now=1010.0)
+
+
+class QRMarkTests(TestCase):
+    """
+    Marking with a QR token through attendance/mark/ and qr/mark/.
+    """
+
+    def setUp(self):
+        self.teacher = User.objects.create_user(
+            username="teacher", password="x", role="TEACHER"
+        )
+        self.student = User.objects.create_user(
+            username="student", password="x", role="STUDENT"
+        )
+        StudentProfile.objects.create(
+            user=self.student,
+            teacher=self.teacher.teacher_profile,
+            roll_no="1",
+            full_name="Student",
+            phone="0",
+            batch="A",
+            department="CS",
+        )
+        self.session, self.other = (
+            AttendanceSession.objects.create(
+                teacher=self.teacher,
+                subject=subject,
+                duration_minutes=10,
+                end_time=timezone.now() + timedelta(minutes=10),
+            )
+            for subject in ("Maths", "Physics")
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def mark(self, qr_token):
+        return self.client.post(
+            "/api/attendance/mark/",
+            {"session_id": self.session.id, "method": "QR", "qr_token": qr_token},
+        )
+
+    def test_token_for_the_session_marks(self):
+        self.assertEqual(self.mark(make_token(self.session.id)).status_code, 201)
+        self.assertEqual(AttendanceRecord.objects.get().session, self.session)
+
+    def test_token_for_another_session_is_rejected(self):
+        response = self.mark(make_token(self.other.id))
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["detail"], "Invalid QR code")
+        self.assertFalse(AttendanceRecord.objects.exists())
+
+    def test_replayed_qr_mark_is_rejected(self):
+        token = make_token(self.session.id)
+
+        first = self.client.post("/api/qr/mark/", {"token": token})
+        replay = self.client.post("/api/qr/mark/", {"token": token})
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(replay.status_code, 400)
+        self.assertEqual(replay.json()["detail"], "Attendance already marked")
+        self.assertEqual(AttendanceRecord.objects.count(), 1)
+
+
+class ReaperTests(TestCase):
+
+    def setUp(self):
+        self.teacher = User.objects.create_user(
+            username="teacher", password="x", role="TEACHER"
+        )
+        self.now = timezone.now()
+
+    def session(self, ends_in, is_active=True):
+        return AttendanceSession.objects.create(
+            teacher=self.teacher,
+            subject="Maths",
+            duration_minutes=10,
+            end_time=self.now + ends_in,
+            is_active=is_active,
+        )
+
+    def test_only_ended_sessions_expire(self):
+        overdue = self.session(timedelta(minutes=-1))
+        running = self.session(timedelta(minutes=5))
+        closed = self.session(timedelta(minutes=-30), is_active=False)
+
+        self.assertEqual(maintenance.expire_ended_sessions(self.now), 1)
+        self.assertEqual(maintenance.expire_ended_sessions(self.now), 0)
+
+        overdue.refresh_from_db()
+        running.refresh_from_db()
+        closed.refresh_from_db()
+        self.assertFalse(overdue.is_active)
+        self.assertTrue(running.is_active)
+        self.assertFalse(closed.is_active)
+
+    def test_delete_in_batches_spans_batches(self):
+        stale = self.now - timedelta(minutes=5)
+        for session_id in range(7):
+            QRAttendanceToken.objects.create(session_id=session_id, expires_at=stale)
+        fresh = QRAttendanceToken.objects.create(
+            session_id=99, expires_at=self.now + timedelta(minutes=5)
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            deleted = maintenance.delete_in_batches(
+                QRAttendanceToken.objects.filter(expires_at__lt=self.now), batch_size=3
+            )
+
+        self.assertEqual(deleted, 7)
+        deletes = [q for q in queries if q["sql"].startswith("DELETE")]
+        self.assertEqual(len(deletes), 3)
+        self.assertEqual(list(QRAttendanceToken.objects.all()), [fresh])
+
+    def test_reap_reports_every_table(self):
+        self.session(timedelta(minutes=-1))
+        QRAttendanceToken.objects.create(
+            session_id=1, expires_at=self.now - timedelta(minutes=5)
+        )
+
+        report = maintenance.reap(batch_size=2, now=self.now)
+
+        self.assertEqual(report["sessions_expired"], 1)
+        self.assertEqual(report["qr_attendance_tokens_deleted"], 1)
+        self.assertEqual(report["attendance_qr_tokens_deleted"], 0)
+
+    def postgres_connection(self, lock_acquired):
+        fake = mock.MagicMock(vendor="postgresql")
+        cursor = fake.cursor.return_value.__enter__.return_value
+        cursor.fetchone.return_value = (lock_acquired,)
+        return fake, cursor
+
+    def test_pass_is_skipped_while_another_process_holds_the_lock(self):
+        fake, cursor = self.postgres_connection(lock_acquired=False)
+
+        with mock.patch.object(maintenance, "connection", fake), \
+                mock.patch.object(maintenance, "reap") as reap:
+            self.assertIsNone(maintenance.reap_if_leader())
+
+        reap.assert_not_called()
+        executed = [call.args[0] for call in cursor.execute.call_args_list]
+        self.assertEqual(executed, ["SELECT pg_try_advisory_lock(%s)"])
+
+    def test_lock_is_released_after_the_pass(self):
+        fake, cursor = self.postgres_connection(lock_acquired=True)
+
+        with mock.patch.object(maintenance, "connection", fake), \
+                mock.patch.object(maintenance, "reap", side_effect=RuntimeError) as reap:
+            with self.assertRaises(RuntimeError):
+                maintenance.reap_if_leader(batch_size=10)
+
+        reap.assert_called_once_with(10)
+        executed = [call.args[0] for call in cursor.execute.call_args_list]
+        self.assertEqual(executed[-1], "SELECT pg_advisory_unlock(%s)")
+
+    def test_command_reports_a_skipped_pass(self):
+        from io import StringIO
+
+        from django.core.management import call_command
+
+        out = StringIO()
+        with mock.patch(
+            "apps.attendance.management.commands.reap_attendance.reap_if_leader",
+            return_value=None,
+        ):
+            call_command("reap_attendance", stdout=out)
+
+        self.assertIn("skipped", out.getvalue())
@@ -5,6 +5,7 @@ from .views import (
     MarkAttendanceAPIView,
 )
 from .views import GenerateQRTokenAPIView, ActiveAttendanceSessionAPIView, LiveAttendanceAPIView
+from .views import live_attendance_stream
 
 
 urlpatterns = [
@@ -14,4 +15,5 @@ urlpatterns = [
     path("qr/", GenerateQRTokenAPIView.as_view(), name="generate-qr"),
     path("active/", ActiveAttendanceSessionAPIView.as_view()),
     path("live/", LiveAttendanceAPIView.as_view()),
+    path("live/stream/", live_attendance_stream),
 ]
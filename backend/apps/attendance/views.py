@@ -2,28 +2,44 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
-import pickle
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+import asyncio
+import json
+import logging
 import math
 
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
 from django.db import transaction, IntegrityError
+from django.http import JsonResponse, StreamingHttpResponse
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from datetime import timedelta
-import secrets
 
+from apps.face_liveness.embedding_cache import embedding_cache
+from apps.face_liveness.image_ingest import ImageRejected, decode_face_image
 from apps.face_liveness.liveness_engine import LivenessEngine
-from apps.face_liveness.face_matcher import FaceMatcher
-from anti_spoofing.spoof_detector import SpoofDetector
-
-from .models import AttendanceSession, AttendanceRecord, QRToken
+from apps.face_liveness.model_registry import (
+    get_face_matcher,
+    get_verification_service,
+)
+from apps.face_liveness.verification import VerificationOverloaded
+
+from .live_events import (
+    live_broker,
+    live_snapshot,
+    publish_marked,
+    session_progress,
+)
+from .models import AttendanceSession, AttendanceRecord
+from .qr_tokens import InvalidQRToken, make_token, seconds_left, validate_token
 from .serializers import AttendanceSessionSerializer
 
-import cv2
-import numpy as np
-
+logger = logging.getLogger(__name__)
 
 liveness_engine = LivenessEngine()
-face_matcher = FaceMatcher()
-spoof_detector = SpoofDetector()
 
 
 # ✅ FIXED LOCATION CHECK (GPS-REALISTIC)
@@ -72,10 +88,11 @@ class StartAttendanceSessionAPIView(APIView):
         end_time = start_time + timedelta(minutes=int(duration))
 
         with transaction.atomic():
-            AttendanceSession.objects.filter(
+            for previous in AttendanceSession.objects.filter(
                 teacher=request.user,
                 is_active=True
-            ).update(is_active=False)
+            ):
+                previous.end()
 
             session = AttendanceSession.objects.create(
                 teacher=request.user,
@@ -88,6 +105,9 @@ class StartAttendanceSessionAPIView(APIView):
                 end_time=end_time
             )
 
+        # Decode the roster's embeddings before students start marking
+        embedding_cache.warm_roster(request.user)
+
         return Response(
             AttendanceSessionSerializer(session).data,
             status=201
@@ -110,9 +130,7 @@ class EndAttendanceSessionAPIView(APIView):
         except AttendanceSession.DoesNotExist:
             return Response({"detail": "Active session not found"}, status=404)
 
-        session.is_active = False
-        session.end_time = timezone.now()
-        session.save()
+        session.end(end_time=timezone.now())
 
         return Response({"detail": "Session ended"}, status=200)
 
@@ -132,13 +150,11 @@ class GenerateQRTokenAPIView(APIView):
         except AttendanceSession.DoesNotExist:
             return Response({"detail": "No active session"}, status=404)
 
-        token = secrets.token_hex(16)
-        qr = QRToken.objects.create(session=session, token=token)
-
+        # Signed, not stored: see qr_tokens
         return Response({
             "session_id": session.id,
-            "qr_token": qr.token,
-            "expires_in": 5
+            "qr_token": make_token(session.id),
+            "expires_in": seconds_left()
         })
 
 
@@ -164,8 +180,7 @@ class MarkAttendanceAPIView(APIView):
             return Response({"detail": "Session not active"}, status=404)
 
         if session.has_expired():
-            session.is_active = False
-            session.save()
+            session.end()
             return Response(
                 {"detail": "Attendance session has ended"},
                 status=403
@@ -185,6 +200,15 @@ class MarkAttendanceAPIView(APIView):
                 status=403
             )
 
+        if method == "QR":
+            try:
+                token_session_id = validate_token(request.data.get("qr_token"))
+            except InvalidQRToken as exc:
+                return Response({"detail": exc.detail}, status=400)
+
+            if token_session_id != session.id:
+                return Response({"detail": "Invalid QR code"}, status=400)
+
         # ✅ LOCATION CHECK FIXED
         if method == "FACE":
             lat = request.data.get("latitude")
@@ -225,13 +249,30 @@ class MarkAttendanceAPIView(APIView):
             if not face_image:
                 return Response({"detail": "Face image required"}, status=400)
 
-            img_array = np.frombuffer(face_image.read(), np.uint8)
-            face_img = cv2.imdecode(img_array, cv2.IMREAD_COLOR)
+            try:
+                decoded = decode_face_image(face_image)
+            except ImageRejected as exc:
+                return Response({"detail": exc.detail}, status=exc.status)
 
-            if face_img is None:
-                return Response({"detail": "Invalid image"}, status=400)
+            logger.debug(
+                "Decoded face image %s at 1/%d in %.1f ms",
+                decoded.original_size, decoded.reduction, decoded.decode_ms,
+            )
 
-            if not spoof_detector.is_real(face_img):
+            try:
+                verification = get_verification_service().verify(decoded.image)
+            except (VerificationOverloaded, TimeoutError):
+                return Response(
+                    {"detail": "Face verification busy, please retry"},
+                    status=503
+                )
+
+            if not verification.face_detected:
+                return Response({"detail": "No face detected"}, status=400)
+
+            logger.debug("Spoof score %.4f", verification.spoof_score)
+
+            if not verification.is_real:
                 return Response({"detail": "Spoof detected"}, status=400)
 
             blink_ok = request.data.get("blink_ok") == "true"
@@ -246,23 +287,23 @@ class MarkAttendanceAPIView(APIView):
             if not is_live:
                 return Response({"detail": "Liveness failed"}, status=400)
 
-            if not request.user.face_embedding:
+            stored_embedding = embedding_cache.get_or_load(request.user)
+
+            if stored_embedding is None:
                 return Response({"detail": "Face not registered"}, status=403)
 
-            stored_embedding = pickle.loads(request.user.face_embedding)
-            live_embedding = face_matcher.get_embedding(face_img)
+            live_embedding = verification.embedding
 
             if live_embedding is None:
                 return Response({"detail": "No face detected"}, status=400)
 
-            match, similarity = face_matcher.match(
+            match, similarity = get_face_matcher().match(
                 stored_embedding,
                 live_embedding
             )
 
             if not match:
-                request.user.face_embedding = None
-                request.user.save()
+                embedding_cache.store(request.user.pk, None)
                 return Response(
                     {
                         "detail": "Face mismatch",
@@ -273,11 +314,13 @@ class MarkAttendanceAPIView(APIView):
                 )
 
         try:
-            AttendanceRecord.objects.create(
-                student=request.user,
-                session=session,
-                method=method
-            )
+            with transaction.atomic():
+                record = AttendanceRecord.objects.create(
+                    student=request.user,
+                    session=session,
+                    method=method
+                )
+                publish_marked(record)
         except IntegrityError:
             return Response(
                 {"detail": "Attendance already marked"},
@@ -299,8 +342,7 @@ class ActiveAttendanceSessionAPIView(APIView):
             return Response({"active": False})
 
         if session.has_expired():
-            session.is_active = False
-            session.save()
+            session.end()
             return Response({"active": False})
 
         return Response({
@@ -331,30 +373,124 @@ class LiveAttendanceAPIView(APIView):
         except AttendanceSession.DoesNotExist:
             return Response({"active": False})
 
-        records = (
-            AttendanceRecord.objects
-            .filter(session=session)
-            .select_related("student__student_profile")
-            .order_by("marked_at")
+        # ?since=<record id> or ?since=<ISO marked_at> returns only newer marks
+        since = request.query_params.get("since")
+        since_id = since_time = None
+
+        if since:
+            if since.isdigit():
+                since_id = int(since)
+            else:
+                since_time = parse_datetime(since)
+                if since_time is None:
+                    return Response({"detail": "Invalid since cursor"}, status=400)
+                if timezone.is_naive(since_time):
+                    since_time = timezone.make_aware(since_time)
+
+        progress = session_progress(session)
+        etag = '"live-{}-{}-{}-{}"'.format(session.id, progress[0], progress[1], since or "")
+
+        if etag in request.headers.get("If-None-Match", ""):
+            return Response(status=304, headers={"ETag": etag})
+
+        return Response(
+            live_snapshot(session, since_id, since_time, progress),
+            headers={"ETag": etag}
         )
 
-        present_students = [
+
+# Seconds between SSE comments that keep proxies from closing an idle stream
+LIVE_STREAM_KEEPALIVE_SECONDS = 15
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _authenticate(request):
+    drf_request = Request(
+        request,
+        authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES],
+    )
+    user = drf_request.user
+    if user.is_authenticated:
+        # Tokens without a role claim load the user for it; do that
+        # here, off the event loop
+        user.role
+    return user
+
+
+async def live_attendance_stream(request):
+    """
+    Server-sent events for the teacher's active session: a "snapshot"
+    event with the same body as LiveAttendanceAPIView, then one "marked"
+    event per new record and an "ended" event when the session closes.
+
+    Served by the ASGI app (config/asgi.py) only. Under WSGI Django
+    reads the whole async iterator before sending a byte, so the stream
+    is refused there and the dashboard polls LiveAttendanceAPIView.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
             {
-                "roll_no": r.student.student_profile.roll_no,
-                "full_name": r.student.student_profile.full_name,
-                "marked_at": r.marked_at.strftime("%H:%M:%S"),
-                "method": r.method
-            }
-            for r in records
-        ]
+                "detail": "Live stream needs the ASGI server",
+                "error_code": "LIVE_STREAM_UNAVAILABLE",
+            },
+            status=503,
+        )
 
-        total_students = session.teacher.teacher_profile.students.count()
+    try:
+        user = await sync_to_async(_authenticate)(request)
+    except APIException as exc:
+        return JsonResponse({"detail": str(exc.detail)}, status=exc.status_code)
 
-        return Response({
-            "active": True,
-            "session_id": session.id,
-            "subject": session.subject,
-            "total_students": total_students,
-            "present_count": len(present_students),
-            "present_students": present_students
-        })
+    if not user.is_authenticated:
+        return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+
+    if user.role != "TEACHER":
+        return JsonResponse({"detail": "Only teachers"}, status=403)
+
+    session = await (
+        AttendanceSession.objects
+        .select_related("teacher__teacher_profile")
+        .defer("teacher__face_embedding")
+        .filter(teacher_id=user.pk, is_active=True)
+        .afirst()
+    )
+    if session is None:
+        return JsonResponse({"active": False})
+
+    # Subscribe before reading the snapshot so no mark falls in between;
+    # the client ignores events for students already in the snapshot.
+    queue = live_broker.subscribe(session.id)
+
+    try:
+        snapshot = await sync_to_async(live_snapshot)(session)
+    except Exception:
+        live_broker.unsubscribe(session.id, queue)
+        raise
+
+    async def events():
+        try:
+            yield _sse("snapshot", snapshot)
+
+            while True:
+                try:
+                    event = await asyncio.wait_for(
+                        queue.get(), LIVE_STREAM_KEEPALIVE_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+
+                yield _sse(event["type"], event)
+
+                if event["type"] == "ended":
+                    break
+        finally:
+            live_broker.unsubscribe(session.id, queue)
+
+    response = StreamingHttpResponse(events(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
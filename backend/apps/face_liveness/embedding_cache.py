@@ -0,0 +1,145 @@
+import logging
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import F
+
+from apps.accounts.authentication import forget_user
+
+from .embedding_codec import decode_embedding
+
+logger = logging.getLogger(__name__)
+
+class EmbeddingCache:
+    """
+    Per-process LRU cache of decoded face embeddings.
+
+    Entries are keyed by user id and stamped with the user's
+    ``face_embedding_version``; a lookup with any other version is a
+    miss, so a re-registered face is never served from a stale entry
+    even if another process did the write. The version is always read
+    from the database: request.user may be a cached copy
+    (apps.accounts.authentication) that predates the write.
+    """
+
+    def __init__(self, max_size=10000):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id, version):
+        with self._lock:
+            entry = self._entries.get(user_id)
+
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, user_id, version, embedding):
+        with self._lock:
+            self._entries[user_id] = (version, embedding)
+            self._entries.move_to_end(user_id)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def get_or_load(self, user):
+        """
+        Decoded embedding for a user, or None if no face is registered.
+        Reads the current version (one small query) and the embedding
+        column only when the cache misses.
+        """
+        rows = get_user_model().objects.filter(pk=user.pk)
+
+        version = rows.values_list("face_embedding_version", flat=True).first()
+        if version is None:
+            return None
+
+        embedding = self.get(user.pk, version)
+        if embedding is not None:
+            return embedding
+
+        row = rows.values_list("face_embedding_version", "face_embedding").first()
+        if row is None or not row[1]:
+            return None
+
+        version, blob = row
+        embedding = decode_embedding(blob)
+        self.put(user.pk, version, embedding)
+        return embedding
+
+    def store(self, user_id, blob):
+        """
+        Save a user's encoded embedding (None to clear it) and bump its
+        version in one UPDATE, so the bump never starts from a stale copy
+        of the user.
+        """
+        get_user_model().objects.filter(pk=user_id).update(
+            face_embedding=blob,
+            face_embedding_version=F("face_embedding_version") + 1,
+        )
+        self.invalidate(user_id)
+        # update() sends no post_save to drop the cached request.user
+        forget_user(user_id)
+
+    def warm_roster(self, teacher):
+        """
+        Load every registered embedding of a teacher's students in one query.
+        Returns the number of embeddings cached.
+
+        Only a head start for marking, so it never raises: a blob that
+        does not decode is logged and skipped (that student's own mark
+        reports it), and any other failure is logged and ends the warm-up.
+        """
+        count = 0
+
+        try:
+            rows = get_user_model().objects.filter(
+                student_profile__teacher__user=teacher,
+                face_embedding__isnull=False,
+            ).values_list("id", "face_embedding_version", "face_embedding")
+
+            for user_id, version, blob in rows:
+                try:
+                    embedding = decode_embedding(blob)
+                except Exception:
+                    logger.exception("Skipping unreadable face embedding of user %s", user_id)
+                    continue
+
+                self.put(user_id, version, embedding)
+                count += 1
+        except Exception:
+            logger.exception("Warming face embeddings for teacher %s failed", teacher.pk)
+
+        return count
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+embedding_cache = EmbeddingCache(max_size=settings.FACE_EMBEDDING_CACHE_SIZE)
@@ -0,0 +1,65 @@
+"""
+Binary storage format for face embeddings (User.face_embedding).
+
+    offset  size  field
+    0       2     magic b"FE"
+    2       1     format version
+    3       1     embedding model version
+    4       4     dimension (uint32, little-endian)
+    8       4*d   float32 values, little-endian
+
+The 8-byte header keeps the payload 4-byte aligned, so decoding is a
+zero-copy ``np.frombuffer`` view over the bytes read from the database.
+"""
+import struct
+
+import numpy as np
+
+MAGIC = b"FE"
+FORMAT_VERSION = 1
+
+# 1 = dlib_face_recognition_resnet_model_v1 (face_recognition, 128-d)
+MODEL_VERSION = 1
+
+_HEADER = struct.Struct("<2sBBI")
+_DTYPE = np.dtype("<f4")
+
+
+class EmbeddingFormatError(ValueError):
+    pass
+
+
+def encode_embedding(embedding, model_version=MODEL_VERSION):
+    values = np.asarray(embedding, dtype=_DTYPE).ravel()
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, model_version, values.size)
+    return header + values.tobytes()
+
+
+def read_header(blob):
+    """
+    Return (format_version, model_version, dim) for an encoded embedding.
+    """
+    if blob is None or len(blob) < _HEADER.size:
+        raise EmbeddingFormatError("Embedding is empty or truncated")
+
+    magic, format_version, model_version, dim = _HEADER.unpack_from(blob)
+
+    if magic != MAGIC:
+        raise EmbeddingFormatError("Not an encoded face embedding")
+    if format_version != FORMAT_VERSION:
+        raise EmbeddingFormatError(
+            f"Unsupported embedding format version {format_version}"
+        )
+    if len(blob) != _HEADER.size + dim * _DTYPE.itemsize:
+        raise EmbeddingFormatError("Embedding length does not match header")
+
+    return format_version, model_version, dim
+
+
+def decode_embedding(blob):
+    """
+    Read-only float32 view over an encoded embedding (no copy).
+    """
+    _, _, dim = read_header(blob)
+    return np.frombuffer(blob, dtype=_DTYPE, count=dim, offset=_HEADER.size)
+
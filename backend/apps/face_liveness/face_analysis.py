@@ -0,0 +1,107 @@
+"""
+Single-pass face analysis shared by the spoof check and the encoder.
+
+The frame is converted to RGB and searched for a face exactly once; the
+result carries the face location and the crop each model expects, so
+neither SpoofDetector nor FaceMatcher has to look at the full frame.
+"""
+import numpy as np
+
+# HOG detection runs on a copy scaled so its longest side is at most this
+DETECT_MAX_SIDE = 640
+
+# MiniFASNetV2 "2.7_80x80": the face box enlarged 2.7x, resized to 80x80
+SPOOF_CROP_SCALE = 2.7
+SPOOF_CROP_SIZE = (80, 80)
+
+
+class FaceAnalysis:
+    def __init__(self, image, rgb, location, spoof_crop):
+        self.image = image            # original BGR frame
+        self.rgb = rgb                # same frame in RGB, for dlib
+        self.location = location      # (top, right, bottom, left) in frame pixels
+        self.spoof_crop = spoof_crop  # BGR crop at SPOOF_CROP_SIZE
+
+
+def detect_face(rgb):
+    """
+    Largest face in an RGB frame as (top, right, bottom, left), or None.
+    """
+    import cv2
+    import face_recognition
+
+    height, width = rgb.shape[:2]
+    scale = min(1.0, DETECT_MAX_SIDE / max(height, width))
+
+    small = rgb
+    if scale < 1.0:
+        small = cv2.resize(
+            rgb,
+            (round(width * scale), round(height * scale)),
+            interpolation=cv2.INTER_AREA,
+        )
+
+    locations = face_recognition.face_locations(small, model="hog")
+    if not locations:
+        return None
+
+    top, right, bottom, left = max(
+        locations, key=lambda loc: (loc[2] - loc[0]) * (loc[1] - loc[3])
+    )
+
+    return (
+        max(0, int(top / scale)),
+        min(width, int(right / scale)),
+        min(height, int(bottom / scale)),
+        max(0, int(left / scale)),
+    )
+
+
+def spoof_crop(image, location, scale=SPOOF_CROP_SCALE, size=SPOOF_CROP_SIZE):
+    """
+    Enlarge the face box around its centre (clamped to the frame, as the
+    MiniFASNet training crops were) and resize it for the spoof model.
+    """
+    import cv2
+
+    height, width = image.shape[:2]
+    top, right, bottom, left = location
+    box_w = right - left
+    box_h = bottom - top
+
+    scale = min((height - 1) / box_h, (width - 1) / box_w, scale)
+    new_w = box_w * scale
+    new_h = box_h * scale
+    center_x = left + box_w / 2
+    center_y = top + box_h / 2
+
+    x1 = int(np.clip(center_x - new_w / 2, 0, width - new_w))
+    y1 = int(np.clip(center_y - new_h / 2, 0, height - new_h))
+    x2 = int(x1 + new_w)
+    y2 = int(y1 + new_h)
+
+    return cv2.resize(image[y1:y2, x1:x2], size)
+
+
+def analyze_face(image):
+    """
+    Detect the face in a BGR frame once. Returns a FaceAnalysis, or None
+    if no face was found.
+    """
+    import cv2
+
+    if image is None:
+        return None
+
+    rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
+    location = detect_face(rgb)
+    if location is None:
+        return None
+
+    return FaceAnalysis(
+        image=image,
+        rgb=rgb,
+        location=location,
+        spoof_crop=spoof_crop(image, location),
+    )
@@ -0,0 +1,71 @@
+import numpy as np
+from django.contrib.auth import get_user_model
+
+from .embedding_codec import decode_embedding
+
+
+class FaceIndex:
+    """
+    1:N identification index over a set of enrolled faces.
+
+    Every encoding lives in one contiguous float32 matrix so a probe is
+    scored against all rows with a single matrix-vector product:
+    ||a - b||^2 = ||a||^2 - 2 a.b + ||b||^2, with ||a||^2 precomputed.
+    """
+
+    def __init__(self, user_ids, embeddings, dim=128):
+        self.user_ids = np.asarray(user_ids, dtype=np.int64)
+        self.matrix = np.ascontiguousarray(
+            np.asarray(embeddings, dtype=np.float32).reshape(len(self.user_ids), dim)
+        )
+        self.sq_norms = np.einsum("ij,ij->i", self.matrix, self.matrix)
+
+    def __len__(self):
+        return len(self.user_ids)
+
+    @classmethod
+    def for_teacher(cls, teacher_profile):
+        """
+        Build the index for every student of a teacher with a registered face.
+        """
+        User = get_user_model()
+
+        rows = User.objects.filter(
+            student_profile__teacher=teacher_profile,
+            face_embedding__isnull=False,
+        ).values_list("id", "face_embedding")
+
+        user_ids = []
+        embeddings = []
+        for user_id, blob in rows:
+            user_ids.append(user_id)
+            embeddings.append(decode_embedding(blob))
+
+        return cls(user_ids, embeddings)
+
+    def search(self, probe, k=5):
+        """
+        Return the k closest enrolled faces as (user_id, distance), nearest first.
+        """
+        if not len(self):
+            return []
+
+        probe = np.asarray(probe, dtype=np.float32)
+
+        sq_dist = self.sq_norms - 2.0 * (self.matrix @ probe)
+        sq_dist += probe @ probe
+        np.maximum(sq_dist, 0.0, out=sq_dist)
+
+        k = min(k, len(self))
+        if k < len(self):
+            nearest = np.argpartition(sq_dist, k - 1)[:k]
+        else:
+            nearest = np.arange(len(self))
+        nearest = nearest[np.argsort(sq_dist[nearest])]
+
+        distances = np.sqrt(sq_dist[nearest])
+
+        return [
+            (int(user_id), float(distance))
+            for user_id, distance in zip(self.user_ids[nearest], distances)
+        ]
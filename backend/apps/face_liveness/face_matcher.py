@@ -1,16 +1,24 @@
-import cv2
 import numpy as np
 import os
-import pickle
-import face_recognition
+
+from .embedding_codec import encode_embedding, decode_embedding
 
 
 class FaceMatcher:
+    """
+    face_recognition (and the dlib models it loads on import) and cv2
+    are only imported when a face is actually encoded.
+    """
+
     def __init__(self):
         self.base_dir = "media/face_embeddings"
         os.makedirs(self.base_dir, exist_ok=True)
         self.threshold = 0.6
 
+    def load(self):
+        import cv2  # noqa: F401
+        import face_recognition  # noqa: F401
+
     def get_embedding(self, face_img):
         """
         Extract face embedding from OpenCV image (BGR)
@@ -18,6 +26,9 @@ class FaceMatcher:
         if face_img is None:
             return None
 
+        import cv2
+        import face_recognition
+
         rgb_img = cv2.cvtColor(face_img, cv2.COLOR_BGR2RGB)
         encodings = face_recognition.face_encodings(rgb_img)
 
@@ -26,10 +37,36 @@ class FaceMatcher:
 
         return encodings[0]
 
+    def get_embedding_for(self, analysis):
+        """
+        Encode a face already located by face_analysis.analyze_face.
+        Skips detection; dlib aligns the 150x150 chip from the location.
+        """
+        import face_recognition
+
+        encodings = face_recognition.face_encodings(
+            analysis.rgb,
+            known_face_locations=[analysis.location],
+        )
+
+        if not encodings:
+            return None
+
+        return encodings[0]
+
+    def get_embeddings(self, analyses):
+        """
+        Encode a batch of analysed faces. dlib has no batched encoder
+        entry point for known locations, so faces are encoded in turn.
+        """
+        return [self.get_embedding_for(analysis) for analysis in analyses]
+
     def extract_embedding(self, image_file):
         """
         Extract embedding from uploaded image file
         """
+        import face_recognition
+
         img = face_recognition.load_image_file(image_file)
         encodings = face_recognition.face_encodings(img)
 
@@ -39,17 +76,31 @@ class FaceMatcher:
         return encodings[0]
 
     def save_embedding(self, user_id, embedding):
-        path = os.path.join(self.base_dir, f"{user_id}.pkl")
+        path = os.path.join(self.base_dir, f"{user_id}.bin")
         with open(path, "wb") as f:
-            pickle.dump(embedding, f)
+            f.write(encode_embedding(embedding))
 
     def load_embedding(self, user_id):
-        path = os.path.join(self.base_dir, f"{user_id}.pkl")
+        path = os.path.join(self.base_dir, f"{user_id}.bin")
         if not os.path.exists(path):
             return None
         with open(path, "rb") as f:
-            return pickle.load(f)
+            return decode_embedding(f.read())
 
     def match(self, stored_embedding, live_embedding):
         distance = np.linalg.norm(stored_embedding - live_embedding)
         return distance < self.threshold, float(distance)
+
+    def identify(self, index, live_embedding, k=5):
+        """
+        Find the enrolled students closest to a live embedding (1:N).
+        Returns up to k candidates, nearest first.
+        """
+        return [
+            {
+                "student_id": user_id,
+                "distance": distance,
+                "match": distance < self.threshold,
+            }
+            for user_id, distance in index.search(live_embedding, k=k)
+        ]
@@ -0,0 +1,164 @@
+"""
+Ingest stage for uploaded face frames.
+
+Checks the upload size before reading it, reads the image dimensions
+from the JPEG/PNG header without decoding, and decodes JPEGs at a
+reduced resolution (IMREAD_REDUCED_*) close to what face detection
+actually uses instead of the full 12 MP camera frame.
+
+Only JPEG (baseline or progressive) and PNG are accepted; anything
+else, WebP included, is rejected before it reaches the decoder.
+"""
+import struct
+import time
+
+import numpy as np
+from django.conf import settings
+
+# (cv2 flag name, scale denominator), largest reduction first
+_JPEG_REDUCTIONS = (
+    ("IMREAD_REDUCED_COLOR_8", 8),
+    ("IMREAD_REDUCED_COLOR_4", 4),
+    ("IMREAD_REDUCED_COLOR_2", 2),
+)
+
+# SOFn markers carry the frame size; C4 (DHT), C8 (JPG) and CC (DAC) do not
+_SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+class ImageRejected(Exception):
+    def __init__(self, detail, status=400):
+        super().__init__(detail)
+        self.detail = detail
+        self.status = status
+
+
+class DecodedImage:
+    def __init__(self, image, original_size, reduction, decode_ms):
+        self.image = image                  # BGR ndarray
+        self.original_size = original_size  # (width, height) from the header
+        self.reduction = reduction          # 1, 2, 4 or 8
+        self.decode_ms = decode_ms
+
+
+def jpeg_size(data):
+    """
+    (width, height) from the first SOF segment of a JPEG, or None.
+    """
+    if data[:2] != b"\xff\xd8":
+        return None
+
+    pos = 2
+    while pos + 4 <= len(data):
+        if data[pos] != 0xFF:
+            return None
+
+        marker = data[pos + 1]
+        if marker == 0xFF:  # fill byte
+            pos += 1
+            continue
+        if marker in (0x01, *range(0xD0, 0xD8)):  # standalone markers
+            pos += 2
+            continue
+
+        (length,) = struct.unpack(">H", data[pos + 2:pos + 4])
+
+        if marker in _SOF_MARKERS:
+            if pos + 9 > len(data):
+                return None
+            height, width = struct.unpack(">HH", data[pos + 5:pos + 9])
+            return width, height
+
+        if marker == 0xDA:  # start of scan: no SOF before the image data
+            return None
+
+        pos += 2 + length
+
+    return None
+
+
+def png_size(data):
+    if len(data) < 24 or data[:8] != _PNG_SIGNATURE or data[12:16] != b"IHDR":
+        return None
+    return struct.unpack(">II", data[16:24])
+
+
+def read_upload(uploaded_file, max_bytes=None):
+    """
+    Read an uploaded file after checking its size against the byte budget.
+    """
+    max_bytes = max_bytes or settings.FACE_UPLOAD_MAX_BYTES
+
+    if uploaded_file.size > max_bytes:
+        raise ImageRejected(
+            f"Image too large (max {max_bytes // (1024 * 1024)} MB)",
+            status=413,
+        )
+
+    return uploaded_file.read()
+
+
+def _reduction_for(width, height, target_side):
+    long_side = max(width, height)
+    for flag, factor in _JPEG_REDUCTIONS:
+        if long_side // factor >= target_side:
+            return flag, factor
+    return "IMREAD_COLOR", 1
+
+
+def decode_face_image(uploaded_file, target_side=None):
+    """
+    Validate and decode an uploaded face frame. Raises ImageRejected.
+    """
+    import cv2
+
+    target_side = target_side or settings.FACE_DECODE_TARGET_SIDE
+
+    data = read_upload(uploaded_file)
+
+    size = jpeg_size(data)
+    is_jpeg = size is not None
+    if size is None:
+        size = png_size(data)
+    if size is None:
+        raise ImageRejected("Unsupported image format")
+
+    width, height = size
+    if width * height > settings.FACE_UPLOAD_MAX_PIXELS:
+        raise ImageRejected(
+            f"Image resolution too high ({width}x{height})",
+            status=413,
+        )
+
+    start = time.perf_counter()
+    buffer = np.frombuffer(data, np.uint8)
+
+    if is_jpeg:
+        flag, reduction = _reduction_for(width, height, target_side)
+        image = cv2.imdecode(buffer, getattr(cv2, flag))
+    else:
+        reduction = 1
+        image = cv2.imdecode(buffer, cv2.IMREAD_COLOR)
+
+        long_side = max(width, height)
+        if image is not None and long_side > target_side * 2:
+            scale = target_side / long_side
+            image = cv2.resize(
+                image,
+                (round(width * scale), round(height * scale)),
+                interpolation=cv2.INTER_AREA,
+            )
+
+    decode_ms = (time.perf_counter() - start) * 1000
+
+    if image is None:
+        raise ImageRejected("Invalid image")
+
+    return DecodedImage(
+        image=image,
+        original_size=(width, height),
+        reduction=reduction,
+        decode_ms=decode_ms,
+    )
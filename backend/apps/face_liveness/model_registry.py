@@ -0,0 +1,86 @@
+"""
+Process-wide registry for the face models.
+
+Views never build their own SpoofDetector / FaceMatcher; they ask the
+registry, which creates each engine once on first use. Under gunicorn
+with ``preload_app`` the master calls ``preload()`` before forking, so
+every worker shares the loaded weights copy-on-write instead of paying
+``torch.load`` and holding a private copy.
+"""
+import threading
+
+from django.conf import settings
+
+_lock = threading.Lock()
+_models = {}
+
+
+def _get_or_create(name, factory):
+    model = _models.get(name)
+    if model is not None:
+        return model
+
+    with _lock:
+        model = _models.get(name)
+        if model is None:
+            model = factory()
+            _models[name] = model
+
+    return model
+
+
+def _build_spoof_detector():
+    from anti_spoofing.backends import configure_threads
+    from anti_spoofing.spoof_detector import SpoofDetector
+
+    configure_threads(
+        settings.INFERENCE_NUM_THREADS,
+        settings.INFERENCE_NUM_INTEROP_THREADS,
+    )
+
+    return SpoofDetector(backend=settings.SPOOF_DETECTOR_BACKEND)
+
+
+def _build_face_matcher():
+    from .face_matcher import FaceMatcher
+
+    return FaceMatcher()
+
+
+def _build_verification_service():
+    from .verification import FaceVerificationService
+
+    return FaceVerificationService(
+        get_spoof_detector(),
+        get_face_matcher(),
+        max_batch_size=settings.FACE_VERIFY_MAX_BATCH_SIZE,
+        max_wait_ms=settings.FACE_VERIFY_MAX_WAIT_MS,
+        max_queue_size=settings.FACE_VERIFY_MAX_QUEUE_SIZE,
+        timeout_seconds=settings.FACE_VERIFY_TIMEOUT_SECONDS,
+    )
+
+
+def get_spoof_detector():
+    return _get_or_create("spoof_detector", _build_spoof_detector)
+
+
+def get_face_matcher():
+    return _get_or_create("face_matcher", _build_face_matcher)
+
+
+def get_verification_service():
+    # The service starts its worker thread on first use, so it is
+    # safe to create before fork: each worker gets its own thread.
+    return _get_or_create("verification_service", _build_verification_service)
+
+
+def preload():
+    """
+    Load every model now. Called in the gunicorn master before fork.
+    """
+    get_spoof_detector().load()
+    get_face_matcher().load()
+
+
+def loaded_models():
+    return sorted(_models)
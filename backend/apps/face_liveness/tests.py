@@ -0,0 +1,537 @@
+import sys
+import threading
+from types import SimpleNamespace
+from unittest import mock
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.students.models import StudentProfile
+
+from .embedding_cache import EmbeddingCache
+from .embedding_codec import (
+    EmbeddingFormatError,
+    decode_embedding,
+    encode_embedding,
+    read_header,
+)
+from .face_analysis import analyze_face, detect_face, spoof_crop
+from .face_index import FaceIndex
+from .image_ingest import (
+    ImageRejected,
+    _reduction_for,
+    decode_face_image,
+    jpeg_size,
+    png_size,
+)
+from .verification import FaceVerificationService, VerificationOverloaded
+
+User = get_user_model()
+
+
+class FakeSpoofDetector:
+    """
+    Scores "real..." crops 0.1 and anything else 0.9; a batch holding a
+    "bad..." crop fails as a whole, like a model error would. With hold
+    set, the first batch waits for release().
+    """
+
+    threshold = 0.5
+
+    def __init__(self, hold=False):
+        self.batches = []
+        self.entered = threading.Event()
+        self._release = threading.Event()
+        if not hold:
+            self._release.set()
+
+    def release(self):
+        self._release.set()
+
+    def spoof_scores(self, crops):
+        self.batches.append(list(crops))
+        self.entered.set()
+        self._release.wait(5)
+
+        if any(crop.startswith("bad") for crop in crops):
+            raise ValueError("unreadable crop")
+        return [0.1 if crop.startswith("real") else 0.9 for crop in crops]
+
+
+class FakeMatcher:
+    def get_embeddings(self, analyses):
+        if any(analysis.spoof_crop == "real-unencodable" for analysis in analyses):
+            raise RuntimeError("encoder failed")
+        return [f"embedding:{analysis.spoof_crop}" for analysis in analyses]
+
+
+def fake_analyze_face(image):
+    # The "image" is the crop name; the service only passes it through
+    return SimpleNamespace(spoof_crop=image)
+
+
+@mock.patch("apps.face_liveness.verification.analyze_face", fake_analyze_face)
+class FaceVerificationServiceTests(SimpleTestCase):
+
+    def service(self, detector=None, **options):
+        options.setdefault("max_wait_ms", 200)
+        return FaceVerificationService(
+            detector or FakeSpoofDetector(), FakeMatcher(), **options
+        )
+
+    def verify_concurrently(self, service, images):
+        results = {}
+
+        def verify(image):
+            try:
+                results[image] = service.verify(image)
+            except Exception as exc:
+                results[image] = exc
+
+        threads = [threading.Thread(target=verify, args=(image,)) for image in images]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_concurrent_requests_share_a_batch(self):
+        detector = FakeSpoofDetector()
+        service = self.service(detector, max_batch_size=8)
+
+        results = self.verify_concurrently(service, ["real-1", "fake-2", "real-3", "real-4"])
+
+        self.assertEqual(len(detector.batches), 1)
+        self.assertEqual(sorted(detector.batches[0]), ["fake-2", "real-1", "real-3", "real-4"])
+
+        self.assertTrue(results["real-1"].is_real)
+        self.assertEqual(results["real-1"].embedding, "embedding:real-1")
+        self.assertFalse(results["fake-2"].is_real)
+        self.assertIsNone(results["fake-2"].embedding)
+
+    def test_batches_are_capped(self):
+        detector = FakeSpoofDetector()
+        service = self.service(detector, max_batch_size=2)
+
+        self.verify_concurrently(service, [f"real-{n}" for n in range(5)])
+
+        self.assertEqual(sum(len(batch) for batch in detector.batches), 5)
+        self.assertLessEqual(max(len(batch) for batch in detector.batches), 2)
+
+    def test_errors_only_reach_their_own_request(self):
+        service = self.service(max_batch_size=8)
+
+        results = self.verify_concurrently(
+            service, ["real-1", "bad-2", "real-unencodable", "fake-4"]
+        )
+
+        self.assertIsInstance(results["bad-2"], ValueError)
+        self.assertIsInstance(results["real-unencodable"], RuntimeError)
+        self.assertEqual(results["real-1"].embedding, "embedding:real-1")
+        self.assertFalse(results["fake-4"].is_real)
+
+    def test_full_queue_is_overloaded(self):
+        service = self.service(max_queue_size=1)
+        service._queue.put_nowait(None)
+
+        with self.assertRaises(VerificationOverloaded):
+            service.verify("real-1")
+
+    def test_no_face_skips_the_queue(self):
+        detector = FakeSpoofDetector()
+        service = self.service(detector)
+
+        with mock.patch("apps.face_liveness.verification.analyze_face", return_value=None):
+            result = service.verify("anything")
+
+        self.assertFalse(result.face_detected)
+        self.assertEqual(detector.batches, [])
+
+    def test_timed_out_request_is_dropped_from_the_queue(self):
+        detector = FakeSpoofDetector(hold=True)
+        service = self.service(detector, max_wait_ms=0, timeout_seconds=0.2)
+
+        # Keep the worker busy with a first batch
+        first = threading.Thread(target=self.verify_concurrently, args=(service, ["real-1"]))
+        first.start()
+        self.assertTrue(detector.entered.wait(5))
+
+        with self.assertRaises(TimeoutError):
+            service.verify("real-late")
+
+        detector.release()
+        first.join()
+        service.timeout_seconds = 5
+        self.assertTrue(service.verify("real-3").is_real)
+
+        scored = [crop for batch in detector.batches for crop in batch]
+        self.assertNotIn("real-late", scored)
+
+
+class EmbeddingCacheTests(SimpleTestCase):
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = EmbeddingCache(max_size=2)
+        cache.put(1, 1, "one")
+        cache.put(2, 1, "two")
+        cache.get(1, 1)
+        cache.put(3, 1, "three")
+
+        self.assertIsNone(cache.get(2, 1))
+        self.assertEqual(cache.get(1, 1), "one")
+        self.assertEqual(cache.get(3, 1), "three")
+        self.assertEqual(cache.stats()["size"], 2)
+
+    def test_hits_and_misses_are_counted(self):
+        cache = EmbeddingCache()
+        cache.put(1, 1, "one")
+
+        cache.get(1, 1)
+        cache.get(1, 2)  # other version
+        cache.get(2, 1)
+
+        self.assertEqual(cache.stats(), {"size": 1, "max_size": 10000, "hits": 1, "misses": 2})
+
+        cache.clear()
+        self.assertEqual(cache.stats(), {"size": 0, "max_size": 10000, "hits": 0, "misses": 0})
+
+
+class EmbeddingCacheDatabaseTests(TestCase):
+
+    def setUp(self):
+        self.teacher = User.objects.create_user(
+            username="teacher", password="x", role="TEACHER"
+        )
+        self.cache = EmbeddingCache()
+
+    def add_student(self, n, blob):
+        user = User.objects.create_user(
+            username=f"student{n}", password="x", role="STUDENT"
+        )
+        User.objects.filter(pk=user.pk).update(face_embedding=blob)
+        StudentProfile.objects.create(
+            user=user,
+            teacher=self.teacher.teacher_profile,
+            roll_no=str(n),
+            full_name=f"Student {n}",
+            phone="0",
+            batch="A",
+            department="CS",
+        )
+        return user
+
+    def test_store_invalidates_the_cached_embedding(self):
+        student = self.add_student(0, None)
+        self.cache.store(student.pk, encode_embedding(np.ones(4)))
+        self.assertEqual(self.cache.get_or_load(student).tolist(), [1.0] * 4)
+
+        self.cache.store(student.pk, encode_embedding(np.full(4, 2.0)))
+
+        self.assertEqual(self.cache.stats()["size"], 0)
+        self.assertEqual(self.cache.get_or_load(student).tolist(), [2.0] * 4)
+
+    def test_warm_roster_skips_unreadable_embeddings(self):
+        good = self.add_student(0, encode_embedding(np.ones(4)))
+        bad = self.add_student(1, b"not an embedding")
+        self.add_student(2, None)
+
+        with self.assertLogs("apps.face_liveness.embedding_cache", "ERROR"):
+            self.assertEqual(self.cache.warm_roster(self.teacher), 1)
+
+        self.assertEqual(self.cache.get(good.pk, 0).tolist(), [1.0] * 4)
+        self.assertIsNone(self.cache.get(bad.pk, 0))
+
+    def test_warm_roster_failure_is_logged(self):
+        self.add_student(0, encode_embedding(np.ones(4)))
+
+        with mock.patch.object(self.cache, "put", side_effect=MemoryError), \
+                self.assertLogs("apps.face_liveness.embedding_cache", "ERROR"):
+            self.assertEqual(self.cache.warm_roster(self.teacher), 0)
+
+    def test_session_starts_for_a_teacher_without_a_profile(self):
+        self.teacher.teacher_profile.delete()
+        client = APIClient()
+        client.force_authenticate(User.objects.get(pk=self.teacher.pk))
+
+        response = client.post(
+            "/api/attendance/start/",
+            {"subject": "Maths", "latitude": 0, "longitude": 0, "duration_minutes": 10},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+
+
+def encoded(ext, width, height, *params):
+    import cv2
+
+    ok, data = cv2.imencode(ext, np.full((height, width, 3), 128, np.uint8), list(params))
+    assert ok
+    return data.tobytes()
+
+
+@override_settings(FACE_DECODE_TARGET_SIDE=64)
+class ImageIngestTests(SimpleTestCase):
+
+    def decode(self, data, name="face.jpg"):
+        return decode_face_image(SimpleUploadedFile(name, data))
+
+    def assertRejected(self, data, status, name="face.jpg"):
+        with self.assertRaises(ImageRejected) as raised:
+            self.decode(data, name)
+        self.assertEqual(raised.exception.status, status)
+        return raised.exception
+
+    def test_header_sizes(self):
+        self.assertEqual(jpeg_size(encoded(".jpg", 30, 20)), (30, 20))
+        self.assertEqual(png_size(encoded(".png", 30, 20)), (30, 20))
+
+    def test_progressive_jpeg(self):
+        import cv2
+
+        data = encoded(".jpg", 300, 200, cv2.IMWRITE_JPEG_PROGRESSIVE, 1)
+        self.assertIn(b"\xff\xc2", data)  # SOF2
+        self.assertEqual(jpeg_size(data), (300, 200))
+
+        decoded = self.decode(data)
+        self.assertEqual(decoded.original_size, (300, 200))
+        self.assertEqual(decoded.reduction, 4)
+        self.assertEqual(decoded.image.shape[:2], (50, 75))
+
+    def test_truncated_or_corrupt_headers(self):
+        jpeg = encoded(".jpg", 30, 20)
+        png = encoded(".png", 30, 20)
+
+        for data in (
+            jpeg[:3],
+            jpeg[:20],
+            b"\xff\xd8\xff\xda\x00\x08",  # scan before any frame header
+            b"\xff\xd8\x00\x00\x00\x00",  # not a marker
+            png[:20],
+            png[:8] + b"\x00" * 16,
+            b"",
+        ):
+            with self.subTest(data=data[:12]):
+                self.assertIsNone(jpeg_size(data))
+                self.assertIsNone(png_size(data))
+                self.assertRejected(data, 400)
+
+        # A valid header over a corrupt body fails in the decoder
+        error = self.assertRejected(jpeg[:jpeg.index(b"\xff\xda")], 400)
+        self.assertEqual(error.detail, "Invalid image")
+
+    def test_webp_is_rejected(self):
+        error = self.assertRejected(encoded(".webp", 30, 20), 400, name="face.webp")
+        self.assertEqual(error.detail, "Unsupported image format")
+
+    @override_settings(FACE_UPLOAD_MAX_BYTES=1024)
+    def test_oversize_bytes(self):
+        self.assertRejected(b"\xff\xd8" + b"\x00" * 1024, 413)
+
+    @override_settings(FACE_UPLOAD_MAX_PIXELS=100 * 100)
+    def test_oversize_pixels(self):
+        self.assertEqual(self.decode(encoded(".jpg", 100, 100)).original_size, (100, 100))
+        self.assertRejected(encoded(".jpg", 101, 100), 413)
+        self.assertRejected(encoded(".png", 100, 101), 413, name="face.png")
+
+    def test_reduction_at_each_boundary(self):
+        cases = [
+            (64 * 8, "IMREAD_REDUCED_COLOR_8", 8),
+            (64 * 8 - 1, "IMREAD_REDUCED_COLOR_4", 4),
+            (64 * 4, "IMREAD_REDUCED_COLOR_4", 4),
+            (64 * 4 - 1, "IMREAD_REDUCED_COLOR_2", 2),
+            (64 * 2, "IMREAD_REDUCED_COLOR_2", 2),
+            (64 * 2 - 1, "IMREAD_COLOR", 1),
+            (10, "IMREAD_COLOR", 1),
+        ]
+        for long_side, flag, factor in cases:
+            with self.subTest(long_side=long_side):
+                # The long side decides, in either orientation
+                self.assertEqual(_reduction_for(long_side, 10, 64), (flag, factor))
+                self.assertEqual(_reduction_for(10, long_side, 64), (flag, factor))
+
+                decoded = self.decode(encoded(".jpg", long_side, 16))
+                self.assertEqual(decoded.reduction, factor)
+                self.assertEqual(decoded.image.shape[1], -(-long_side // factor))
+
+
+class FaceIndexTests(SimpleTestCase):
+    """
+    FaceIndex.search ranks like a brute-force cosine search: for the
+    unit-length embeddings the models produce, Euclidean distance and
+    cosine similarity give the same order.
+    """
+
+    def unit(self, vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        return vectors / np.linalg.norm(vectors, axis=-1, keepdims=True)
+
+    def brute_force(self, embeddings, probe):
+        similarity = embeddings @ probe
+        return sorted(range(len(embeddings)), key=lambda row: -similarity[row])
+
+    def test_top_k_matches_brute_force_cosine(self):
+        rng = np.random.default_rng(0)
+        embeddings = self.unit(rng.standard_normal((200, 128)))
+        user_ids = np.arange(1000, 1200)
+        index = FaceIndex(user_ids, embeddings)
+
+        for probe in self.unit(rng.standard_normal((10, 128))):
+            expected = self.brute_force(embeddings, probe)[:5]
+            result = index.search(probe, k=5)
+
+            self.assertEqual([user_id for user_id, _ in result], list(user_ids[expected]))
+            np.testing.assert_allclose(
+                [distance for _, distance in result],
+                np.linalg.norm(embeddings[expected] - probe, axis=1),
+                atol=1e-4,
+            )
+
+    def test_ties(self):
+        rng = np.random.default_rng(1)
+        a, b = self.unit(rng.standard_normal((2, 128)))
+        index = FaceIndex([1, 2, 3, 4, 5], [a, b, a, b, -a])
+
+        # Two exact matches, then a tie for the last place
+        result = index.search(a, k=3)
+
+        self.assertEqual({user_id for user_id, _ in result[:2]}, {1, 3})
+        self.assertAlmostEqual(result[0][1], 0, places=3)
+        self.assertAlmostEqual(result[1][1], 0, places=3)
+        self.assertIn(result[2][0], (2, 4))
+        self.assertAlmostEqual(result[2][1], float(np.linalg.norm(a - b)), places=4)
+
+    def test_k_larger_than_the_index(self):
+        rng = np.random.default_rng(2)
+        embeddings = self.unit(rng.standard_normal((3, 128)))
+        index = FaceIndex([7, 8, 9], embeddings)
+
+        result = index.search(embeddings[1], k=10)
+
+        self.assertEqual(len(result), 3)
+        self.assertEqual(result[0][0], 8)
+        self.assertEqual(
+            [user_id for user_id, _ in result],
+            [7 + row for row in self.brute_force(embeddings, embeddings[1])],
+        )
+        self.assertEqual(FaceIndex([], np.zeros((0, 128))).search(embeddings[0]), [])
+
+
+class EmbeddingCodecTests(SimpleTestCase):
+
+    def test_round_trip(self):
+        embedding = np.random.default_rng(0).standard_normal(128)
+        blob = encode_embedding(embedding, model_version=3)
+
+        self.assertEqual(len(blob), 8 + 128 * 4)
+        self.assertEqual(read_header(blob), (1, 3, 128))
+
+        decoded = decode_embedding(blob)
+        self.assertEqual(decoded.dtype, np.float32)
+        np.testing.assert_array_equal(decoded, embedding.astype(np.float32))
+        # A view over the stored bytes
+        self.assertFalse(decoded.flags.writeable)
+
+    def test_bad_header(self):
+        blob = encode_embedding(np.ones(4))
+
+        for bad, message in (
+            (None, "empty or truncated"),
+            (blob[:7], "empty or truncated"),
+            (b"XX" + blob[2:], "Not an encoded"),
+            (blob[:2] + bytes([2]) + blob[3:], "format version 2"),
+        ):
+            with self.subTest(message=message):
+                with self.assertRaisesMessage(EmbeddingFormatError, message):
+                    decode_embedding(bad)
+
+    def test_wrong_length_payload(self):
+        blob = encode_embedding(np.ones(4))
+
+        for bad in (blob[:-1], blob[:-4], blob + b"\x00" * 4):
+            with self.subTest(length=len(bad)):
+                with self.assertRaisesMessage(EmbeddingFormatError, "does not match"):
+                    decode_embedding(bad)
+
+
+def coordinate_frame(height, width):
+    """
+    BGR frame whose first two channels hold each pixel's row and column.
+    """
+    rows, cols = np.indices((height, width))
+    return np.dstack([rows, cols, np.zeros_like(rows)]).astype(np.int32)
+
+
+class FaceAnalysisTests(SimpleTestCase):
+
+    def crop_box(self, frame, location, **options):
+        """
+        (top, left, height, width) of the region spoof_crop() resizes.
+        """
+        with mock.patch("cv2.resize", side_effect=lambda crop, size, **kw: crop):
+            crop = spoof_crop(frame, location, **options)
+        return int(crop[0, 0, 0]), int(crop[0, 0, 1]), crop.shape[0], crop.shape[1]
+
+    def test_spoof_crop_is_centred_on_the_face(self):
+        frame = coordinate_frame(1000, 1000)
+
+        # 100x100 box at (450, 450): 270x270 around its centre
+        self.assertEqual(self.crop_box(frame, (450, 550, 550, 450)), (365, 365, 270, 270))
+
+    def test_spoof_crop_is_clamped_at_the_edges(self):
+        frame = coordinate_frame(1000, 1000)
+
+        # Shifted inside the frame rather than cut short
+        self.assertEqual(self.crop_box(frame, (0, 100, 100, 0)), (0, 0, 270, 270))
+        self.assertEqual(self.crop_box(frame, (900, 1000, 1000, 900)), (730, 730, 270, 270))
+        self.assertEqual(self.crop_box(frame, (0, 1000, 100, 900)), (0, 730, 270, 270))
+
+    def test_spoof_crop_scale_is_capped_by_the_frame(self):
+        frame = coordinate_frame(480, 640)
+
+        # 2.7x a 300px box does not fit; the largest square that does is
+        # used, still centred horizontally
+        self.assertEqual(self.crop_box(frame, (90, 470, 390, 170)), (0, 80, 479, 479))
+
+    def test_spoof_crop_size(self):
+        frame = np.zeros((480, 640, 3), np.uint8)
+        self.assertEqual(spoof_crop(frame, (100, 400, 300, 200)).shape, (80, 80, 3))
+
+    def detect(self, frame, locations):
+        fake = SimpleNamespace(face_locations=mock.Mock(return_value=locations))
+        with mock.patch.dict(sys.modules, {"face_recognition": fake}):
+            return detect_face(frame), fake.face_locations
+
+    def test_no_face(self):
+        frame = np.zeros((480, 640, 3), np.uint8)
+
+        location, _ = self.detect(frame, [])
+        self.assertIsNone(location)
+
+        with mock.patch("apps.face_liveness.face_analysis.detect_face", return_value=None):
+            self.assertIsNone(analyze_face(frame))
+        self.assertIsNone(analyze_face(None))
+
+    def test_largest_of_several_faces(self):
+        frame = np.zeros((480, 640, 3), np.uint8)
+
+        location, _ = self.detect(
+            frame, [(10, 60, 60, 10), (100, 300, 300, 100), (200, 420, 260, 360)]
+        )
+        self.assertEqual(location, (100, 300, 300, 100))
+
+        with mock.patch("apps.face_liveness.face_analysis.detect_face", return_value=location):
+            analysis = analyze_face(frame)
+        self.assertEqual(analysis.location, location)
+        self.assertEqual(analysis.spoof_crop.shape, (80, 80, 3))
+
+    def test_detection_runs_downscaled(self):
+        frame = np.zeros((1280, 1920, 3), np.uint8)
+
+        # Found at a third of the size; mapped back and clamped to the frame
+        location, face_locations = self.detect(frame, [(10, 640, 300, 100)])
+
+        self.assertEqual(face_locations.call_args.args[0].shape, (427, 640, 3))
+        self.assertEqual(location, (30, 1920, 900, 300))
@@ -0,0 +1,161 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from .face_analysis import analyze_face
+
+
+class VerificationOverloaded(Exception):
+    """
+    Raised when the verification queue is full and the request
+    should be retried instead of waiting behind the burst.
+    """
+
+
+class VerificationResult:
+    def __init__(self, face_detected, spoof_score, is_real, embedding):
+        self.face_detected = face_detected
+        self.spoof_score = spoof_score
+        self.is_real = is_real
+        self.embedding = embedding
+
+
+class FaceVerificationService:
+    """
+    Gathers face images from concurrent requests into micro-batches.
+
+    Each request thread locates its face once (face_analysis) and queues
+    the analysis. A single background thread waits at most
+    ``max_wait_ms`` for up to ``max_batch_size`` faces, runs the spoof
+    model once on the batch of crops, encodes the real faces and
+    resolves each request's future with its own result.
+    """
+
+    def __init__(
+        self,
+        spoof_detector,
+        face_matcher,
+        max_batch_size=16,
+        max_wait_ms=25,
+        max_queue_size=128,
+        timeout_seconds=10,
+    ):
+        self.spoof_detector = spoof_detector
+        self.face_matcher = face_matcher
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.timeout_seconds = timeout_seconds
+
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._worker = None
+        self._lock = threading.Lock()
+
+    def verify(self, face_img):
+        """
+        Submit one BGR image and block until its batch has been scored.
+        """
+        analysis = analyze_face(face_img)
+        if analysis is None:
+            return VerificationResult(
+                face_detected=False,
+                spoof_score=None,
+                is_real=False,
+                embedding=None,
+            )
+
+        future = Future()
+
+        try:
+            self._queue.put_nowait((analysis, future))
+        except queue.Full:
+            raise VerificationOverloaded()
+
+        self._ensure_worker()
+
+        try:
+            return future.result(timeout=self.timeout_seconds)
+        except TimeoutError:
+            # Drop the image if the worker has not picked it up yet
+            future.cancel()
+            raise
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run,
+                    name="face-verification",
+                    daemon=True,
+                )
+                self._worker.start()
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        # Skip requests that already gave up waiting
+        return [
+            (analysis, future)
+            for analysis, future in batch
+            if future.set_running_or_notify_cancel()
+        ]
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch:
+                self._process(batch)
+
+    def _process(self, batch):
+        analyses = [analysis for analysis, _ in batch]
+
+        try:
+            scores = self.spoof_detector.spoof_scores(
+                [analysis.spoof_crop for analysis in analyses]
+            )
+        except Exception:
+            # Score the crops one by one so a failure only reaches the
+            # request whose image caused it
+            scores = [self._score_one(analysis) for analysis in analyses]
+
+        for (analysis, future), score in zip(batch, scores):
+            if isinstance(score, Exception):
+                future.set_exception(score)
+                continue
+
+            is_real = score < self.spoof_detector.threshold
+            try:
+                embedding = (
+                    self.face_matcher.get_embeddings([analysis])[0] if is_real else None
+                )
+            except Exception as exc:
+                future.set_exception(exc)
+                continue
+
+            future.set_result(
+                VerificationResult(
+                    face_detected=True,
+                    spoof_score=score,
+                    is_real=is_real,
+                    embedding=embedding,
+                )
+            )
+
+    def _score_one(self, analysis):
+        try:
+            return self.spoof_detector.spoof_scores([analysis.spoof_crop])[0]
+        except Exception as exc:
+            return exc
@@ -2,12 +2,10 @@ from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
-import numpy as np
-import cv2
-import pickle
-from .face_matcher import FaceMatcher
-
-face_matcher = FaceMatcher()
+from .embedding_cache import embedding_cache
+from .embedding_codec import encode_embedding
+from .image_ingest import ImageRejected, decode_face_image
+from .model_registry import get_face_matcher
 
 class RegisterFaceAPIView(APIView):
     permission_classes = [IsAuthenticated]
@@ -26,13 +24,20 @@ class RegisterFaceAPIView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        img_array = np.frombuffer(face_image.read(), np.uint8)
-        face_img = cv2.imdecode(img_array, cv2.IMREAD_COLOR)
+        try:
+            decoded = decode_face_image(face_image)
+        except ImageRejected as exc:
+            return Response({"detail": exc.detail}, status=exc.status)
+
+        embedding = get_face_matcher().get_embedding(decoded.image)
 
-        embedding = face_matcher.get_embedding(face_img)
+        if embedding is None:
+            return Response(
+                {"detail": "Face not detected"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-        request.user.face_embedding = pickle.dumps(embedding)
-        request.user.save()
+        embedding_cache.store(request.user.pk, encode_embedding(embedding))
 
         return Response(
             {"detail": "Face registered successfully"},
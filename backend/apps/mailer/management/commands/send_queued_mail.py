@@ -0,0 +1,35 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.mailer.outbox import drain
+
+
+class Command(BaseCommand):
+    help = "Send queued outbound email"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.EMAIL_OUTBOX_BATCH_SIZE,
+            help="Messages sent per connection",
+        )
+        parser.add_argument(
+            "--forever",
+            action="store_true",
+            help="Keep polling for new messages instead of exiting once the queue is empty",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            report = drain(batch_size=options["batch_size"])
+
+            if report["sent"] or report["failed"] or not options["forever"]:
+                self.stdout.write(f"sent: {report['sent']}, failed: {report['failed']}")
+
+            if not options["forever"]:
+                return
+
+            time.sleep(settings.EMAIL_OUTBOX_POLL_SECONDS or 5)
@@ -0,0 +1,41 @@
+from django.db import models
+from django.db.models import Q
+
+
+class OutboundEmail(models.Model):
+    """
+    A message waiting to be sent (or already sent) by apps.mailer.outbox.
+    """
+
+    STATUS_CHOICES = (
+        ("PENDING", "Pending"),
+        ("SENT", "Sent"),
+        ("FAILED", "Failed"),
+    )
+
+    subject = models.CharField(max_length=255)
+    # Cleared once sent; messages can carry temporary passwords
+    body = models.TextField(blank=True)
+    from_email = models.CharField(max_length=255)
+    to = models.JSONField(default=list)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="PENDING")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # Earliest time the worker may (re)try the message
+    next_attempt_at = models.DateTimeField()
+    last_error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["next_attempt_at"],
+                condition=Q(status="PENDING"),
+                name="outbound_email_due",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to)} ({self.status})"
@@ -0,0 +1,276 @@
+"""
+Outbound email queue.
+
+Requests only call enqueue() / enqueue_many(), which store the message
+in the OutboundEmail table. drain() sends due messages in batches
+over one reused connection from the configured EMAIL_BACKEND:
+
+- a batch is claimed with SELECT ... FOR UPDATE SKIP LOCKED and leased
+  (next_attempt_at pushed forward by the time the rate limit needs to
+  send it, plus LEASE_MARGIN) before anything is sent, so several
+  workers never send the same message;
+- a message that fails is retried with exponential backoff, up to
+  EMAIL_OUTBOX_MAX_ATTEMPTS attempts, and then marked FAILED;
+- sends are spaced to stay under EMAIL_OUTBOX_RATE_PER_MINUTE per
+  process.
+
+drain() runs from a background thread in each gunicorn worker
+(start_mailer) and from `manage.py send_queued_mail`.
+"""
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection as db_connection, transaction
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+# Added to a batch's paced send time when leasing it, for slow SMTP
+# round trips
+LEASE_MARGIN = timedelta(minutes=5)
+
+# Longest wait between two attempts at one message
+MAX_BACKOFF = timedelta(hours=1)
+
+# Wakes this process's mailer thread when a message is queued
+_wake = threading.Event()
+
+
+def _new_email(subject, body, to, from_email=None):
+    return OutboundEmail(
+        subject=subject,
+        body=body,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        to=list(to),
+        next_attempt_at=timezone.now(),
+    )
+
+
+def enqueue(subject, body, to, from_email=None):
+    """
+    Queue one message for the recipients in ``to``. It is sent after
+    the current transaction commits.
+    """
+    email = _new_email(subject, body, to, from_email)
+    email.save()
+    transaction.on_commit(_wake.set)
+    return email
+
+
+def enqueue_many(messages):
+    """
+    Queue (subject, body, to) tuples in one insert.
+    """
+    emails = OutboundEmail.objects.bulk_create(
+        [_new_email(subject, body, to) for subject, body, to in messages],
+        batch_size=1000,
+    )
+    transaction.on_commit(_wake.set)
+    return emails
+
+
+def backoff(attempts):
+    """
+    Delay before the next try after ``attempts`` failed ones.
+    """
+    delay = timedelta(seconds=settings.EMAIL_OUTBOX_RETRY_SECONDS) * 2 ** (attempts - 1)
+    return min(delay, MAX_BACKOFF)
+
+
+class RateLimiter:
+    """
+    Spaces calls to wait() at least 60 / per_minute seconds apart.
+    """
+
+    def __init__(self, per_minute, clock=time.monotonic, sleep=time.sleep):
+        self.interval = 60 / per_minute if per_minute else 0
+        self.clock = clock
+        self.sleep = sleep
+        self.next_at = 0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+
+        with self._lock:
+            now = self.clock()
+            start = max(now, self.next_at)
+            self.next_at = start + self.interval
+
+        if start > now:
+            self.sleep(start - now)
+
+
+_rate_limiter = None
+
+
+def get_rate_limiter():
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = RateLimiter(settings.EMAIL_OUTBOX_RATE_PER_MINUTE)
+    return _rate_limiter
+
+
+def lease_for(batch_size):
+    """
+    How long a claimed batch stays invisible to other workers: long
+    enough to send all of it at EMAIL_OUTBOX_RATE_PER_MINUTE.
+    """
+    per_minute = settings.EMAIL_OUTBOX_RATE_PER_MINUTE
+    sending = timedelta(seconds=batch_size * 60 / per_minute) if per_minute else timedelta()
+    return sending + LEASE_MARGIN
+
+
+def claim_batch(batch_size, now=None):
+    """
+    Lease up to batch_size due messages to this worker.
+    """
+    now = now or timezone.now()
+
+    with transaction.atomic():
+        batch = list(
+            OutboundEmail.objects
+            .select_for_update(skip_locked=True)
+            .filter(status="PENDING", next_attempt_at__lte=now)
+            .order_by("next_attempt_at", "id")[:batch_size]
+        )
+        OutboundEmail.objects.filter(id__in=[email.id for email in batch]).update(
+            next_attempt_at=now + lease_for(batch_size)
+        )
+
+    return batch
+
+
+def _failed(email, exc):
+    email.attempts += 1
+    email.last_error = f"{type(exc).__name__}: {exc}"[:1000]
+
+    if email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+        email.status = "FAILED"
+    else:
+        email.next_attempt_at = timezone.now() + backoff(email.attempts)
+
+    email.save(update_fields=["attempts", "last_error", "status", "next_attempt_at"])
+
+
+def _sent(email):
+    OutboundEmail.objects.filter(id=email.id).update(
+        status="SENT",
+        body="",
+        attempts=email.attempts + 1,
+        sent_at=timezone.now(),
+    )
+
+
+def send_batch(batch, rate_limiter=None):
+    """
+    Send claimed messages over one connection. Returns (sent, failed).
+    """
+    rate_limiter = rate_limiter or get_rate_limiter()
+    connection = get_connection(fail_silently=False)
+    sent = failed = 0
+
+    try:
+        for email in batch:
+            rate_limiter.wait()
+
+            message = EmailMessage(
+                subject=email.subject,
+                body=email.body,
+                from_email=email.from_email,
+                to=email.to,
+                connection=connection,
+            )
+            try:
+                # Opens the connection on first use and keeps it open
+                # for the rest of the batch
+                connection.open()
+                connection.send_messages([message])
+            except Exception as exc:
+                _failed(email, exc)
+                failed += 1
+                # The connection may be broken; the next message reopens it
+                connection.close()
+            else:
+                _sent(email)
+                sent += 1
+    finally:
+        connection.close()
+
+    return sent, failed
+
+
+def drain(batch_size=None, max_batches=None):
+    """
+    Send due messages until none are left (or max_batches batches).
+    Returns {"sent": n, "failed": n}.
+    """
+    batch_size = batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE
+    report = {"sent": 0, "failed": 0}
+    batches = 0
+
+    while max_batches is None or batches < max_batches:
+        batch = claim_batch(batch_size)
+        if not batch:
+            break
+
+        sent, failed = send_batch(batch)
+        report["sent"] += sent
+        report["failed"] += failed
+        batches += 1
+
+    return report
+
+
+def purge_sent(older_than=timedelta(days=7), now=None, batch_size=None):
+    """
+    Delete sent messages older than older_than. Returns the count.
+    """
+    from apps.attendance.maintenance import DELETE_BATCH_SIZE, delete_in_batches
+
+    now = now or timezone.now()
+    return delete_in_batches(
+        OutboundEmail.objects.filter(status="SENT", sent_at__lt=now - older_than),
+        batch_size or DELETE_BATCH_SIZE,
+    )
+
+
+def _run_forever(interval):
+    while True:
+        _wake.wait(interval)
+        _wake.clear()
+
+        try:
+            report = drain()
+            if report["sent"] or report["failed"]:
+                logger.info("Mailer: %s", report)
+        except Exception:
+            logger.exception("Mailer pass failed")
+        finally:
+            db_connection.close()
+
+
+def start_mailer(interval=None):
+    """
+    Start the background mailer thread for this process. An interval of
+    0 disables it.
+    """
+    interval = settings.EMAIL_OUTBOX_POLL_SECONDS if interval is None else interval
+    if not interval:
+        return None
+
+    thread = threading.Thread(
+        target=_run_forever,
+        args=(interval,),
+        name="mailer",
+        daemon=True,
+    )
+    thread.start()
+    return thread
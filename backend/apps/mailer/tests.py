@@ -0,0 +1,119 @@
+from datetime import timedelta
+
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .models import OutboundEmail
+from .outbox import LEASE_MARGIN, RateLimiter, claim_batch, drain, enqueue, enqueue_many
+
+
+class CountingBackend(EmailBackend):
+    """
+    locmem backend that counts connections opened, with the SMTP
+    backend's open() semantics.
+    """
+
+    opened = 0
+    is_open = False
+
+    def open(self):
+        if self.is_open:
+            return False
+        self.is_open = True
+        CountingBackend.opened += 1
+        return True
+
+    def close(self):
+        self.is_open = False
+
+
+class FailingBackend(EmailBackend):
+    def send_messages(self, messages):
+        raise ConnectionError("SMTP server unavailable")
+
+
+@override_settings(
+    EMAIL_BACKEND="apps.mailer.tests.CountingBackend",
+    EMAIL_OUTBOX_RATE_PER_MINUTE=0,
+    EMAIL_OUTBOX_MAX_ATTEMPTS=3,
+    EMAIL_OUTBOX_RETRY_SECONDS=60,
+)
+class OutboxTests(TestCase):
+
+    def setUp(self):
+        CountingBackend.opened = 0
+
+    def test_request_path_only_enqueues(self):
+        enqueue("Hello", "Body", ["a@example.com"])
+
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(OutboundEmail.objects.get().status, "PENDING")
+
+    def test_drain_sends_batches_over_one_connection(self):
+        enqueue_many(
+            (f"Subject {n}", "Secret body", [f"student{n}@example.com"]) for n in range(5)
+        )
+
+        report = drain(batch_size=10)
+
+        self.assertEqual(report, {"sent": 5, "failed": 0})
+        self.assertEqual([m.to for m in mail.outbox], [[f"student{n}@example.com"] for n in range(5)])
+        self.assertEqual(CountingBackend.opened, 1)
+
+        # Bodies (temporary passwords) are not kept once sent
+        self.assertFalse(OutboundEmail.objects.exclude(status="SENT").exists())
+        self.assertFalse(OutboundEmail.objects.exclude(body="").exists())
+
+        self.assertEqual(drain(), {"sent": 0, "failed": 0})
+
+    @override_settings(EMAIL_BACKEND="apps.mailer.tests.FailingBackend")
+    def test_failures_back_off_then_give_up(self):
+        email = enqueue("Hello", "Body", ["a@example.com"])
+
+        self.assertEqual(drain(), {"sent": 0, "failed": 1})
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ("PENDING", 1))
+        self.assertIn("SMTP server unavailable", email.last_error)
+        self.assertGreater(email.next_attempt_at, timezone.now() + timedelta(seconds=55))
+
+        # Not due yet
+        self.assertEqual(drain(), {"sent": 0, "failed": 0})
+
+        for attempts in (2, 3):
+            OutboundEmail.objects.update(next_attempt_at=timezone.now())
+            drain()
+            email.refresh_from_db()
+            self.assertEqual(email.attempts, attempts)
+
+        self.assertEqual(email.status, "FAILED")
+
+    @override_settings(EMAIL_OUTBOX_RATE_PER_MINUTE=10)
+    def test_lease_covers_the_paced_batch(self):
+        enqueue_many(
+            (f"Subject {n}", "Body", [f"student{n}@example.com"]) for n in range(3)
+        )
+        now = timezone.now()
+
+        # 50 messages at 10 a minute take 5 minutes to send
+        self.assertEqual(len(claim_batch(50, now=now)), 3)
+        self.assertEqual(
+            set(OutboundEmail.objects.values_list("next_attempt_at", flat=True)),
+            {now + timedelta(minutes=5) + LEASE_MARGIN},
+        )
+        self.assertEqual(claim_batch(50, now=now + timedelta(minutes=9)), [])
+
+    def test_rate_limiter_spaces_sends(self):
+        now = [100.0]
+        slept = []
+
+        def sleep(seconds):
+            slept.append(seconds)
+            now[0] += seconds
+
+        limiter = RateLimiter(per_minute=30, clock=lambda: now[0], sleep=sleep)
+        for _ in range(3):
+            limiter.wait()
+
+        self.assertEqual(slept, [2.0, 2.0])
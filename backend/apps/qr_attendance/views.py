@@ -2,12 +2,16 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
-from django.utils import timezone
-from datetime import timedelta
-from django.shortcuts import get_object_or_404
+from django.db import transaction, IntegrityError
 
-from .models import QRToken
+from apps.attendance.live_events import publish_marked
 from apps.attendance.models import AttendanceSession, AttendanceRecord
+from apps.attendance.qr_tokens import (
+    InvalidQRToken,
+    make_token,
+    seconds_left,
+    validate_token,
+)
 
 
 class GenerateQRAPIView(APIView):
@@ -33,14 +37,9 @@ class GenerateQRAPIView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        qr = QRToken.objects.create(
-            session_id=session.id,
-            expires_at=timezone.now() + timedelta(seconds=5)
-        )
-
         return Response({
-            "qr_token": str(qr.token),
-            "expires_in": 5
+            "qr_token": make_token(session.id),
+            "expires_in": seconds_left()
         })
 
 
@@ -61,27 +60,28 @@ class MarkAttendanceViaQRAPIView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        qr = get_object_or_404(QRToken, token=token)
-
-        if not qr.is_valid():
+        try:
+            session_id = validate_token(token)
+        except InvalidQRToken as exc:
             return Response(
-                {"detail": "QR code expired"},
+                {"detail": exc.detail},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        if AttendanceRecord.objects.filter(
-            student=request.user,
-            session_id=qr.session_id
-        ).exists():
+        # A replayed token is rejected by the unique (student, session)
+        # constraint, so no token state is kept
+        try:
+            with transaction.atomic():
+                record = AttendanceRecord.objects.create(
+                    student=request.user,
+                    session_id=session_id,
+                    method="QR"
+                )
+                publish_marked(record)
+        except IntegrityError:
             return Response(
                 {"detail": "Attendance already marked"},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        AttendanceRecord.objects.create(
-            student=request.user,
-            session_id=qr.session_id,
-            method="QR"
-        )
-
         return Response({"detail": "Attendance marked via QR"})
@@ -1,3 +1,17 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import AttendanceSummary, ExportJob
+
+
+@admin.register(AttendanceSummary)
+class AttendanceSummaryAdmin(admin.ModelAdmin):
+    list_display = ("student", "teacher", "subject", "present_sessions", "pending_sessions", "total_sessions")
+    list_filter = ("subject",)
+    raw_id_fields = ("student", "teacher")
+
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "owner", "kind", "file_format", "status", "progress", "created_at", "expires_at")
+    list_filter = ("kind", "status")
+    raw_id_fields = ("owner",)
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class ReportsConfig(AppConfig):
     name = "apps.reports"
+
+    def ready(self):
+        import apps.reports.signals
@@ -0,0 +1,97 @@
+"""
+Streaming attendance report exports.
+
+CSV rows are written as they are read from the database and sent
+through a StreamingHttpResponse, so the first bytes leave before the
+last row is fetched. XLSX is a zip and cannot be streamed row by row;
+it is written with openpyxl's write-only (constant memory) workbook to
+an anonymous temp file, which FileResponse then sends in chunks.
+Either way memory stays flat as the report grows.
+"""
+import csv
+import tempfile
+
+from django.http import FileResponse, StreamingHttpResponse
+
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# (header, key in the rows from apps.attendance.stats.iter_roster_attendance)
+REPORT_COLUMNS = (
+    ("Roll No", "roll_no"),
+    ("Full Name", "full_name"),
+    ("Email", "email"),
+    ("Batch", "batch"),
+    ("Department", "department"),
+    ("Present Sessions", "present_sessions"),
+    ("Total Sessions", "total_sessions"),
+    ("Attendance Percentage", "attendance_percentage"),
+)
+
+
+class _Echo:
+    """
+    File-like object for csv.writer that returns each line instead of
+    buffering it.
+    """
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows, columns=REPORT_COLUMNS):
+    writer = csv.writer(_Echo())
+
+    yield writer.writerow([header for header, _ in columns])
+    for row in rows:
+        yield writer.writerow([row[key] for _, key in columns])
+
+
+def write_xlsx(rows, file, columns=REPORT_COLUMNS, sheet_name="Attendance Report"):
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(sheet_name)
+
+    sheet.append([header for header, _ in columns])
+    for row in rows:
+        sheet.append([row[key] for _, key in columns])
+
+    workbook.save(file)
+
+
+def csv_response(rows, filename, columns=REPORT_COLUMNS):
+    response = StreamingHttpResponse(
+        iter_csv(rows, columns),
+        content_type="text/csv",
+    )
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+def xlsx_response(rows, filename, columns=REPORT_COLUMNS):
+    return spooled_xlsx_response(
+        lambda file: write_xlsx(rows, file, columns),
+        filename,
+    )
+
+
+def spooled_xlsx_response(write, filename):
+    """
+    Call write(file) on an anonymous temp file and send the result.
+    The file is deleted when FileResponse closes it after sending.
+    """
+    file = tempfile.TemporaryFile()
+
+    try:
+        write(file)
+        file.seek(0)
+    except Exception:
+        file.close()
+        raise
+
+    return FileResponse(
+        file,
+        as_attachment=True,
+        filename=filename,
+        content_type=XLSX_CONTENT_TYPE,
+    )
@@ -0,0 +1,315 @@
+"""
+Background report exports.
+
+enqueue() records an ExportJob and hands it to a small thread pool in
+the current process once the request's transaction commits; the
+request returns straight away and the client polls the job for
+progress. The worker builds the file with the same writers as the
+synchronous exports (apps.reports.exports / apps.reports.matrix) and
+stores it under MEDIA_ROOT/exports/.
+
+Identical requests (same owner, kind, format and parameters) made
+within EXPORT_JOB_TTL_SECONDS get the existing job back instead of a
+new build, as long as it is finished or its heartbeat is fresh: a job
+whose process went away stops beating, and after
+EXPORT_JOB_STALE_SECONDS the next identical request fails it and
+queues a new one. reap_export_jobs() deletes jobs and files past their expiry
+and fails jobs whose worker died; it runs with the attendance reaper.
+"""
+import hashlib
+import io
+import json
+import logging
+import secrets
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import ExportJob
+
+logger = logging.getLogger(__name__)
+
+KIND_FILENAMES = {
+    "REPORT": "attendance_report",
+    "MATRIX": "attendance_matrix",
+}
+
+# Formats each kind can be built in
+KIND_FORMATS = {
+    "REPORT": ("xlsx", "csv"),
+    "MATRIX": ("xlsx",),
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=max(1, settings.EXPORT_JOB_WORKERS),
+                thread_name_prefix="export-job",
+            )
+        return _executor
+
+
+def params_hash(owner, kind, file_format, params):
+    key = json.dumps(
+        [owner.pk, kind, file_format, params],
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def enqueue(owner, kind, file_format, params=None):
+    """
+    Return (job, created). A job for the same request that finished
+    within the TTL, or is pending or running with a fresh heartbeat, is
+    returned instead of a new one. Stale pending or running jobs are
+    failed and replaced.
+    """
+    params = params or {}
+    digest = params_hash(owner, kind, file_format, params)
+    now = timezone.now()
+    ttl = timedelta(seconds=settings.EXPORT_JOB_TTL_SECONDS)
+    stale = now - timedelta(seconds=settings.EXPORT_JOB_STALE_SECONDS)
+
+    jobs = ExportJob.objects.filter(owner=owner, params_hash=digest)
+    existing = (
+        jobs
+        .filter(
+            Q(status="DONE")
+            | Q(status__in=("PENDING", "RUNNING"), heartbeat_at__gte=stale),
+            created_at__gte=now - ttl,
+            expires_at__gt=now,
+        )
+        .order_by("-created_at")
+        .first()
+    )
+    if existing:
+        return existing, False
+
+    # Their worker is gone (or, for a pending job, has not got to it in
+    # time); a late pickup finds them failed and does nothing
+    jobs.filter(
+        status__in=("PENDING", "RUNNING"),
+        heartbeat_at__lt=stale,
+    ).update(status="FAILED", error="Export worker stopped", finished_at=now)
+
+    job = ExportJob.objects.create(
+        owner=owner,
+        kind=kind,
+        file_format=file_format,
+        params=params,
+        params_hash=digest,
+        expires_at=now + ttl,
+    )
+
+    transaction.on_commit(lambda: submit(job.pk))
+
+    return job, True
+
+
+def submit(job_id):
+    return _get_executor().submit(_run_in_worker, job_id)
+
+
+def _run_in_worker(job_id):
+    close_old_connections()
+    try:
+        run_job(job_id)
+    except Exception:
+        logger.exception("Export job %s failed", job_id)
+    finally:
+        # Pool threads are long lived; do not keep their connections open
+        connection.close()
+
+
+def _set_progress(job_id, percent):
+    ExportJob.objects.filter(pk=job_id, status="RUNNING").update(
+        progress=percent, heartbeat_at=timezone.now()
+    )
+
+
+class _Heartbeat:
+    """
+    Touches a running job's heartbeat_at from its own thread, a few
+    times per EXPORT_JOB_STALE_SECONDS, so a build that is slow between
+    progress updates is not taken for an orphan.
+    """
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name=f"export-job-{job_id}-heartbeat", daemon=True
+        )
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        interval = settings.EXPORT_JOB_STALE_SECONDS / 3
+        try:
+            while not self._stop.wait(interval):
+                ExportJob.objects.filter(pk=self.job_id, status="RUNNING").update(
+                    heartbeat_at=timezone.now()
+                )
+        except Exception:
+            logger.exception("Export job %s heartbeat failed", self.job_id)
+        finally:
+            connection.close()
+
+
+class _Progress:
+    """
+    Writes a job's progress to the database, at most once per percent.
+    """
+
+    def __init__(self, job_id, start=0, end=100):
+        self.job_id = job_id
+        self.start = start
+        self.end = end
+        self.last = None
+
+    def __call__(self, done, total):
+        span = self.end - self.start
+        percent = self.start + (span * done // total if total else span)
+        if percent != self.last:
+            self.last = percent
+            _set_progress(self.job_id, percent)
+
+    def rows(self, rows, total):
+        for done, row in enumerate(rows, 1):
+            yield row
+            self(done, total)
+
+
+def _build_report(job, file):
+    from apps.attendance.stats import iter_roster_attendance
+    from apps.students.models import StudentProfile
+
+    from .exports import iter_csv, write_xlsx
+
+    total = StudentProfile.objects.filter(teacher__user=job.owner).count()
+    rows = _Progress(job.pk, 0, 99).rows(iter_roster_attendance(job.owner), total)
+
+    if job.file_format == "csv":
+        text = io.TextIOWrapper(file, encoding="utf-8", newline="")
+        text.writelines(iter_csv(rows))
+        text.flush()
+        text.detach()
+    else:
+        write_xlsx(rows, file)
+
+
+def _build_matrix(job, file):
+    from django.utils.dateparse import parse_date
+
+    from .matrix import build_attendance_matrix, write_matrix_xlsx
+
+    start, end = (
+        parse_date(job.params[key]) if job.params.get(key) else None
+        for key in ("start", "end")
+    )
+
+    matrix = build_attendance_matrix(job.owner, start, end)
+    _set_progress(job.pk, 20)
+
+    write_matrix_xlsx(matrix, file, progress=_Progress(job.pk, 20, 99))
+
+
+BUILDERS = {
+    "REPORT": _build_report,
+    "MATRIX": _build_matrix,
+}
+
+
+def run_job(job_id):
+    """
+    Build one job's file. Does nothing if the job is not pending (already
+    picked up, or deleted).
+    """
+    started = ExportJob.objects.filter(pk=job_id, status="PENDING").update(
+        status="RUNNING", heartbeat_at=timezone.now()
+    )
+    if not started:
+        return
+
+    job = (
+        ExportJob.objects
+        .select_related("owner")
+        .defer("owner__face_embedding")
+        .get(pk=job_id)
+    )
+
+    try:
+        with _Heartbeat(job_id), tempfile.TemporaryFile() as file:
+            BUILDERS[job.kind](job, file)
+            file.seek(0)
+
+            name = f"{KIND_FILENAMES[job.kind]}_{secrets.token_hex(8)}.{job.file_format}"
+            job.file.save(name, File(file), save=False)
+    except Exception as exc:
+        ExportJob.objects.filter(pk=job_id).update(
+            status="FAILED",
+            error=str(exc)[:1000],
+            finished_at=timezone.now(),
+        )
+        raise
+
+    finished = timezone.now()
+    ExportJob.objects.filter(pk=job_id).update(
+        status="DONE",
+        progress=100,
+        file=job.file.name,
+        finished_at=finished,
+        expires_at=finished + timedelta(seconds=settings.EXPORT_JOB_TTL_SECONDS),
+    )
+
+
+def download_name(job):
+    return f"{KIND_FILENAMES[job.kind]}.{job.file_format}"
+
+
+def reap_export_jobs(now=None):
+    """
+    Fail jobs that outlived EXPORT_JOB_TIMEOUT_SECONDS without finishing
+    (their process went away) and delete expired jobs with their files.
+    Returns the number of jobs deleted.
+    """
+    now = now or timezone.now()
+
+    ExportJob.objects.filter(
+        status__in=("PENDING", "RUNNING"),
+        created_at__lt=now - timedelta(seconds=settings.EXPORT_JOB_TIMEOUT_SECONDS),
+    ).update(status="FAILED", error="Export timed out", finished_at=now)
+
+    expired = ExportJob.objects.filter(expires_at__lt=now).exclude(
+        status__in=("PENDING", "RUNNING")
+    )
+
+    deleted = 0
+    for job in expired.iterator():
+        if job.file:
+            job.file.delete(save=False)
+        job.delete()
+        deleted += 1
+
+    return deleted
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.reports.summary import rebuild
+
+
+class Command(BaseCommand):
+    help = "Recompute AttendanceSummary from attendance sessions and records"
+
+    def handle(self, *args, **options):
+        rows = rebuild()
+        self.stdout.write(f"attendance summary rows: {rows}")
@@ -0,0 +1,198 @@
+"""
+Students x sessions attendance matrix, one sheet per subject.
+
+Everything is read in three bulk queries (roster, sessions, records as
+plain tuples) and pivoted with NumPy index arithmetic: each record
+becomes one (row, column) write into an int8 matrix, and per-subject
+sheets are column slices of that matrix.
+"""
+from datetime import datetime, time
+
+import numpy as np
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+# Cell codes in the matrix and their labels in the sheet
+ABSENT, FACE, QR = 0, 1, 2
+METHOD_CODES = {"FACE": FACE, "QR": QR}
+CELL_LABELS = np.array(["A", "FACE", "QR"], dtype=object)
+
+_SHEET_TITLE_FORBIDDEN = str.maketrans({c: " " for c in "[]:*?/\\"})
+
+
+class AttendanceMatrix:
+    def __init__(self, students, sessions, cells):
+        self.students = students  # [(roll_no, full_name)], one per row
+        self.sessions = sessions  # [(subject, start_time)], one per column
+        self.cells = cells        # int8 (rows, columns): ABSENT / FACE / QR
+
+    def subjects(self):
+        return sorted({subject for subject, _ in self.sessions})
+
+    def for_subject(self, subject):
+        columns = np.array([s == subject for s, _ in self.sessions], dtype=bool)
+
+        return AttendanceMatrix(
+            self.students,
+            [session for session, keep in zip(self.sessions, columns) if keep],
+            self.cells[:, columns],
+        )
+
+
+def _positions(keys, values):
+    """
+    Index of each value in the unsorted int array ``keys`` and a mask of
+    the values that are present at all.
+    """
+    order = np.argsort(keys)
+    sorted_keys = keys[order]
+
+    found = np.searchsorted(sorted_keys, values)
+    found[found == len(sorted_keys)] = 0
+    known = sorted_keys[found] == values
+
+    return order[found], known
+
+
+def pivot_attendance(students, sessions, records):
+    """
+    students: [(user_id, roll_no, full_name)] in row order
+    sessions: [(session_id, subject, start_time)] in column order
+    records:  [(student_id, session_id, method)]
+
+    Records for students or sessions outside the lists are ignored.
+    """
+    cells = np.zeros((len(students), len(sessions)), dtype=np.int8)
+
+    if records and students and sessions:
+        student_ids = np.fromiter((s[0] for s in students), dtype=np.int64, count=len(students))
+        session_ids = np.fromiter((s[0] for s in sessions), dtype=np.int64, count=len(sessions))
+
+        record_students, record_sessions, methods = zip(*records)
+        codes = np.fromiter(
+            (METHOD_CODES.get(m, FACE) for m in methods), dtype=np.int8, count=len(methods)
+        )
+
+        rows, known_students = _positions(student_ids, np.asarray(record_students, dtype=np.int64))
+        columns, known_sessions = _positions(session_ids, np.asarray(record_sessions, dtype=np.int64))
+        known = known_students & known_sessions
+
+        cells[rows[known], columns[known]] = codes[known]
+
+    return AttendanceMatrix(
+        [(roll_no, full_name) for _, roll_no, full_name in students],
+        [(subject, start_time) for _, subject, start_time in sessions],
+        cells,
+    )
+
+
+def parse_date_range(data):
+    """
+    (start_date, end_date) from the optional "start" / "end" keys of a
+    query dict (YYYY-MM-DD, inclusive). Raises ValueError with a message
+    for the client on anything else.
+    """
+    dates = []
+    for key in ("start", "end"):
+        value = data.get(key)
+        try:
+            parsed = parse_date(value) if value else None
+        except ValueError:
+            parsed = None
+        if value and parsed is None:
+            raise ValueError(f"{key} must be a date (YYYY-MM-DD)")
+        dates.append(parsed)
+
+    return tuple(dates)
+
+
+def build_attendance_matrix(teacher, start_date=None, end_date=None):
+    """
+    Matrix of the teacher's roster against their ended sessions whose
+    start date falls in [start_date, end_date].
+    """
+    from apps.attendance.models import AttendanceRecord, AttendanceSession
+    from apps.students.models import StudentProfile
+
+    sessions = AttendanceSession.objects.filter(teacher=teacher, is_active=False)
+    if start_date:
+        sessions = sessions.filter(
+            start_time__gte=timezone.make_aware(datetime.combine(start_date, time.min))
+        )
+    if end_date:
+        sessions = sessions.filter(
+            start_time__lte=timezone.make_aware(datetime.combine(end_date, time.max))
+        )
+
+    session_rows = list(
+        sessions.order_by("start_time").values_list("id", "subject", "start_time")
+    )
+
+    students = list(
+        StudentProfile.objects
+        .filter(teacher__user=teacher)
+        .order_by("roll_no")
+        .values_list("user_id", "roll_no", "full_name")
+    )
+
+    records = list(
+        AttendanceRecord.objects
+        .filter(session__in=sessions.values("id"))
+        .values_list("student_id", "session_id", "method")
+    )
+
+    return pivot_attendance(students, session_rows, records)
+
+
+def _sheet_title(subject, used):
+    title = (subject.translate(_SHEET_TITLE_FORBIDDEN).strip() or "Subject")[:31]
+
+    base, n = title, 2
+    while title.lower() in used:
+        suffix = f" ({n})"
+        title = base[:31 - len(suffix)] + suffix
+        n += 1
+
+    used.add(title.lower())
+    return title
+
+
+def write_matrix_xlsx(matrix, file, progress=None):
+    """
+    Write the matrix as an XLSX workbook to file. progress, if given, is
+    called with (sheets written, total sheets) after each sheet.
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    used_titles = set()
+    subjects = matrix.subjects() or ["No sessions"]
+
+    for done, subject in enumerate(subjects, 1):
+        sheet = workbook.create_sheet(_sheet_title(subject, used_titles))
+        subject_matrix = matrix.for_subject(subject)
+
+        sheet.append(
+            ["Roll No", "Full Name"]
+            + [
+                timezone.localtime(start_time).strftime("%Y-%m-%d %H:%M")
+                for _, start_time in subject_matrix.sessions
+            ]
+            + ["Present", "Total", "Attendance Percentage"]
+        )
+
+        cells = subject_matrix.cells
+        total = cells.shape[1]
+        present = np.count_nonzero(cells, axis=1)
+        percentage = np.round(present / total * 100, 2) if total else np.zeros(len(present))
+        labels = CELL_LABELS[cells].tolist()
+
+        for (roll_no, full_name), row, count, pct in zip(
+            subject_matrix.students, labels, present.tolist(), percentage.tolist()
+        ):
+            sheet.append([roll_no, full_name, *row, count, total, pct])
+
+        if progress:
+            progress(done, len(subjects))
+
+    workbook.save(file)
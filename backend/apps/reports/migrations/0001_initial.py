@@ -0,0 +1,67 @@
+# Generated by Django 5.0.6 on 2026-10-18 17:33
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AttendanceSummary",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("subject", models.CharField(max_length=100)),
+                ("present_sessions", models.PositiveIntegerField(default=0)),
+                ("pending_sessions", models.PositiveIntegerField(default=0)),
+                ("total_sessions", models.PositiveIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "student",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="attendance_summaries",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "teacher",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["teacher", "subject"],
+                        name="att_summary_teacher_subject",
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="attendancesummary",
+            constraint=models.UniqueConstraint(
+                fields=("student", "teacher", "subject"),
+                name="unique_attendance_summary",
+            ),
+        ),
+    ]
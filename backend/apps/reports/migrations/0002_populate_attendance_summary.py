@@ -0,0 +1,74 @@
+# Generated by Django 5.0.6 on 2026-10-18 17:35
+
+from collections import defaultdict
+
+from django.db import migrations
+from django.db.models import Count
+
+
+def populate(apps, schema_editor):
+    # Same computation as apps.reports.summary.rebuild(), on the
+    # historical models
+    AttendanceRecord = apps.get_model("attendance", "AttendanceRecord")
+    AttendanceSession = apps.get_model("attendance", "AttendanceSession")
+    AttendanceSummary = apps.get_model("reports", "AttendanceSummary")
+    StudentProfile = apps.get_model("students", "StudentProfile")
+
+    totals = defaultdict(dict)
+    for teacher_id, subject, count in (
+        AttendanceSession.objects
+        .filter(is_active=False)
+        .values("teacher_id", "subject")
+        .annotate(count=Count("id"))
+        .values_list("teacher_id", "subject", "count")
+    ):
+        totals[teacher_id][subject] = count
+
+    rows = {}
+
+    def row(student_id, teacher_id, subject):
+        key = (student_id, teacher_id, subject)
+        if key not in rows:
+            rows[key] = AttendanceSummary(
+                student_id=student_id,
+                teacher_id=teacher_id,
+                subject=subject,
+                total_sessions=totals[teacher_id].get(subject, 0),
+            )
+        return rows[key]
+
+    for student_id, teacher_id in StudentProfile.objects.values_list(
+        "user_id", "teacher__user_id"
+    ):
+        for subject in totals[teacher_id]:
+            row(student_id, teacher_id, subject)
+
+    for student_id, teacher_id, subject, is_active, count in (
+        AttendanceRecord.objects
+        .values("student_id", "session__teacher_id", "session__subject", "session__is_active")
+        .annotate(count=Count("id"))
+        .values_list(
+            "student_id", "session__teacher_id", "session__subject",
+            "session__is_active", "count",
+        )
+    ):
+        summary = row(student_id, teacher_id, subject)
+        if is_active:
+            summary.pending_sessions += count
+        else:
+            summary.present_sessions += count
+
+    AttendanceSummary.objects.bulk_create(rows.values(), batch_size=5000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reports", "0001_initial"),
+        ("attendance", "0009_attendance_hot_query_indexes"),
+        ("students", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(populate, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.6 on 2026-10-18 18:26
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reports", "0003_export_job"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="exportjob",
+            name="heartbeat_at",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -1,3 +1,109 @@
 from django.db import models
+from django.conf import settings
+from django.utils import timezone
 
-# Create your models here.
+User = settings.AUTH_USER_MODEL
+
+
+class AttendanceSummary(models.Model):
+    """
+    Attendance counts per student, teacher and subject, kept up to date
+    by apps.reports.summary as records are created and sessions end.
+    """
+
+    student = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="attendance_summaries"
+    )
+    teacher = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="+"
+    )
+    subject = models.CharField(max_length=100)
+
+    # Ended sessions the student was marked present in
+    present_sessions = models.PositiveIntegerField(default=0)
+    # Marks in sessions that are still running
+    pending_sessions = models.PositiveIntegerField(default=0)
+    # Ended sessions held by the teacher for this subject
+    total_sessions = models.PositiveIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["student", "teacher", "subject"],
+                name="unique_attendance_summary"
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["teacher", "subject"],
+                name="att_summary_teacher_subject",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.student} - {self.subject}: {self.present_sessions}/{self.total_sessions}"
+
+
+class ExportJob(models.Model):
+    """
+    A report export built in the background by apps.reports.jobs.
+    The finished file is stored under MEDIA_ROOT/exports/ until
+    expires_at.
+    """
+
+    KIND_CHOICES = (
+        ("REPORT", "Attendance report"),
+        ("MATRIX", "Attendance matrix"),
+    )
+    FORMAT_CHOICES = (
+        ("xlsx", "Excel"),
+        ("csv", "CSV"),
+    )
+    STATUS_CHOICES = (
+        ("PENDING", "Pending"),
+        ("RUNNING", "Running"),
+        ("DONE", "Done"),
+        ("FAILED", "Failed"),
+    )
+
+    owner = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="export_jobs"
+    )
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    file_format = models.CharField(max_length=4, choices=FORMAT_CHOICES)
+    params = models.JSONField(default=dict, blank=True)
+    # sha256 of (owner, kind, format, params); identical requests within
+    # EXPORT_JOB_TTL_SECONDS share one job
+    params_hash = models.CharField(max_length=64)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="PENDING")
+    progress = models.PositiveSmallIntegerField(default=0)  # percent
+    error = models.TextField(blank=True)
+    file = models.FileField(upload_to="exports/", blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField()
+    # Touched while the job is queued, claimed and built; a pending or
+    # running job that stops beating has lost its worker
+    heartbeat_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["owner", "params_hash", "-created_at"],
+                name="export_job_dedupe",
+            ),
+            models.Index(fields=["expires_at"], name="export_job_expires"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.file_format} for {self.owner} ({self.status})"
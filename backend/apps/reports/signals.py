@@ -0,0 +1,25 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from apps.attendance.models import AttendanceRecord
+from apps.attendance.signals import session_ended
+from apps.students.models import StudentProfile
+
+from . import summary
+
+
+@receiver(post_save, sender=AttendanceRecord)
+def count_attendance_record(sender, instance, created, **kwargs):
+    if created:
+        summary.record_marked(instance)
+
+
+@receiver(session_ended)
+def count_ended_session(sender, session, **kwargs):
+    summary.session_closed(session)
+
+
+@receiver(post_save, sender=StudentProfile)
+def add_student_summary(sender, instance, created, **kwargs):
+    if created:
+        summary.students_added([instance])
@@ -0,0 +1,215 @@
+"""
+Incremental maintenance of AttendanceSummary.
+
+- a new AttendanceRecord adds one pending session to its row (one
+  present session if its session has already ended);
+- when a session ends every row for (teacher, subject) gets
+  total_sessions + 1, roster students without a row get one with the
+  subject's ended-session count, and the students who attended move
+  one session from pending to present;
+- a newly added student gets rows for the teacher's existing subjects.
+
+rebuild() recomputes everything from the attendance tables and is the
+repair path (`manage.py rebuild_attendance_summary`).
+"""
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Greatest
+
+from .models import AttendanceSummary
+
+
+def record_marked(record):
+    session = record.session
+    lookup = {
+        "student_id": record.student_id,
+        "teacher_id": session.teacher_id,
+        "subject": session.subject,
+    }
+    # Records added to an already ended session (admin, imports) count
+    # as present straight away; session_closed() will not see them
+    counter = "pending_sessions" if session.is_active else "present_sessions"
+
+    with transaction.atomic():
+        updated = AttendanceSummary.objects.filter(**lookup).update(
+            **{counter: F(counter) + 1}
+        )
+        if updated:
+            return
+
+        total = _subject_totals(session.teacher_id, session.subject).get(session.subject, 0)
+
+        try:
+            with transaction.atomic():
+                AttendanceSummary.objects.create(
+                    total_sessions=total, **{counter: 1}, **lookup
+                )
+        except IntegrityError:
+            # Another request created the row first
+            AttendanceSummary.objects.filter(**lookup).update(
+                **{counter: F(counter) + 1}
+            )
+
+
+def session_closed(session):
+    from apps.attendance.models import AttendanceRecord
+    from apps.students.models import StudentProfile
+
+    rows = AttendanceSummary.objects.filter(
+        teacher_id=session.teacher_id,
+        subject=session.subject,
+    )
+    rows.update(total_sessions=F("total_sessions") + 1)
+
+    # Counts this session too: it is already marked ended
+    total = _subject_totals(session.teacher_id, session.subject).get(session.subject, 0)
+
+    roster = StudentProfile.objects.filter(
+        teacher__user_id=session.teacher_id
+    ).values_list("user_id", flat=True)
+
+    AttendanceSummary.objects.bulk_create(
+        [
+            AttendanceSummary(
+                student_id=student_id,
+                teacher_id=session.teacher_id,
+                subject=session.subject,
+                total_sessions=total,
+            )
+            for student_id in roster
+        ],
+        ignore_conflicts=True,
+    )
+
+    rows.filter(
+        student_id__in=AttendanceRecord.objects.filter(
+            session=session
+        ).values("student_id")
+    ).update(
+        present_sessions=F("present_sessions") + 1,
+        pending_sessions=Greatest(F("pending_sessions") - 1, 0),
+    )
+
+
+def students_added(student_profiles):
+    """
+    Give new roster students a row per subject their teacher has already
+    held sessions for, so their totals match everyone else's.
+    """
+    by_teacher = defaultdict(list)
+    for profile in student_profiles:
+        by_teacher[profile.teacher.user_id].append(profile.user_id)
+
+    for teacher_id, student_ids in by_teacher.items():
+        totals = _subject_totals(teacher_id)
+
+        AttendanceSummary.objects.bulk_create(
+            [
+                AttendanceSummary(
+                    student_id=student_id,
+                    teacher_id=teacher_id,
+                    subject=subject,
+                    total_sessions=total,
+                )
+                for student_id in student_ids
+                for subject, total in totals.items()
+            ],
+            ignore_conflicts=True,
+        )
+
+
+def _subject_totals(teacher_id, subject=None):
+    """
+    {subject: ended sessions} for one teacher (or one of their subjects),
+    counted from the sessions themselves so sessions that ended with no
+    summary rows still count. Served by the att_session_ended_subject
+    partial index.
+    """
+    from apps.attendance.models import AttendanceSession
+
+    sessions = AttendanceSession.objects.filter(teacher_id=teacher_id, is_active=False)
+    if subject is not None:
+        sessions = sessions.filter(subject=subject)
+
+    return dict(
+        sessions
+        .values("subject")
+        .annotate(total=Count("id"))
+        .values_list("subject", "total")
+    )
+
+
+def student_totals(student_profile):
+    """
+    (present, total) ended sessions for a student with their teacher,
+    summed over subjects.
+    """
+    totals = AttendanceSummary.objects.filter(
+        student_id=student_profile.user_id,
+        teacher__teacher_profile=student_profile.teacher_id,
+    ).aggregate(
+        present=Sum("present_sessions"),
+        total=Sum("total_sessions"),
+    )
+    return totals["present"] or 0, totals["total"] or 0
+
+
+@transaction.atomic
+def rebuild():
+    """
+    Recompute every summary row from sessions and records. Returns the
+    number of rows written.
+    """
+    from apps.attendance.models import AttendanceRecord, AttendanceSession
+    from apps.students.models import StudentProfile
+
+    totals = defaultdict(dict)
+    for teacher_id, subject, count in (
+        AttendanceSession.objects
+        .filter(is_active=False)
+        .values("teacher_id", "subject")
+        .annotate(count=Count("id"))
+        .values_list("teacher_id", "subject", "count")
+    ):
+        totals[teacher_id][subject] = count
+
+    rows = {}
+
+    def row(student_id, teacher_id, subject):
+        key = (student_id, teacher_id, subject)
+        if key not in rows:
+            rows[key] = AttendanceSummary(
+                student_id=student_id,
+                teacher_id=teacher_id,
+                subject=subject,
+                total_sessions=totals[teacher_id].get(subject, 0),
+            )
+        return rows[key]
+
+    for student_id, teacher_id in StudentProfile.objects.values_list(
+        "user_id", "teacher__user_id"
+    ):
+        for subject in totals[teacher_id]:
+            row(student_id, teacher_id, subject)
+
+    for student_id, teacher_id, subject, is_active, count in (
+        AttendanceRecord.objects
+        .values("student_id", "session__teacher_id", "session__subject", "session__is_active")
+        .annotate(count=Count("id"))
+        .values_list(
+            "student_id", "session__teacher_id", "session__subject",
+            "session__is_active", "count",
+        )
+    ):
+        summary = row(student_id, teacher_id, subject)
+        if is_active:
+            summary.pending_sessions += count
+        else:
+            summary.present_sessions += count
+
+    AttendanceSummary.objects.all().delete()
+    AttendanceSummary.objects.bulk_create(rows.values(), batch_size=5000)
+
+    return len(rows)
@@ -1,3 +1,238 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from datetime import timedelta
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.attendance.models import AttendanceRecord, AttendanceSession
+from apps.students.models import StudentProfile
+
+from .jobs import reap_export_jobs, run_job
+from .models import AttendanceSummary, ExportJob
+from .summary import rebuild
+
+User = get_user_model()
+
+
+class RosterFixtures:
+    """
+    A teacher with three students and a helper to run sessions.
+    """
+
+    def setUp(self):
+        self.teacher = User.objects.create_user(
+            username="teacher", email="teacher@example.com", password="x", role="TEACHER"
+        )
+        self.students = [self.add_student(n) for n in range(3)]
+
+    def add_student(self, n):
+        user = User.objects.create_user(
+            username=f"student{n}", email=f"student{n}@example.com",
+            password="x", role="STUDENT",
+        )
+        StudentProfile.objects.create(
+            user=user,
+            teacher=self.teacher.teacher_profile,
+            roll_no=str(n),
+            full_name=f"Student {n}",
+            phone="0",
+            batch="A",
+            department="CS",
+        )
+        return user
+
+    def run_session(self, subject, attendees, end=True):
+        session = AttendanceSession.objects.create(
+            teacher=self.teacher,
+            subject=subject,
+            duration_minutes=10,
+            end_time=timezone.now() + timedelta(minutes=10),
+        )
+        for student in attendees:
+            AttendanceRecord.objects.create(student=student, session=session, method="FACE")
+        if end:
+            session.end()
+        return session
+
+
+class AttendanceSummaryTests(RosterFixtures, TestCase):
+    """
+    The incrementally maintained summary matches a full rebuild.
+    """
+
+    def snapshot(self):
+        return sorted(
+            AttendanceSummary.objects.values_list(
+                "student_id", "subject", "present_sessions",
+                "pending_sessions", "total_sessions",
+            )
+        )
+
+    def test_incremental_summary_matches_rebuild(self):
+        first, second, third = self.students
+
+        self.run_session("Maths", [first, second])
+        self.run_session("Maths", [first])
+        self.run_session("Physics", [third])
+
+        # Joins after Maths and Physics have been held
+        late = self.add_student(3)
+
+        running = self.run_session("Maths", [late, second], end=False)
+        running.end()
+        running.end()  # counted once
+
+        self.run_session("Physics", [first], end=False)
+
+        incremental = self.snapshot()
+        rebuild()
+        self.assertEqual(incremental, self.snapshot())
+
+        row = AttendanceSummary.objects.get(student=first, subject="Maths")
+        self.assertEqual((row.present_sessions, row.total_sessions), (2, 3))
+
+        row = AttendanceSummary.objects.get(student=first, subject="Physics")
+        self.assertEqual((row.present_sessions, row.pending_sessions), (0, 1))
+
+    def test_sessions_held_with_an_empty_roster_count(self):
+        StudentProfile.objects.all().delete()
+        AttendanceSummary.objects.all().delete()
+
+        self.run_session("Chemistry", [])
+        self.run_session("Chemistry", [])
+
+        student = self.add_student(4)
+        row = AttendanceSummary.objects.get(student=student, subject="Chemistry")
+        self.assertEqual(row.total_sessions, 2)
+
+        self.run_session("Chemistry", [student])
+        incremental = self.snapshot()
+        rebuild()
+        self.assertEqual(incremental, self.snapshot())
+
+    def test_student_summary_reads_summary(self):
+        first = self.students[0]
+        self.run_session("Maths", [first])
+        self.run_session("Physics", [])
+
+        client = APIClient()
+        client.force_authenticate(User.objects.get(pk=first.pk))
+
+        # Student profile, then one summary aggregate
+        with self.assertNumQueries(2):
+            response = client.get("/api/students/attendance-summary/")
+
+        self.assertEqual(response.data, {
+            "total_sessions": 2,
+            "present_sessions": 1,
+            "attendance_percentage": 50.0,
+        })
+
+
+class ExportJobTests(RosterFixtures, TestCase):
+    """
+    Export jobs are built off the request, polled and downloaded, and
+    identical requests share a job.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.teacher)
+
+    def enqueue(self, **data):
+        # The worker pool is not used here; jobs run in the test thread
+        with self.captureOnCommitCallbacks(execute=False):
+            return self.client.post("/api/reports/exports/", data, format="json")
+
+    def test_job_is_built_polled_and_downloaded(self):
+        self.run_session("Maths", self.students[:2])
+
+        response = self.enqueue(kind="report", format="csv")
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data["status"], "PENDING")
+        self.assertIsNone(response.data["download_url"])
+
+        download = self.client.get(f"/api/reports/exports/{response.data['id']}/download/")
+        self.assertEqual(download.status_code, 409)
+
+        run_job(response.data["id"])
+
+        status = self.client.get(response.data["status_url"])
+        self.assertEqual(status.data["status"], "DONE")
+        self.assertEqual(status.data["progress"], 100)
+
+        download = self.client.get(status.data["download_url"])
+        self.assertEqual(download.status_code, 200)
+        lines = b"".join(download.streaming_content).decode().splitlines()
+        download.close()
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(lines[1].startswith("0,Student 0,"))
+
+    def test_identical_requests_share_a_job(self):
+        first = self.enqueue(kind="matrix", start="2026-01-01")
+        second = self.enqueue(kind="matrix", start="2026-01-01")
+        other = self.enqueue(kind="matrix", start="2026-02-01")
+
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(first.data["id"], second.data["id"])
+        self.assertNotEqual(first.data["id"], other.data["id"])
+
+        ExportJob.objects.filter(id=first.data["id"]).update(
+            created_at=timezone.now() - timedelta(hours=1)
+        )
+        self.assertEqual(self.enqueue(kind="matrix", start="2026-01-01").status_code, 202)
+
+    def test_orphaned_job_is_replaced(self):
+        first = self.enqueue(kind="report")
+        ExportJob.objects.filter(id=first.data["id"]).update(status="RUNNING")
+
+        # Still beating: shared
+        self.assertEqual(self.enqueue(kind="report").data["id"], first.data["id"])
+
+        ExportJob.objects.filter(id=first.data["id"]).update(
+            heartbeat_at=timezone.now() - timedelta(minutes=5)
+        )
+        second = self.enqueue(kind="report")
+
+        self.assertEqual(second.status_code, 202)
+        self.assertNotEqual(second.data["id"], first.data["id"])
+        self.assertEqual(ExportJob.objects.get(id=first.data["id"]).status, "FAILED")
+
+        # The new job runs; a late pickup of the old one does nothing
+        run_job(second.data["id"])
+        run_job(first.data["id"])
+        self.assertEqual(ExportJob.objects.get(id=second.data["id"]).status, "DONE")
+        self.assertEqual(ExportJob.objects.get(id=first.data["id"]).status, "FAILED")
+
+    def test_invalid_requests_and_other_owners(self):
+        self.assertEqual(self.enqueue(kind="matrix", format="csv").status_code, 400)
+        self.assertEqual(self.enqueue(kind="matrix", end="soon").status_code, 400)
+        self.assertEqual(self.enqueue(kind="roster").status_code, 400)
+
+        job_id = self.enqueue(kind="report").data["id"]
+
+        other = User.objects.create_user(
+            username="other", email="other@example.com", password="x", role="TEACHER"
+        )
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.get(f"/api/reports/exports/{job_id}/").status_code, 404)
+
+    def test_reaper_deletes_expired_files(self):
+        job_id = self.enqueue(kind="matrix").data["id"]
+        run_job(job_id)
+        job = ExportJob.objects.get(id=job_id)
+        self.assertTrue(job.file.storage.exists(job.file.name))
+
+        self.assertEqual(reap_export_jobs(), 0)
+        self.assertEqual(reap_export_jobs(now=job.expires_at + timedelta(seconds=1)), 1)
+        self.assertFalse(job.file.storage.exists(job.file.name))
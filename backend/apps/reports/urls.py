@@ -0,0 +1,8 @@
+from django.urls import path
+from .views import ExportJobCreateAPIView, ExportJobDetailAPIView, ExportJobDownloadAPIView
+
+urlpatterns = [
+    path("exports/", ExportJobCreateAPIView.as_view(), name="export-job-create"),
+    path("exports/<int:job_id>/", ExportJobDetailAPIView.as_view(), name="export-job-detail"),
+    path("exports/<int:job_id>/download/", ExportJobDownloadAPIView.as_view(), name="export-job-download"),
+]
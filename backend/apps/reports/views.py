@@ -1,3 +1,131 @@
-from django.shortcuts import render
+from django.http import FileResponse
+from django.urls import reverse
 
-# Create your views here.
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from rest_framework import status
+
+from .exports import XLSX_CONTENT_TYPE
+from .jobs import KIND_FORMATS, download_name, enqueue
+from .matrix import parse_date_range
+from .models import ExportJob
+
+CONTENT_TYPES = {
+    "xlsx": XLSX_CONTENT_TYPE,
+    "csv": "text/csv",
+}
+
+
+def job_data(job):
+    data = {
+        "id": job.id,
+        "kind": job.kind,
+        "format": job.file_format,
+        "params": job.params,
+        "status": job.status,
+        "progress": job.progress,
+        "created_at": job.created_at,
+        "finished_at": job.finished_at,
+        "expires_at": job.expires_at,
+        "status_url": reverse("export-job-detail", args=[job.id]),
+        "download_url": None,
+    }
+    if job.status == "DONE":
+        data["download_url"] = reverse("export-job-download", args=[job.id])
+    if job.status == "FAILED":
+        data["error"] = job.error
+    return data
+
+
+def get_own_job(request, job_id):
+    return ExportJob.objects.filter(owner=request.user, id=job_id).first()
+
+
+class ExportJobCreateAPIView(APIView):
+    """
+    POST {"kind": "report" | "matrix", "format": "xlsx" | "csv",
+          "start": "YYYY-MM-DD", "end": "YYYY-MM-DD"}
+
+    202 with the job to poll, or 200 with an identical recent job.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        if request.user.role != "TEACHER":
+            return Response(status=403)
+
+        kind = str(request.data.get("kind", "report")).upper()
+        file_format = str(request.data.get("format", "xlsx")).lower()
+
+        if kind not in KIND_FORMATS:
+            return Response(
+                {"detail": "kind must be report or matrix"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if file_format not in KIND_FORMATS[kind]:
+            return Response(
+                {"detail": f"{kind.lower()} exports are available as {', '.join(KIND_FORMATS[kind])}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        params = {}
+        if kind == "MATRIX":
+            try:
+                start, end = parse_date_range(request.data)
+            except ValueError as exc:
+                return Response(
+                    {"detail": str(exc)},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            params = {
+                "start": start.isoformat() if start else None,
+                "end": end.isoformat() if end else None,
+            }
+
+        job, created = enqueue(request.user, kind, file_format, params)
+
+        return Response(
+            job_data(job),
+            status=status.HTTP_202_ACCEPTED if created else status.HTTP_200_OK,
+        )
+
+
+class ExportJobDetailAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, job_id):
+        job = get_own_job(request, job_id)
+        if not job:
+            return Response(
+                {"detail": "Export not found"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        return Response(job_data(job))
+
+
+class ExportJobDownloadAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, job_id):
+        job = get_own_job(request, job_id)
+        if not job or (job.status == "DONE" and not job.file):
+            return Response(
+                {"detail": "Export not found"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        if job.status != "DONE":
+            return Response(
+                {"detail": "Export is not ready", "status": job.status},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        return FileResponse(
+            job.file.open("rb"),
+            as_attachment=True,
+            filename=download_name(job),
+            content_type=CONTENT_TYPES[job.file_format],
+        )
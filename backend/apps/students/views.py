@@ -5,6 +5,7 @@ from rest_framework import status
 
 from apps.students.models import StudentProfile
 from apps.attendance.models import AttendanceSession, AttendanceRecord
+from apps.reports.summary import student_totals
 
 
 
@@ -26,19 +27,7 @@ class StudentAttendanceSummaryAPIView(APIView):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        teacher_user = student_profile.teacher.user
-
-        completed_sessions = AttendanceSession.objects.filter(
-            teacher=teacher_user,
-            is_active=False
-        )
-
-        total_sessions = completed_sessions.count()
-
-        present_sessions = AttendanceRecord.objects.filter(
-            student=request.user,
-            session__in=completed_sessions
-        ).count()
+        present_sessions, total_sessions = student_totals(student_profile)
 
         percentage = (
             (present_sessions / total_sessions) * 100
@@ -0,0 +1,237 @@
+"""
+Bulk student import.
+
+import_students() takes the rows of a roster sheet (as streamed by
+apps.teachers.roster) and creates a User
+and StudentProfile for every valid row, chunk by chunk:
+
+- one query per chunk finds the emails already taken and one finds the
+  roll numbers the teacher already uses;
+- temporary passwords are hashed in a process pool
+  (apps.accounts.passwords), started once per import, before the
+  chunk's transaction opens;
+- users and profiles are inserted with bulk_create, one short
+  transaction per chunk, which also queues the chunk's credentials
+  emails, so every committed student gets their password.
+
+Every row gets a result: created, or skipped with the reason. If the
+sheet becomes unreadable part way through, the rows read before that
+are still imported and ImportResult.error says where reading stopped.
+"""
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+
+from apps.accounts.passwords import PasswordPool, make_passwords
+from apps.reports.summary import students_added
+from apps.students.models import StudentProfile
+
+from .credentials import generate_temp_password, send_credentials_emails
+from .roster import STUDENT_COLUMNS as STUDENT_FIELDS, RosterError, clean_value
+
+User = get_user_model()
+
+
+class ImportResult:
+    def __init__(self):
+        self.rows = []
+        # (email, temporary password) for every created student
+        self.credentials = []
+        # Why reading the sheet stopped early, if it did
+        self.error = None
+
+    def created(self, row, email):
+        self.rows.append({"row": row, "email": email, "status": "created"})
+
+    def skipped(self, row, reason, email=""):
+        self.rows.append(
+            {"row": row, "email": email, "status": "skipped", "reason": reason}
+        )
+
+    @property
+    def created_count(self):
+        return len(self.credentials)
+
+    @property
+    def skipped_rows(self):
+        return [
+            {"row": result["row"], "reason": result["reason"]}
+            for result in self.rows
+            if result["status"] == "skipped"
+        ]
+
+
+def _max_lengths():
+    lengths = {
+        field: StudentProfile._meta.get_field(field).max_length
+        for field in STUDENT_FIELDS
+        if field != "email"
+    }
+    # The email is the username too
+    lengths["email"] = min(
+        User._meta.get_field("email").max_length,
+        User._meta.get_field("username").max_length,
+    )
+    return lengths
+
+
+def clean_row(values, max_lengths=None):
+    """
+    The student fields of one sheet row, cleaned. Raises ValueError with
+    the reason the row cannot be imported.
+    """
+    max_lengths = max_lengths or _max_lengths()
+    row = {field: clean_value(values.get(field)) for field in STUDENT_FIELDS}
+    row["email"] = row["email"].lower()
+
+    missing = [field for field in STUDENT_FIELDS if not row[field]]
+    if missing:
+        raise ValueError(f"Missing {', '.join(missing)}")
+
+    too_long = [field for field in STUDENT_FIELDS if len(row[field]) > max_lengths[field]]
+    if too_long:
+        raise ValueError(f"Too long: {', '.join(too_long)}")
+
+    try:
+        validate_email(row["email"])
+    except ValidationError:
+        raise ValueError("Invalid email")
+
+    return row
+
+
+def import_students(teacher_profile, rows, chunk_size=None):
+    """
+    Create students for teacher_profile from rows, an iterable of
+    (row number, {column: value}). Returns an ImportResult.
+    """
+    chunk_size = chunk_size or settings.STUDENT_IMPORT_CHUNK_SIZE
+    max_lengths = _max_lengths()
+    result = ImportResult()
+
+    # Across chunks, to catch duplicates within the file
+    seen_emails = set()
+    seen_roll_nos = set()
+
+    rows = iter(rows)
+    with PasswordPool() as pool:
+        while True:
+            chunk = []
+            try:
+                # extend() keeps the rows read before an error
+                chunk.extend(islice(rows, chunk_size))
+            except RosterError as exc:
+                result.error = exc.detail
+
+            if not chunk:
+                break
+
+            cleaned = []
+            for row_number, values in chunk:
+                try:
+                    cleaned.append((row_number, clean_row(values, max_lengths)))
+                except ValueError as exc:
+                    email = clean_value(values.get("email")).lower()
+                    result.skipped(row_number, str(exc), email)
+
+            _import_chunk(
+                teacher_profile, cleaned, seen_emails, seen_roll_nos, result, pool
+            )
+
+            if result.error:
+                break
+
+    result.rows.sort(key=lambda row: row["row"])
+    return result
+
+
+def _import_chunk(teacher_profile, cleaned, seen_emails, seen_roll_nos, result, pool):
+    if not cleaned:
+        return
+
+    emails = [row["email"] for _, row in cleaned]
+    taken_emails = set(
+        User.objects.filter(email__in=emails).values_list("email", flat=True)
+    )
+    taken_emails.update(
+        User.objects.filter(username__in=emails).values_list("username", flat=True)
+    )
+    taken_roll_nos = set(
+        StudentProfile.objects
+        .filter(teacher=teacher_profile, roll_no__in=[row["roll_no"] for _, row in cleaned])
+        .values_list("roll_no", flat=True)
+    )
+
+    accepted = []
+    for row_number, row in cleaned:
+        email, roll_no = row["email"], row["roll_no"]
+
+        if email in taken_emails:
+            result.skipped(row_number, "Email already exists", email)
+        elif roll_no in taken_roll_nos:
+            result.skipped(row_number, "Roll number already exists", email)
+        elif email in seen_emails:
+            result.skipped(row_number, "Duplicate email in file", email)
+        elif roll_no in seen_roll_nos:
+            result.skipped(row_number, "Duplicate roll number in file", email)
+        else:
+            accepted.append((row_number, row))
+
+        seen_emails.add(email)
+        seen_roll_nos.add(roll_no)
+
+    if not accepted:
+        return
+
+    passwords = [generate_temp_password() for _ in accepted]
+    hashed = make_passwords(passwords, pool=pool)
+
+    users = [
+        User(
+            username=row["email"],
+            email=row["email"],
+            password=password_hash,
+            role="STUDENT",
+        )
+        for (_, row), password_hash in zip(accepted, hashed)
+    ]
+
+    try:
+        with transaction.atomic():
+            User.objects.bulk_create(users)
+            profiles = StudentProfile.objects.bulk_create(
+                [
+                    StudentProfile(
+                        user=user,
+                        teacher=teacher_profile,
+                        roll_no=row["roll_no"],
+                        full_name=row["full_name"],
+                        phone=row["phone"],
+                        batch=row["batch"],
+                        department=row["department"],
+                    )
+                    for user, (_, row) in zip(users, accepted)
+                ]
+            )
+            # bulk_create sends no post_save
+            students_added(profiles)
+            send_credentials_emails(
+                (row["email"], password) for (_, row), password in zip(accepted, passwords)
+            )
+    except IntegrityError:
+        # Someone added one of these students since the lookups above
+        for row_number, row in accepted:
+            result.skipped(
+                row_number,
+                "Conflicts with a student added at the same time; upload again",
+                row["email"],
+            )
+        return
+
+    for (row_number, row), password in zip(accepted, passwords):
+        result.created(row_number, row["email"])
+        result.credentials.append((row["email"], password))
@@ -0,0 +1,53 @@
+import secrets
+import string
+
+from apps.mailer.outbox import enqueue, enqueue_many
+
+CREDENTIALS_SUBJECT = "Your Smart Attendance Login Credentials"
+
+CREDENTIALS_BODY = """
+Hello,
+
+Your student account has been created.
+
+Login details:
+Email: {email}
+Temporary Password: {password}
+
+IMPORTANT:
+- This is a temporary password
+- You MUST change it on first login
+
+Login here:
+http://localhost:5173/
+
+Regards,
+Smart Attendance System
+"""
+
+
+def generate_temp_password(length=8):
+    chars = string.ascii_letters + string.digits
+    return "".join(secrets.choice(chars) for _ in range(length))
+
+
+def credentials_email(email, password):
+    """
+    (subject, body, recipients) of the credentials email for a student.
+    """
+    return (
+        CREDENTIALS_SUBJECT,
+        CREDENTIALS_BODY.format(email=email, password=password),
+        [email],
+    )
+
+
+def send_credentials_email(email, password):
+    enqueue(*credentials_email(email, password))
+
+
+def send_credentials_emails(credentials):
+    """
+    Queue the credentials email for each (email, password) pair.
+    """
+    enqueue_many(credentials_email(email, password) for email, password in credentials)
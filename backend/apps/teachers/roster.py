@@ -0,0 +1,128 @@
+"""
+Streaming reader for uploaded roster sheets (.xlsx or .csv).
+
+read_roster() checks the header row straight away and then yields the
+data rows one at a time: xlsx through openpyxl's read-only mode, CSV
+line by line from the upload. Nothing holds the whole sheet, so memory
+stays flat however many rows it has; apps.teachers.bulk_import
+validates and inserts the rows in chunks as they arrive.
+
+A file that turns out to be unreadable part way through raises
+RosterError from the row iterator, naming the row where reading
+stopped; the rows before it have already been yielded.
+"""
+import codecs
+import csv
+import math
+import zipfile
+
+STUDENT_COLUMNS = (
+    "roll_no",
+    "full_name",
+    "email",
+    "phone",
+    "batch",
+    "department",
+)
+
+
+class RosterError(Exception):
+    def __init__(self, detail, required_columns=None):
+        super().__init__(detail)
+        self.detail = detail
+        self.required_columns = required_columns
+
+
+def clean_value(value):
+    """
+    Cell value as a stripped string. Empty cells (None / NaN) become ""
+    and whole floats lose their ".0" (phone numbers read from Excel).
+    """
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        if math.isnan(value):
+            return ""
+        if value.is_integer():
+            value = int(value)
+    return str(value).strip()
+
+
+def _column_name(value):
+    return clean_value(value).lower().replace(" ", "_")
+
+
+def is_csv(file):
+    name = (getattr(file, "name", "") or "").lower()
+    content_type = getattr(file, "content_type", "") or ""
+    return name.endswith(".csv") or content_type in ("text/csv", "application/csv")
+
+
+def _xlsx_rows(file):
+    from openpyxl import load_workbook
+
+    try:
+        workbook = load_workbook(file, read_only=True, data_only=True)
+    except (zipfile.BadZipFile, KeyError, OSError, ValueError):
+        raise RosterError("Invalid Excel file")
+
+    try:
+        yield from workbook.worksheets[0].iter_rows(values_only=True)
+    except Exception:
+        # Read-only sheets are parsed lazily; a corrupt row can fail
+        # with anything from a zip error to an XML or value error
+        raise RosterError("Invalid Excel file")
+    finally:
+        workbook.close()
+
+
+def _csv_rows(file):
+    lines = codecs.iterdecode(file, "utf-8-sig")
+
+    try:
+        yield from csv.reader(lines)
+    except (UnicodeDecodeError, csv.Error):
+        raise RosterError("Invalid CSV file")
+
+
+def read_roster(file, required_columns=STUDENT_COLUMNS):
+    """
+    Yield (row number, {column: value}) for every non-empty data row of
+    an uploaded sheet. Raises RosterError before yielding anything if the
+    file cannot be read or the header lacks a required column; column
+    names are matched case-insensitively, with spaces read as "_".
+    """
+    rows = _csv_rows(file) if is_csv(file) else _xlsx_rows(file)
+
+    # Header = first non-empty row
+    row_number = 0
+    header = None
+    for row_number, row in enumerate(rows, 1):
+        if any(clean_value(cell) for cell in row):
+            header = [_column_name(cell) for cell in row]
+            break
+
+    missing = set(required_columns) - set(header or ())
+    if missing:
+        raise RosterError(
+            f"Missing columns: {', '.join(sorted(missing))}" if header else "The file has no header row",
+            required_columns=list(required_columns),
+        )
+
+    positions = {column: header.index(column) for column in required_columns}
+
+    return _data_rows(rows, row_number, positions)
+
+
+def _data_rows(rows, header_row, positions):
+    row_number = header_row
+    try:
+        for row_number, row in enumerate(rows, header_row + 1):
+            values = {
+                column: row[index] if index < len(row) else None
+                for column, index in positions.items()
+            }
+            if any(clean_value(value) for value in values.values()):
+                yield row_number, values
+    except RosterError as exc:
+        raise RosterError(f"{exc.detail}; reading stopped after row {row_number}")
@@ -0,0 +1,399 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.core import mail
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.attendance.models import AttendanceRecord, AttendanceSession
+from apps.mailer.outbox import drain
+from apps.students.models import StudentProfile
+
+User = get_user_model()
+
+
+class TeacherStudentListQueryTests(TestCase):
+    """
+    The student list and the report export load attendance for the
+    whole roster in a constant number of queries.
+    """
+
+    def setUp(self):
+        self.teacher = User.objects.create_user(
+            username="teacher", email="teacher@example.com", password="x", role="TEACHER"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.teacher)
+
+        now = timezone.now()
+        self.sessions = [
+            AttendanceSession.objects.create(
+                teacher=self.teacher,
+                subject="Maths",
+                duration_minutes=10,
+                end_time=now,
+                is_active=False,
+            )
+            for _ in range(4)
+        ]
+        self.students = 0
+
+    def add_students(self, count):
+        for _ in range(count):
+            n = self.students
+            self.students += 1
+
+            user = User.objects.create_user(
+                username=f"student{n}", email=f"student{n}@example.com",
+                password="x", role="STUDENT",
+            )
+            StudentProfile.objects.create(
+                user=user,
+                teacher=self.teacher.teacher_profile,
+                roll_no=str(n),
+                full_name=f"Student {n}",
+                phone="0",
+                batch="A",
+                department="CS",
+            )
+
+            # Student n attended the first n % 4 + 1 sessions
+            for session in self.sessions[:n % 4 + 1]:
+                AttendanceRecord.objects.create(
+                    student=user, session=session, method="FACE"
+                )
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+            if response.streaming:
+                # Exports query the database while streaming
+                response.body = b"".join(response.streaming_content)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response
+
+    def test_student_list_query_count_is_constant(self):
+        self.add_students(2)
+        small, _ = self.count_queries("/api/teachers/students/")
+
+        self.add_students(20)
+        large, response = self.count_queries("/api/teachers/students/")
+
+        self.assertEqual(small, large)
+        self.assertLessEqual(large, 3)
+        self.assertEqual(response.data["total_students"], 22)
+
+    def test_student_list_counts_present_sessions(self):
+        self.add_students(3)
+
+        # Attendance with another teacher does not count
+        other = User.objects.create_user(
+            username="other", email="other@example.com", password="x", role="TEACHER"
+        )
+        other_session = AttendanceSession.objects.create(
+            teacher=other,
+            subject="Physics",
+            duration_minutes=10,
+            end_time=timezone.now() + timedelta(minutes=10),
+        )
+        AttendanceRecord.objects.create(
+            student=User.objects.get(username="student0"),
+            session=other_session,
+            method="QR",
+        )
+
+        response = self.client.get("/api/teachers/students/")
+        rows = {row["roll_no"]: row for row in response.data["students"]}
+
+        self.assertEqual(rows["0"]["present_sessions"], 1)
+        self.assertEqual(rows["2"]["present_sessions"], 3)
+        self.assertEqual(rows["2"]["total_sessions"], 4)
+        self.assertEqual(rows["2"]["attendance_percentage"], 75.0)
+
+    def test_report_export_query_count_is_constant(self):
+        self.add_students(2)
+        small, _ = self.count_queries("/api/teachers/attendance-report/")
+
+        self.add_students(20)
+        large, _ = self.count_queries("/api/teachers/attendance-report/")
+
+        self.assertEqual(small, large)
+
+    def test_csv_export_streams_every_student(self):
+        self.add_students(2)
+        small, _ = self.count_queries("/api/teachers/attendance-report/?format=csv")
+
+        self.add_students(20)
+        large, response = self.count_queries("/api/teachers/attendance-report/?format=csv")
+
+        self.assertEqual(small, large)
+
+        lines = response.body.decode().splitlines()
+        self.assertEqual(len(lines), 23)
+        self.assertEqual(lines[0].split(",")[0], "Roll No")
+
+
+class AttendanceMatrixExportTests(TestCase):
+
+    def setUp(self):
+        self.teacher = User.objects.create_user(
+            username="teacher", email="teacher@example.com", password="x", role="TEACHER"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.teacher)
+
+        self.students = []
+        for n in range(3):
+            user = User.objects.create_user(
+                username=f"student{n}", email=f"student{n}@example.com",
+                password="x", role="STUDENT",
+            )
+            StudentProfile.objects.create(
+                user=user,
+                teacher=self.teacher.teacher_profile,
+                roll_no=str(n),
+                full_name=f"Student {n}",
+                phone="0",
+                batch="A",
+                department="CS",
+            )
+            self.students.append(user)
+
+    def session(self, subject, attendees, method="FACE"):
+        session = AttendanceSession.objects.create(
+            teacher=self.teacher,
+            subject=subject,
+            duration_minutes=10,
+            end_time=timezone.now() + timedelta(minutes=10),
+        )
+        for student in attendees:
+            AttendanceRecord.objects.create(student=student, session=session, method=method)
+        session.end()
+        return session
+
+    def test_matrix_has_a_sheet_per_subject(self):
+        from io import BytesIO
+
+        from openpyxl import load_workbook
+
+        first, second, third = self.students
+        self.session("Maths", [first, second])
+        self.session("Maths", [first], method="QR")
+        self.session("Physics", [third])
+
+        response = self.client.get("/api/teachers/attendance-matrix/")
+        self.assertEqual(response.status_code, 200)
+
+        workbook = load_workbook(BytesIO(b"".join(response.streaming_content)))
+        self.assertEqual(workbook.sheetnames, ["Maths", "Physics"])
+
+        maths = [[cell.value for cell in row] for row in workbook["Maths"].iter_rows()]
+        self.assertEqual(maths[1], ["0", "Student 0", "FACE", "QR", 2, 2, 100])
+        self.assertEqual(maths[2], ["1", "Student 1", "FACE", "A", 1, 2, 50])
+        self.assertEqual(maths[3], ["2", "Student 2", "A", "A", 0, 2, 0])
+
+    def test_invalid_date_is_rejected(self):
+        response = self.client.get("/api/teachers/attendance-matrix/?start=yesterday")
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(
+    EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+    EMAIL_OUTBOX_RATE_PER_MINUTE=0,
+)
+class BulkStudentUploadTests(TestCase):
+
+    def setUp(self):
+        self.teacher = User.objects.create_user(
+            username="teacher", email="teacher@example.com", password="x", role="TEACHER"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.teacher)
+
+        User.objects.create_user(
+            username="taken@example.com", email="taken@example.com",
+            password="x", role="STUDENT",
+        )
+
+    def upload(self, rows):
+        from io import BytesIO
+
+        import pandas as pd
+
+        file = BytesIO()
+        pd.DataFrame(rows).to_excel(file, index=False)
+        file.seek(0)
+        file.name = "students.xlsx"
+
+        return self.client.post("/api/teachers/upload-students/", {"file": file})
+
+    def student(self, n, **overrides):
+        row = {
+            "roll_no": str(n),
+            "full_name": f"Student {n}",
+            "email": f"Student{n}@Example.com",
+            "phone": 9876500000 + n,
+            "batch": "A",
+            "department": "CS",
+        }
+        row.update(overrides)
+        return row
+
+    def test_upload_reports_every_row(self):
+        response = self.upload([
+            self.student(1),
+            self.student(2),
+            self.student(3, email="taken@example.com"),
+            self.student(4, email="student1@example.com"),
+            self.student(2, email="student5@example.com"),
+            self.student(6, full_name=""),
+        ])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["students_created"], 2)
+
+        results = {row["row"]: row for row in response.data["results"]}
+        self.assertEqual([row["status"] for row in response.data["results"]],
+                         ["created", "created", "skipped", "skipped", "skipped", "skipped"])
+        self.assertEqual(results[4]["reason"], "Email already exists")
+        self.assertEqual(results[5]["reason"], "Duplicate email in file")
+        self.assertEqual(results[6]["reason"], "Duplicate roll number in file")
+        self.assertEqual(results[7]["reason"], "Missing full_name")
+
+        student = User.objects.get(email="student1@example.com")
+        self.assertEqual(student.role, "STUDENT")
+        self.assertEqual(student.student_profile.phone, "9876500001")
+
+        # Credentials are queued, not sent in the request
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(drain(), {"sent": 2, "failed": 0})
+        self.assertEqual(len(mail.outbox), 2)
+        password = mail.outbox[0].body.split("Temporary Password: ")[1].split()[0]
+        self.assertTrue(student.check_password(password))
+
+    def test_csv_upload_with_loose_headers(self):
+        file = SimpleUploadedFile(
+            "students.csv",
+            (
+                "\ufeffRoll No,Full Name,Email,Phone,Batch,Department,Notes\r\n"
+                "1,Student 1,student1@example.com,98765,A,CS,ignored\r\n"
+                ",,,,,,\r\n"
+                "2,Student 2,student2@example.com,98766,A,CS,\r\n"
+            ).encode(),
+            content_type="text/csv",
+        )
+
+        response = self.client.post("/api/teachers/upload-students/", {"file": file})
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["students_created"], 2)
+        self.assertEqual([row["row"] for row in response.data["results"]], [2, 4])
+
+    def test_missing_columns_are_rejected_before_import(self):
+        response = self.upload([{"roll_no": "1", "email": "student1@example.com"}])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("full_name", response.data["detail"])
+        self.assertFalse(User.objects.filter(email="student1@example.com").exists())
+
+        garbage = SimpleUploadedFile("students.xlsx", b"not a workbook")
+        response = self.client.post("/api/teachers/upload-students/", {"file": garbage})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["detail"], "Invalid Excel file")
+
+    def test_query_count_does_not_grow_with_rows(self):
+        def queries(rows):
+            with CaptureQueriesContext(connection) as ctx:
+                self.upload(rows)
+            return len(ctx)
+
+        small = queries([self.student(n) for n in range(10, 13)])
+        large = queries([self.student(n) for n in range(20, 35)])
+
+        self.assertEqual(small, large)
+
+    @override_settings(
+        PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+        PASSWORD_HASH_WORKERS=2,
+    )
+    def test_password_pool_starts_once_per_import(self):
+        from concurrent.futures import ThreadPoolExecutor
+
+        from .bulk_import import import_students
+
+        rows = [(n + 2, self.student(n)) for n in range(120)]
+        with mock.patch(
+            "apps.accounts.passwords.ProcessPoolExecutor",
+            side_effect=lambda max_workers, mp_context: ThreadPoolExecutor(max_workers),
+        ) as pool:
+            result = import_students(self.teacher.teacher_profile, rows, chunk_size=40)
+
+        self.assertEqual(result.created_count, 120)
+        self.assertEqual(pool.call_count, 1)
+
+    def test_credentials_are_queued_with_each_committed_chunk(self):
+        from apps.mailer.models import OutboundEmail
+
+        from .bulk_import import import_students
+
+        rows = [(n + 2, self.student(n)) for n in range(4)]
+        with mock.patch(
+            "apps.teachers.bulk_import.students_added",
+            side_effect=[None, RuntimeError("boom")],
+        ):
+            with self.assertRaises(RuntimeError):
+                import_students(self.teacher.teacher_profile, rows, chunk_size=2)
+
+        # The first chunk committed with its emails; the second rolled back
+        self.assertEqual(
+            sorted(email.to[0] for email in OutboundEmail.objects.all()),
+            ["student0@example.com", "student1@example.com"],
+        )
+        self.assertFalse(User.objects.filter(email="student2@example.com").exists())
+
+    @override_settings(STUDENT_IMPORT_CHUNK_SIZE=1)
+    def test_unreadable_row_keeps_the_rows_before_it(self):
+        file = SimpleUploadedFile(
+            "students.csv",
+            (
+                b"roll_no,full_name,email,phone,batch,department\r\n"
+                b"1,Student 1,student1@example.com,98765,A,CS\r\n"
+                b"2,Student 2,student2@example.com,98766,A,CS\r\n"
+                b"3,Student \xff,student3@example.com,98767,A,CS\r\n"
+                b"4,Student 4,student4@example.com,98768,A,CS\r\n"
+            ),
+            content_type="text/csv",
+        )
+
+        response = self.client.post("/api/teachers/upload-students/", {"file": file})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["students_created"], 2)
+        self.assertEqual(
+            response.data["detail"], "Invalid CSV file; reading stopped after row 3"
+        )
+        self.assertEqual(drain(), {"sent": 2, "failed": 0})
+        self.assertFalse(User.objects.filter(email="student4@example.com").exists())
+
+    def test_corrupt_xlsx_row_is_a_bad_request(self):
+        from .roster import RosterError, read_roster
+
+        def broken_rows():
+            yield ("roll_no", "full_name", "email", "phone", "batch", "department")
+            yield ("1", "Student 1", "student1@example.com", "98765", "A", "CS")
+            raise ValueError("corrupt cell")
+
+        file = SimpleUploadedFile("students.xlsx", b"")
+        with mock.patch("openpyxl.load_workbook") as load_workbook:
+            load_workbook.return_value.worksheets[0].iter_rows.return_value = broken_rows()
+            rows = read_roster(file)
+
+            self.assertEqual(next(rows)[0], 2)
+            with self.assertRaises(RosterError) as error:
+                next(rows)
+
+        self.assertEqual(error.exception.detail, "Invalid Excel file; reading stopped after row 2")
@@ -1,9 +1,3 @@
-import pandas as pd
-import secrets
-import string
-
-from django.core.mail import send_mail
-from django.conf import settings
 from django.http import HttpResponse
 from django.contrib.auth import get_user_model
 from django.db import transaction
@@ -13,45 +7,18 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework import status
+from rest_framework.negotiation import BaseContentNegotiation
 
 from apps.students.models import StudentProfile
-from apps.attendance.models import AttendanceSession, AttendanceRecord
-
-User = get_user_model()
-
-
-
-def generate_temp_password(length=8):
-    chars = string.ascii_letters + string.digits
-    return "".join(secrets.choice(chars) for _ in range(length))
-
-
-def send_credentials_email(email, password):
-    send_mail(
-        subject="Your Smart Attendance Login Credentials",
-        message=f"""
-Hello,
-
-Your student account has been created.
+from apps.attendance.stats import iter_roster_attendance, roster_attendance
+from apps.reports.exports import csv_response, spooled_xlsx_response, xlsx_response
+from apps.reports.matrix import build_attendance_matrix, parse_date_range, write_matrix_xlsx
 
-Login details:
-Email: {email}
-Temporary Password: {password}
+from .bulk_import import import_students
+from .roster import RosterError, read_roster
+from .credentials import generate_temp_password, send_credentials_email
 
-IMPORTANT:
-- This is a temporary password
-- You MUST change it on first login
-
-Login here:
-http://localhost:5173/
-
-Regards,
-Smart Attendance System
-""",
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        recipient_list=[email],
-        fail_silently=False,
-    )
+User = get_user_model()
 
 
 
@@ -59,15 +26,6 @@ class BulkStudentUploadAPIView(APIView):
     permission_classes = [IsAuthenticated]
     parser_classes = [MultiPartParser, FormParser]
 
-    REQUIRED_COLUMNS = {
-        "roll_no",
-        "full_name",
-        "email",
-        "phone",
-        "batch",
-        "department",
-    }
-
     def post(self, request):
         if request.user.role != "TEACHER":
             return Response(
@@ -78,80 +36,31 @@ class BulkStudentUploadAPIView(APIView):
         file = request.FILES.get("file")
         if not file:
             return Response(
-                {"detail": "Excel file is required"},
+                {"detail": "Excel or CSV file is required"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
         try:
-            df = pd.read_excel(file)
-        except Exception:
-            return Response(
-                {"detail": "Invalid Excel file"},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
+            rows = read_roster(file)
+            result = import_students(request.user.teacher_profile, rows)
+        except RosterError as exc:
+            data = {"detail": exc.detail}
+            if exc.required_columns:
+                data["required_columns"] = exc.required_columns
+            return Response(data, status=status.HTTP_400_BAD_REQUEST)
 
-        if not self.REQUIRED_COLUMNS.issubset(df.columns):
-            return Response(
-                {
-                    "detail": "Invalid Excel format",
-                    "required_columns": list(self.REQUIRED_COLUMNS),
-                },
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
-        teacher_profile = request.user.teacher_profile
-
-        created = []
-        skipped = []
-
-        with transaction.atomic():
-            for index, row in df.iterrows():
-                email = str(row["email"]).strip().lower()
-                roll_no = str(row["roll_no"]).strip()
-
-                if not email or not roll_no:
-                    skipped.append(
-                        {"row": index + 2, "reason": "Missing email or roll_no"}
-                    )
-                    continue
-
-                if User.objects.filter(email=email).exists():
-                    skipped.append(
-                        {"row": index + 2, "reason": "Email already exists"}
-                    )
-                    continue
-
-                temp_password = generate_temp_password()
-
-                user = User.objects.create_user(
-                    username=email,
-                    email=email,
-                    password=temp_password,
-                    role="STUDENT",
-                )
+        data = {
+            "students_created": result.created_count,
+            "students_skipped": result.skipped_rows,
+            "results": result.rows,
+            "email_sent": True,
+        }
+        if result.error:
+            # The rows before the unreadable part were imported
+            data["detail"] = result.error
+            return Response(data, status=status.HTTP_400_BAD_REQUEST)
 
-                StudentProfile.objects.create(
-                    user=user,
-                    teacher=teacher_profile,
-                    roll_no=roll_no,
-                    full_name=row["full_name"],
-                    phone=row["phone"],
-                    batch=row["batch"],
-                    department=row["department"],
-                )
-
-                send_credentials_email(email, temp_password)
-
-                created.append(email)
-
-        return Response(
-            {
-                "students_created": len(created),
-                "students_skipped": skipped,
-                "email_sent": True,
-            },
-            status=status.HTTP_201_CREATED,
-        )
+        return Response(data, status=status.HTTP_201_CREATED)
 
 
 
@@ -234,47 +143,11 @@ class TeacherStudentListAPIView(APIView):
                 status=status.HTTP_403_FORBIDDEN,
             )
 
-        teacher_profile = request.user.teacher_profile
-
-        students = StudentProfile.objects.filter(
-            teacher=teacher_profile
-        ).select_related("user")
-
-        total_sessions = AttendanceSession.objects.filter(
-            teacher=request.user,
-            is_active=False,
-        ).count()
-
-        student_data = []
-
-        for student in students:
-            present_count = AttendanceRecord.objects.filter(
-                student=student.user,
-                session__teacher=request.user,
-            ).count()
-
-            percentage = (
-                (present_count / total_sessions) * 100
-                if total_sessions > 0
-                else 0
-            )
-
-            student_data.append(
-                {
-                    "roll_no": student.roll_no,
-                    "full_name": student.full_name,
-                    "email": student.user.email,
-                    "batch": student.batch,
-                    "department": student.department,
-                    "present_sessions": present_count,
-                    "total_sessions": total_sessions,
-                    "attendance_percentage": round(percentage, 2),
-                }
-            )
+        student_data = roster_attendance(request.user)
 
         return Response(
             {
-                "total_students": students.count(),
+                "total_students": len(student_data),
                 "students": student_data,
             },
             status=status.HTTP_200_OK,
@@ -282,74 +155,57 @@ class TeacherStudentListAPIView(APIView):
 
 
 
+class IgnoreFormatOverrideNegotiation(BaseContentNegotiation):
+    """
+    ?format= selects the export file type here, not a DRF renderer.
+    """
+
+    def select_parser(self, request, parsers):
+        return parsers[0]
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
+
+
 class ExportAttendanceReportAPIView(APIView):
     permission_classes = [IsAuthenticated]
+    content_negotiation_class = IgnoreFormatOverrideNegotiation
 
     def get(self, request):
         if request.user.role != "TEACHER":
             return HttpResponse(status=403)
 
-        teacher = request.user
-        teacher_profile = teacher.teacher_profile
-
-        students = StudentProfile.objects.filter(
-            teacher=teacher_profile
-        ).select_related("user")
+        rows = iter_roster_attendance(request.user)
+        file_format = request.GET.get("format", "excel")
 
-        total_sessions = AttendanceSession.objects.filter(
-            teacher=teacher,
-            is_active=False,
-        ).count()
+        if file_format == "csv":
+            return csv_response(rows, "attendance_report.csv")
 
-        report_rows = []
+        return xlsx_response(rows, "attendance_report.xlsx")
 
-        for student in students:
-            present_count = AttendanceRecord.objects.filter(
-                student=student.user,
-                session__teacher=teacher,
-            ).count()
 
-            percentage = (
-                (present_count / total_sessions) * 100
-                if total_sessions > 0
-                else 0
-            )
 
-            report_rows.append(
-                {
-                    "Roll No": student.roll_no,
-                    "Full Name": student.full_name,
-                    "Email": student.user.email,
-                    "Batch": student.batch,
-                    "Department": student.department,
-                    "Present Sessions": present_count,
-                    "Total Sessions": total_sessions,
-                    "Attendance Percentage": round(percentage, 2),
-                }
-            )
+class ExportAttendanceMatrixAPIView(APIView):
+    permission_classes = [IsAuthenticated]
 
-        df = pd.DataFrame(report_rows)
-        file_format = request.GET.get("format", "excel")
+    def get(self, request):
+        if request.user.role != "TEACHER":
+            return HttpResponse(status=403)
 
-        if file_format == "csv":
-            response = HttpResponse(content_type="text/csv")
-            response["Content-Disposition"] = (
-                'attachment; filename="attendance_report.csv"'
+        try:
+            start_date, end_date = parse_date_range(request.GET)
+        except ValueError as exc:
+            return Response(
+                {"detail": str(exc)},
+                status=status.HTTP_400_BAD_REQUEST,
             )
-            df.to_csv(response, index=False)
-            return response
 
-        response = HttpResponse(
-            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
-        response["Content-Disposition"] = (
-            'attachment; filename="attendance_report.xlsx"'
-        )
+        matrix = build_attendance_matrix(request.user, start_date, end_date)
 
-        with pd.ExcelWriter(response, engine="openpyxl") as writer:
-            df.to_excel(writer, index=False, sheet_name="Attendance Report")
-
-        return response
+        return spooled_xlsx_response(
+            lambda file: write_matrix_xlsx(matrix, file),
+            "attendance_matrix.xlsx",
+        )
 
 
 
@@ -374,6 +230,9 @@ class TeacherProfileAPIView(APIView):
         if request.user.role != "TEACHER":
             return Response(status=403)
 
+        # Save only the edited fields: request.user and its profile may
+        # be a cached copy, and a full save would write stale columns
+        # (a password changed elsewhere, say) back
         user = request.user
         teacher = user.teacher_profile
 
@@ -382,8 +241,8 @@ class TeacherProfileAPIView(APIView):
             "department", teacher.department
         )
 
-        user.save()
-        teacher.save()
+        user.save(update_fields=["username"])
+        teacher.save(update_fields=["department"])
 
         return Response(
             {"detail": "Profile updated successfully"},
@@ -3,6 +3,15 @@ ASGI config for config project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The JSON API is served by gunicorn (gunicorn.conf.py, WSGI). This app
+serves the long-lived live attendance stream
+(/api/attendance/live/stream/, see apps.attendance.live_events), where
+one event loop holds every open connection instead of one thread each:
+
+    uvicorn config.asgi:application --host 0.0.0.0 --port 8001
+
+Route /api/attendance/live/stream/ to it at the proxy, with buffering off.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
 """
@@ -51,6 +51,7 @@ INSTALLED_APPS = [
     'apps.qr_attendance.apps.QRAttendanceConfig',
     'apps.reports.apps.ReportsConfig',
     'apps.notices.apps.NoticesConfig',
+    'apps.mailer.apps.MailerConfig',
     "corsheaders",
 ]
 
@@ -151,10 +152,24 @@ AUTHENTICATION_BACKENDS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.accounts.authentication.ClaimsJWTAuthentication',
     ),
 }
 
+# How long an authenticated user is cached between requests (see
+# apps.accounts.authentication); saves drop the entry straight away
+AUTH_USER_CACHE_SECONDS = int(os.getenv("AUTH_USER_CACHE_SECONDS", "60"))
+
+# Without REDIS_URL each process has its own cache, so a deactivation or
+# role change reaches the other workers only after the entries expire
+if os.getenv("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("REDIS_URL"),
+        }
+    }
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=30),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
@@ -171,6 +186,17 @@ EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD")
 
 DEFAULT_FROM_EMAIL = "Smart Attendance <itzamaanbehlim45@gmail.com>"
 
+# Outbound email queue (see apps.mailer.outbox). Each gunicorn worker
+# drains it every EMAIL_OUTBOX_POLL_SECONDS (0 disables that; run
+# `manage.py send_queued_mail --forever` instead). The rate limit is
+# per process; 0 means unlimited.
+EMAIL_OUTBOX_POLL_SECONDS = int(os.getenv("EMAIL_OUTBOX_POLL_SECONDS", "5"))
+EMAIL_OUTBOX_BATCH_SIZE = int(os.getenv("EMAIL_OUTBOX_BATCH_SIZE", "50"))
+EMAIL_OUTBOX_RATE_PER_MINUTE = int(os.getenv("EMAIL_OUTBOX_RATE_PER_MINUTE", "60"))
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv("EMAIL_OUTBOX_MAX_ATTEMPTS", "5"))
+# First retry delay; doubles on each further failure
+EMAIL_OUTBOX_RETRY_SECONDS = int(os.getenv("EMAIL_OUTBOX_RETRY_SECONDS", "60"))
+
 
 CORS_ALLOW_ALL_ORIGINS = True
 
@@ -180,6 +206,71 @@ FRONTEND_URL = "http://localhost:5173"
 
 ALLOWED_HOSTS = ["*"]
 
+# The apps' own loggers (apps.*) write to the console: background thread
+# reports at INFO, failures with their traceback. LOG_LEVEL=DEBUG also
+# shows per-request details such as image decode times and spoof scores.
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "plain": {"format": "%(asctime)s %(levelname)s %(name)s: %(message)s"},
+    },
+    "handlers": {
+        "console": {"class": "logging.StreamHandler", "formatter": "plain"},
+    },
+    "loggers": {
+        "apps": {"handlers": ["console"], "level": os.getenv("LOG_LEVEL", "INFO")},
+    },
+}
+
+# Face verification micro-batching (see apps.face_liveness.verification)
+FACE_VERIFY_MAX_BATCH_SIZE = int(os.getenv("FACE_VERIFY_MAX_BATCH_SIZE", "16"))
+FACE_VERIFY_MAX_WAIT_MS = int(os.getenv("FACE_VERIFY_MAX_WAIT_MS", "25"))
+FACE_VERIFY_MAX_QUEUE_SIZE = int(os.getenv("FACE_VERIFY_MAX_QUEUE_SIZE", "128"))
+FACE_VERIFY_TIMEOUT_SECONDS = float(os.getenv("FACE_VERIFY_TIMEOUT_SECONDS", "10"))
+
+# MiniFASNetV2 inference backend: "torch", "torchscript", "onnx" or "onnx-int8"
+SPOOF_DETECTOR_BACKEND = os.getenv("SPOOF_DETECTOR_BACKEND", "torch")
+
+# Per-process inference threads; 0 leaves the library default (gunicorn
+# workers default to cpu_count // workers, see gunicorn.conf.py)
+INFERENCE_NUM_THREADS = int(os.getenv("INFERENCE_NUM_THREADS", "0"))
+INFERENCE_NUM_INTEROP_THREADS = int(os.getenv("INFERENCE_NUM_INTEROP_THREADS", "1"))
+
+# Uploaded face frames (see apps.face_liveness.image_ingest)
+FACE_UPLOAD_MAX_BYTES = int(os.getenv("FACE_UPLOAD_MAX_BYTES", str(8 * 1024 * 1024)))
+FACE_UPLOAD_MAX_PIXELS = int(os.getenv("FACE_UPLOAD_MAX_PIXELS", str(50_000_000)))
+FACE_DECODE_TARGET_SIDE = int(os.getenv("FACE_DECODE_TARGET_SIDE", "640"))
+
+# Decoded embeddings kept per worker (see apps.face_liveness.embedding_cache)
+FACE_EMBEDDING_CACHE_SIZE = int(os.getenv("FACE_EMBEDDING_CACHE_SIZE", "10000"))
+
+# Rotating QR tokens (see apps.attendance.qr_tokens): a token is valid in
+# its own window and QR_TOKEN_SKEW_WINDOWS windows either side of it
+QR_TOKEN_WINDOW_SECONDS = int(os.getenv("QR_TOKEN_WINDOW_SECONDS", "5"))
+QR_TOKEN_SKEW_WINDOWS = int(os.getenv("QR_TOKEN_SKEW_WINDOWS", "1"))
+
+# Background clean-up in each gunicorn worker (see apps.attendance.maintenance);
+# 0 disables it, run `manage.py reap_attendance` from cron instead
+ATTENDANCE_REAPER_INTERVAL_SECONDS = int(os.getenv("ATTENDANCE_REAPER_INTERVAL_SECONDS", "60"))
+
+# Processes used to hash temporary passwords during bulk student imports
+# (see apps.accounts.passwords); 0 means one per CPU
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "0"))
+# Rows inserted per transaction by apps.teachers.bulk_import
+STUDENT_IMPORT_CHUNK_SIZE = int(os.getenv("STUDENT_IMPORT_CHUNK_SIZE", "500"))
+
+# Background report exports (see apps.reports.jobs): identical requests
+# within the TTL share one job, and finished files are deleted by the
+# reaper once the TTL has passed
+EXPORT_JOB_TTL_SECONDS = int(os.getenv("EXPORT_JOB_TTL_SECONDS", "600"))
+EXPORT_JOB_WORKERS = int(os.getenv("EXPORT_JOB_WORKERS", "2"))
+# Jobs still pending or running after this long are marked failed
+EXPORT_JOB_TIMEOUT_SECONDS = int(os.getenv("EXPORT_JOB_TIMEOUT_SECONDS", "1800"))
+# Pending or running jobs whose heartbeat is older than this are not
+# shared; the next identical request replaces them with a new job
+EXPORT_JOB_STALE_SECONDS = int(os.getenv("EXPORT_JOB_STALE_SECONDS", "90"))
+
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
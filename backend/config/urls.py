@@ -11,6 +11,7 @@ urlpatterns = [
     path("api/qr/", include("apps.qr_attendance.urls")),
     path("api/students/", include("apps.students.urls")),
     path("api/notices/", include("apps.notices.urls")),
+    path("api/reports/", include("apps.reports.urls")),
 ]
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
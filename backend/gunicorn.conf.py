@@ -0,0 +1,104 @@
+import gc
+import os
+import time
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+wsgi_app = "config.wsgi:application"
+
+# Threaded workers let concurrent attendance marks in the same process
+# share one face-verification batch instead of queueing one per worker.
+worker_class = "gthread"
+workers = int(os.getenv("GUNICORN_WORKERS", "2"))
+threads = int(os.getenv("GUNICORN_THREADS", "16"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+
+# Load Django and the face models once in the master; workers inherit
+# the weights copy-on-write instead of each calling torch.load.
+preload_app = os.getenv("GUNICORN_PRELOAD", "True") == "True"
+
+
+def memory_usage():
+    """
+    RSS / PSS / shared memory of the current process in MB (Linux only).
+    """
+    usage = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in ("Rss", "Pss", "Shared_Clean", "Shared_Dirty",
+                           "Private_Clean", "Private_Dirty"):
+                    usage[key] = int(value.split()[0]) / 1024
+    except OSError:
+        return {}
+
+    return {
+        "rss": usage.get("Rss", 0),
+        "pss": usage.get("Pss", 0),
+        "shared": usage.get("Shared_Clean", 0) + usage.get("Shared_Dirty", 0),
+        "private": usage.get("Private_Clean", 0) + usage.get("Private_Dirty", 0),
+    }
+
+
+def format_memory(usage):
+    return " ".join(f"{key}={value:.1f}MB" for key, value in usage.items())
+
+
+def when_ready(server):
+    if not preload_app:
+        return
+
+    from apps.face_liveness import model_registry
+
+    start = time.monotonic()
+    model_registry.preload()
+    elapsed = time.monotonic() - start
+
+    # Move everything allocated so far out of the GC's reach so that
+    # collections in the workers do not touch (and copy) shared pages.
+    gc.freeze()
+
+    server.log.info(
+        "Preloaded %s in %.2fs (%s)",
+        ", ".join(model_registry.loaded_models()),
+        elapsed,
+        format_memory(memory_usage()),
+    )
+
+
+def pre_fork(server, worker):
+    worker.spawned_at = time.monotonic()
+
+
+def post_fork(server, worker):
+    # Split the cores between workers so concurrent inference in several
+    # processes does not oversubscribe the CPU.
+    from anti_spoofing.backends import configure_threads
+
+    num_threads = int(os.getenv("INFERENCE_NUM_THREADS", "0"))
+    if not num_threads:
+        num_threads = max(1, (os.cpu_count() or 1) // workers)
+
+    configure_threads(
+        num_threads,
+        int(os.getenv("INFERENCE_NUM_INTEROP_THREADS", "1")),
+    )
+
+
+def post_worker_init(worker):
+    # Every worker runs the reaper; an advisory lock picks one per pass
+    from apps.attendance.maintenance import start_reaper
+
+    start_reaper()
+
+    # and drains the email outbox; SKIP LOCKED splits the messages
+    from apps.mailer.outbox import start_mailer
+
+    start_mailer()
+
+    worker.log.info(
+        "Worker %s ready in %.3fs (%s)",
+        worker.pid,
+        time.monotonic() - worker.spawned_at,
+        format_memory(memory_usage()),
+    )
@@ -0,0 +1,163 @@
+"""
+Plans of the hot attendance queries on 1M seeded AttendanceRecords,
+with and without the indexes from attendance migration 0009.
+
+Needs Postgres (the configured DB settings). A throwaway test database
+is created and dropped; the real database is never touched.
+
+Run from the backend folder:
+    python tests/attendance_index_benchmark.py
+"""
+import os
+import re
+import sys
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+import django
+
+django.setup()
+
+from django.db import connection
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from apps.accounts.models import User
+from apps.attendance.models import AttendanceRecord, AttendanceSession
+from apps.students.models import StudentProfile
+from apps.teachers.models import TeacherProfile
+
+TEACHERS = 20
+STUDENTS_PER_TEACHER = 100
+SESSIONS_PER_TEACHER = 500  # 20 x 100 x 500 = 1M records
+
+NEW_INDEXES = (
+    "att_record_session_marked",
+    "att_session_active_teacher",
+    "att_session_active_recent",
+)
+
+
+def seed():
+    now = timezone.now()
+
+    teachers = User.objects.bulk_create(
+        User(username=f"bench-teacher-{t}", password="!", role="TEACHER")
+        for t in range(TEACHERS)
+    )
+    profiles = TeacherProfile.objects.bulk_create(
+        TeacherProfile(user=teacher, department="Bench") for teacher in teachers
+    )
+
+    students = User.objects.bulk_create(
+        User(username=f"bench-student-{t}-{s}", password="!", role="STUDENT")
+        for t in range(TEACHERS)
+        for s in range(STUDENTS_PER_TEACHER)
+    )
+    StudentProfile.objects.bulk_create(
+        StudentProfile(
+            user=student,
+            teacher=profiles[i // STUDENTS_PER_TEACHER],
+            roll_no=str(i),
+            full_name=f"Student {i}",
+            phone="0",
+            batch="B",
+            department="Bench",
+        )
+        for i, student in enumerate(students)
+    )
+
+    # One active session per teacher, the rest ended
+    AttendanceSession.objects.bulk_create(
+        AttendanceSession(
+            teacher=teacher,
+            subject=f"Subject {n % 5}",
+            duration_minutes=10,
+            end_time=now - timedelta(days=SESSIONS_PER_TEACHER - n) + timedelta(minutes=10),
+            is_active=n == SESSIONS_PER_TEACHER - 1,
+        )
+        for teacher in teachers
+        for n in range(SESSIONS_PER_TEACHER)
+    )
+
+    with connection.cursor() as cursor:
+        # start_time is auto_now_add, so bulk_create stamped every row with now
+        cursor.execute("""
+            UPDATE attendance_attendancesession
+            SET start_time = end_time - interval '10 minutes'
+        """)
+        cursor.execute("""
+            INSERT INTO attendance_attendancerecord (student_id, session_id, method, marked_at)
+            SELECT sp.user_id,
+                   s.id,
+                   CASE WHEN random() < 0.5 THEN 'FACE' ELSE 'QR' END,
+                   s.start_time + random() * interval '10 minutes'
+            FROM attendance_attendancesession s
+            JOIN teachers_teacherprofile tp ON tp.user_id = s.teacher_id
+            JOIN students_studentprofile sp ON sp.teacher_id = tp.id
+        """)
+        cursor.execute("VACUUM ANALYZE")
+
+    return teachers[0], students[0]
+
+
+def hot_queries(teacher, student):
+    session = AttendanceSession.objects.get(teacher=teacher, is_active=True)
+
+    return {
+        "active session for teacher": AttendanceSession.objects.filter(
+            teacher=teacher, is_active=True
+        ),
+        "latest active session": AttendanceSession.objects.filter(
+            is_active=True
+        ).order_by("-start_time")[:1],
+        "session roster": AttendanceRecord.objects.filter(
+            session=session
+        ).order_by("marked_at").values_list("id", "student_id", "method", "marked_at"),
+        # Same scan as live_events.session_progress(), which aggregates
+        "live progress": AttendanceRecord.objects.filter(
+            session=session
+        ).values("session").annotate(count=Count("id"), last_id=Max("id")),
+        "student history with teacher": AttendanceRecord.objects.filter(
+            student=student, session__teacher=teacher
+        ),
+    }
+
+
+def report(title, queries):
+    print(f"\n=== {title} ===")
+    for name, query in queries.items():
+        plan = query.explain(analyze=True, buffers=True)
+        execution = re.search(r"Execution Time: ([\d.]+) ms", plan)
+        print(f"\n-- {name}: {execution.group(1) if execution else '?'} ms")
+        print("\n".join(line for line in plan.splitlines() if "Time:" not in line))
+
+
+def main():
+    if connection.vendor != "postgresql":
+        sys.exit("This benchmark needs Postgres")
+
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+
+    try:
+        print(f"Seeding {TEACHERS * STUDENTS_PER_TEACHER * SESSIONS_PER_TEACHER:,} records...")
+        teacher, student = seed()
+        queries = hot_queries(teacher, student)
+
+        report("with 0009 indexes", queries)
+
+        with connection.cursor() as cursor:
+            for index in NEW_INDEXES:
+                cursor.execute(f"DROP INDEX {index}")
+            cursor.execute("ANALYZE")
+
+        report("without 0009 indexes", queries)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == "__main__":
+    main()
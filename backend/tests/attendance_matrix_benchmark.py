@@ -0,0 +1,84 @@
+"""
+Attendance matrix export: pivot and XLSX write time for a synthetic
+1000 students x 200 sessions term (apps.reports.matrix), against the
+naive per-student/per-session lookup the pivot replaces.
+
+Rows are synthetic so only the pivot and the workbook are measured,
+not the DB.
+
+Run from the backend folder:
+    python tests/attendance_matrix_benchmark.py
+"""
+import io
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from django.conf import settings
+
+settings.configure(USE_TZ=True, TIME_ZONE="UTC")
+
+from apps.reports.matrix import pivot_attendance, write_matrix_xlsx
+
+STUDENTS = 1000
+SESSIONS = 200
+SUBJECTS = ("Maths", "Physics", "Chemistry", "Biology", "English")
+ATTENDANCE = 0.8
+
+
+def synthetic_term(seed=0):
+    rng = random.Random(seed)
+    start = datetime(2026, 1, 5, 9, tzinfo=dt_timezone.utc)
+
+    students = [(10_000 + i, f"R{i:05d}", f"Student {i}") for i in range(STUDENTS)]
+    sessions = [
+        (50_000 + j, SUBJECTS[j % len(SUBJECTS)], start + timedelta(hours=j))
+        for j in range(SESSIONS)
+    ]
+    records = [
+        (student_id, session_id, rng.choice(("FACE", "QR")))
+        for student_id, _, _ in students
+        for session_id, _, _ in sessions
+        if rng.random() < ATTENDANCE
+    ]
+    rng.shuffle(records)
+
+    return students, sessions, records
+
+
+def naive_pivot(students, sessions, records):
+    marked = {(student_id, session_id): method for student_id, session_id, method in records}
+    return [
+        [marked.get((student_id, session_id), "A") for session_id, _, _ in sessions]
+        for student_id, _, _ in students
+    ]
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    students, sessions, records = synthetic_term()
+    print(f"{STUDENTS} students x {SESSIONS} sessions, {len(records)} records\n")
+
+    _, naive_ms = timed(naive_pivot, students, sessions, records)
+    matrix, pivot_ms = timed(pivot_attendance, students, sessions, records)
+
+    buffer = io.BytesIO()
+    _, write_ms = timed(write_matrix_xlsx, matrix, buffer)
+
+    print(f"{'dict pivot':<16} {naive_ms:>9.1f} ms")
+    print(f"{'numpy pivot':<16} {pivot_ms:>9.1f} ms")
+    print(f"{'xlsx write':<16} {write_ms:>9.1f} ms  ({buffer.tell() / 1024:.0f} KB, {len(matrix.subjects())} sheets)")
+    print(f"{'pivot + write':<16} {pivot_ms + write_ms:>9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
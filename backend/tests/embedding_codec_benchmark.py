@@ -0,0 +1,37 @@
+"""
+Row size and decode cost: pickled float64 ndarray vs the float32
+embedding codec stored in User.face_embedding.
+
+Run from the backend folder:
+    python tests/embedding_codec_benchmark.py
+"""
+import os
+import pickle
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from apps.face_liveness.embedding_codec import encode_embedding, decode_embedding
+
+NUMBER = 100_000
+
+embedding = np.random.default_rng(0).normal(scale=0.1, size=128)
+
+pickled = pickle.dumps(embedding)
+encoded = encode_embedding(embedding)
+
+# psycopg2 hands BinaryField values back as memoryview
+pickled_view = memoryview(pickled)
+encoded_view = memoryview(encoded)
+
+pickle_time = timeit.timeit(lambda: pickle.loads(pickled_view), number=NUMBER) / NUMBER
+codec_time = timeit.timeit(lambda: decode_embedding(encoded_view), number=NUMBER) / NUMBER
+
+max_error = np.abs(decode_embedding(encoded) - embedding).max()
+
+print(f"pickle : {len(pickled):5d} bytes  decode {pickle_time * 1e6:6.2f} us")
+print(f"float32: {len(encoded):5d} bytes  decode {codec_time * 1e6:6.2f} us")
+print(f"size ratio {len(encoded) / len(pickled):.2f}  max abs error {max_error:.2e}")
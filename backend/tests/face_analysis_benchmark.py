@@ -0,0 +1,58 @@
+"""
+Per-mark CPU time: separate full-frame spoof check + full detection in
+the encoder, vs the single-pass face_analysis pipeline.
+
+Run from the backend folder:
+    python tests/face_analysis_benchmark.py [image]
+"""
+import os
+import sys
+import time
+
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from anti_spoofing.spoof_detector import SpoofDetector
+from apps.face_liveness.face_analysis import analyze_face
+from apps.face_liveness.face_matcher import FaceMatcher
+
+IMAGE_PATH = sys.argv[1] if len(sys.argv) > 1 else "WhatsApp Image 2026-01-09 at 11.59.22 AM.jpeg"
+REPEATS = 10
+
+img = cv2.imread(IMAGE_PATH)
+if img is None:
+    sys.exit(f"Could not read {IMAGE_PATH}")
+
+spoof_detector = SpoofDetector()
+face_matcher = FaceMatcher()
+spoof_detector.load()
+face_matcher.load()
+
+
+def separate_passes():
+    spoof_detector.spoof_scores([img])
+    face_matcher.get_embedding(img)
+
+
+def single_pass():
+    analysis = analyze_face(img)
+    if analysis is None:
+        return
+    spoof_detector.spoof_scores([analysis.spoof_crop])
+    face_matcher.get_embedding_for(analysis)
+
+
+def cpu_ms(fn):
+    fn()
+    start = time.process_time()
+    for _ in range(REPEATS):
+        fn()
+    return (time.process_time() - start) / REPEATS * 1000
+
+
+print(f"image {img.shape[1]}x{img.shape[0]}")
+before = cpu_ms(separate_passes)
+after = cpu_ms(single_pass)
+print(f"separate passes: {before:8.1f} ms CPU / mark")
+print(f"single pass    : {after:8.1f} ms CPU / mark  ({after / before:.0%})")
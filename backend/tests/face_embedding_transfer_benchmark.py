@@ -0,0 +1,157 @@
+"""
+Bytes read from the database by the roster-sized User queries of the
+non-face endpoints, with face_embedding selected (as before the User
+manager deferred it) and deferred (now), for 1,000 students who all
+have a registered face.
+
+"Bytes" is the size of the values the driver hands back (blob length,
+UTF-8 text length, 8 per number/date), which tracks what crosses the
+wire closely enough to compare the two. Each query is also timed,
+including building the model instances.
+
+A throwaway test database is created and dropped; the real database is
+never touched. --dim sets the embedding size (default 128, the current
+face model; 512-d models store 2 KB per face).
+
+Run from the backend folder:
+    python tests/face_embedding_transfer_benchmark.py [--dim 512]
+"""
+import os
+import sys
+import time
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+import django
+
+django.setup()
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.utils import timezone
+
+from apps.attendance.models import AttendanceRecord, AttendanceSession
+from apps.face_liveness.embedding_codec import encode_embedding
+from apps.students.models import StudentProfile
+
+User = get_user_model()
+
+STUDENTS = 1_000
+REPEATS = 5
+
+
+def value_size(value):
+    if value is None:
+        return 0
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value.encode())
+    return 8
+
+
+def transfer(queryset):
+    """
+    Bytes of the rows the query returns, read with a raw cursor.
+    """
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return sum(value_size(value) for row in cursor.fetchall() for value in row)
+
+
+def timed(queryset):
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        list(queryset.all())
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def seed(dim):
+    rng = np.random.default_rng(0)
+    teacher = User.objects.create_user(
+        username="bench-teacher", password="x", role="TEACHER"
+    )
+    session = AttendanceSession.objects.create(
+        teacher=teacher,
+        subject="Maths",
+        duration_minutes=60,
+        end_time=timezone.now() + timedelta(hours=1),
+    )
+
+    users = User.objects.bulk_create(
+        User(
+            username=f"student{n}@example.com",
+            email=f"student{n}@example.com",
+            password="!",
+            role="STUDENT",
+            face_embedding=encode_embedding(rng.standard_normal(dim)),
+            face_embedding_version=1,
+        )
+        for n in range(STUDENTS)
+    )
+    StudentProfile.objects.bulk_create(
+        StudentProfile(
+            user=user,
+            teacher=teacher.teacher_profile,
+            roll_no=str(n),
+            full_name=f"Student {n}",
+            phone="9800000000",
+            batch="2026",
+            department="Computer Science",
+        )
+        for n, user in enumerate(users)
+    )
+    AttendanceRecord.objects.bulk_create(
+        AttendanceRecord(student=user, session=session, method="FACE")
+        for user in users
+    )
+    return session
+
+
+def main():
+    dim = int(sys.argv[sys.argv.index("--dim") + 1]) if "--dim" in sys.argv else 128
+
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+
+    try:
+        session = seed(dim)
+        records = (
+            AttendanceRecord.objects
+            .filter(session=session)
+            .select_related("student__student_profile")
+        )
+
+        cases = [
+            (
+                "students (User.objects)",
+                User.objects.defer(None).filter(role="STUDENT"),
+                User.objects.filter(role="STUDENT"),
+            ),
+            (
+                "live snapshot records",
+                records,
+                records.defer("student__face_embedding"),
+            ),
+        ]
+
+        print(f"{STUDENTS} students, {dim}-d embeddings ({len(encode_embedding(np.zeros(dim)))} B each)\n")
+        print(f"{'query':<26} {'selected':>12} {'deferred':>12} {'saved':>7}")
+        for label, selected, deferred in cases:
+            before, after = transfer(selected), transfer(deferred)
+            print(f"{label:<26} {before / 1024:>9.0f} KB {after / 1024:>9.0f} KB "
+                  f"{1 - after / before:>6.0%}")
+            print(f"{'':<26} {timed(selected) * 1000:>9.1f} ms "
+                  f"{timed(deferred) * 1000:>9.1f} ms")
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == "__main__":
+    main()
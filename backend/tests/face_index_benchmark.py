@@ -0,0 +1,37 @@
+"""
+Latency of a 1:N FaceIndex search at increasing roster sizes.
+
+Run from the backend folder:
+    python tests/face_index_benchmark.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+from apps.face_liveness.face_index import FaceIndex
+
+REPEATS = 1000
+rng = np.random.default_rng(0)
+
+for size in (100, 1_000, 10_000, 50_000):
+    embeddings = rng.normal(scale=0.1, size=(size, 128))
+    index = FaceIndex(np.arange(size), embeddings)
+
+    # Probe near a known row so the expected answer is checkable
+    probe = embeddings[size // 2] + rng.normal(scale=0.01, size=128)
+
+    index.search(probe)
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        top = index.search(probe, k=5)
+    elapsed = (time.perf_counter() - start) / REPEATS
+
+    brute = np.linalg.norm(embeddings - probe, axis=1).argmin()
+    assert top[0][0] == brute, (top[0], brute)
+
+    print(f"{size:>6} faces: {elapsed * 1e6:8.1f} us/search  top1={top[0]}")
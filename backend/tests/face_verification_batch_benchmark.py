@@ -0,0 +1,75 @@
+"""
+Burst benchmark for FaceVerificationService.
+
+Fires CLIENTS concurrent "students" at the service and reports
+throughput and p50/p99 latency, with and without micro-batching.
+
+Run from the backend folder:
+    python tests/face_verification_batch_benchmark.py
+"""
+import os
+import sys
+import time
+import threading
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from anti_spoofing.spoof_detector import SpoofDetector
+from apps.face_liveness.face_matcher import FaceMatcher
+from apps.face_liveness.verification import FaceVerificationService
+
+IMAGE_PATH = "WhatsApp Image 2026-01-09 at 11.59.22 AM.jpeg"
+CLIENTS = 200
+
+img = cv2.imread(IMAGE_PATH)
+if img is None:
+    img = np.random.randint(0, 255, (480, 640, 3), dtype=np.uint8)
+
+spoof_detector = SpoofDetector()
+face_matcher = FaceMatcher()
+
+
+def run_burst(max_batch_size, max_wait_ms):
+    service = FaceVerificationService(
+        spoof_detector,
+        face_matcher,
+        max_batch_size=max_batch_size,
+        max_wait_ms=max_wait_ms,
+        max_queue_size=CLIENTS,
+        timeout_seconds=600,
+    )
+    latencies = []
+    lock = threading.Lock()
+
+    def client():
+        start = time.perf_counter()
+        service.verify(img)
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+
+    threads = [threading.Thread(target=client) for _ in range(CLIENTS)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    total = time.perf_counter() - start
+
+    lat = np.array(latencies) * 1000
+    print(
+        f"batch={max_batch_size:>3} wait={max_wait_ms:>3}ms  "
+        f"throughput={CLIENTS / total:7.1f} img/s  "
+        f"p50={np.percentile(lat, 50):8.1f}ms  "
+        f"p99={np.percentile(lat, 99):8.1f}ms"
+    )
+
+
+# Warm up torch before timing
+spoof_detector.spoof_scores([img])
+
+for batch_size, wait_ms in [(1, 0), (8, 10), (16, 25), (32, 50)]:
+    run_burst(batch_size, wait_ms)
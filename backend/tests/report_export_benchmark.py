@@ -0,0 +1,107 @@
+"""
+Attendance report export: time to first byte, total time and peak
+Python memory of the old pandas/HttpResponse export against the
+streaming CSV and write-only XLSX exports (apps.reports.exports).
+
+Rows are synthetic so only the export path is measured, not the DB.
+
+Run from the backend folder:
+    python tests/report_export_benchmark.py
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from django.conf import settings
+
+settings.configure(DEFAULT_CHARSET="utf-8")
+
+import pandas as pd
+from django.http import HttpResponse
+
+from apps.reports.exports import REPORT_COLUMNS, XLSX_CONTENT_TYPE, csv_response, xlsx_response
+
+SIZES = (1_000, 10_000, 100_000)
+
+
+def rows(count):
+    for i in range(count):
+        yield {
+            "roll_no": f"R{i:06d}",
+            "full_name": f"Student Number {i}",
+            "email": f"student{i}@example.com",
+            "batch": "2026",
+            "department": "Computer Science",
+            "present_sessions": i % 40,
+            "total_sessions": 40,
+            "attendance_percentage": round(i % 40 / 40 * 100, 2),
+        }
+
+
+def pandas_csv(count):
+    df = pd.DataFrame([
+        {header: row[key] for header, key in REPORT_COLUMNS} for row in rows(count)
+    ])
+    response = HttpResponse(content_type="text/csv")
+    df.to_csv(response, index=False)
+    return response
+
+
+def pandas_xlsx(count):
+    df = pd.DataFrame([
+        {header: row[key] for header, key in REPORT_COLUMNS} for row in rows(count)
+    ])
+    response = HttpResponse(content_type=XLSX_CONTENT_TYPE)
+    with pd.ExcelWriter(response, engine="openpyxl") as writer:
+        df.to_excel(writer, index=False, sheet_name="Attendance Report")
+    return response
+
+
+def measure(build, count):
+    """
+    Build the response and drain it like a WSGI server would.
+    Returns (ttfb ms, total ms, peak MB, bytes).
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+
+    response = build(count)
+    chunks = iter(response)
+    first = next(chunks)
+    ttfb = time.perf_counter() - start
+
+    size = len(first)
+    for chunk in chunks:
+        size += len(chunk)
+    response.close()
+
+    total = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return ttfb * 1000, total * 1000, peak / 1024 / 1024, size
+
+
+MODES = {
+    "csv   pandas": pandas_csv,
+    "csv   stream": lambda count: csv_response(rows(count), "report.csv"),
+    "xlsx  pandas": pandas_xlsx,
+    "xlsx  write-only": lambda count: xlsx_response(rows(count), "report.xlsx"),
+}
+
+
+def main():
+    print(f"{'mode':<18} {'rows':>8} {'ttfb ms':>10} {'total ms':>10} {'peak MB':>9} {'size KB':>9}")
+
+    for count in SIZES:
+        for name, build in MODES.items():
+            ttfb, total, peak, size = measure(build, count)
+            print(f"{name:<18} {count:>8} {ttfb:>10.1f} {total:>10.1f} {peak:>9.1f} {size / 1024:>9.0f}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Roster upload parsing: time and peak Python memory of
+pandas.read_excel (the old upload path) against the streaming
+apps.teachers.roster reader for xlsx and CSV sheets of growing size.
+
+Only parsing is measured; rows are consumed and dropped as a chunked
+import would.
+
+Run from the backend folder:
+    python tests/roster_ingest_benchmark.py
+"""
+import csv
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+from openpyxl import Workbook
+
+from apps.teachers.roster import STUDENT_COLUMNS, read_roster
+
+SIZES = (1_000, 10_000, 50_000)
+
+
+def sheet_rows(count):
+    yield list(STUDENT_COLUMNS)
+    for n in range(count):
+        yield [str(n), f"Student {n}", f"student{n}@example.com", 9800000000 + n, "2026", "Computer Science"]
+
+
+def xlsx_file(count):
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Students")
+    for row in sheet_rows(count):
+        sheet.append(row)
+
+    file = io.BytesIO()
+    workbook.save(file)
+    file.seek(0)
+    file.name = "students.xlsx"
+    return file
+
+
+def csv_file(count):
+    text = io.StringIO()
+    csv.writer(text).writerows(sheet_rows(count))
+
+    file = io.BytesIO(text.getvalue().encode())
+    file.name = "students.csv"
+    return file
+
+
+def pandas_rows(file):
+    return enumerate(pd.read_excel(file).to_dict("records"), 2)
+
+
+def measure(parse, file):
+    tracemalloc.start()
+    start = time.perf_counter()
+
+    count = sum(1 for _ in parse(file))
+
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return count, elapsed, peak / 1024 / 1024
+
+
+MODES = {
+    "xlsx  pandas": (pandas_rows, xlsx_file),
+    "xlsx  streaming": (read_roster, xlsx_file),
+    "csv   streaming": (read_roster, csv_file),
+}
+
+
+def main():
+    print(f"{'mode':<18} {'rows':>8} {'seconds':>9} {'peak MB':>9}")
+
+    for count in SIZES:
+        for name, (parse, make_file) in MODES.items():
+            file = make_file(count)
+            rows, elapsed, peak = measure(parse, file)
+            assert rows == count, (name, rows)
+            print(f"{name:<18} {count:>8} {elapsed:>9.2f} {peak:>9.1f}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
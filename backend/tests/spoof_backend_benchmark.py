@@ -0,0 +1,48 @@
+"""
+Per-image and batched latency of each spoof inference backend.
+
+Run from the backend folder:
+    python tests/spoof_backend_benchmark.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from anti_spoofing.backends import BACKENDS, load_backend, preprocess
+
+REPEATS = 50
+BATCH_SIZES = (1, 8, 32)
+
+rng = np.random.default_rng(0)
+crops = [rng.integers(0, 255, (80, 80, 3), dtype=np.uint8) for _ in range(max(BATCH_SIZES))]
+
+
+def timed(fn):
+    fn()
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        fn()
+    return (time.perf_counter() - start) / REPEATS * 1000
+
+
+pre_ms = timed(lambda: preprocess(crops[:1]))
+print(f"numpy preprocess: {pre_ms:.3f} ms/image\n")
+
+print(f"{'backend':<12}" + "".join(f"{f'batch={n}':>22}" for n in BATCH_SIZES))
+for name in sorted(BACKENDS):
+    try:
+        backend = load_backend(name)
+    except (ImportError, FileNotFoundError) as exc:
+        print(f"{name:<12} skipped: {exc}")
+        continue
+
+    cells = []
+    for n in BATCH_SIZES:
+        batch = preprocess(crops[:n])
+        ms = timed(lambda: backend.run(batch))
+        cells.append(f"{ms:7.2f}ms ({ms / n:5.2f}/img)")
+    print(f"{name:<12}" + "".join(f"{cell:>22}" for cell in cells))
@@ -0,0 +1,118 @@
+"""
+Throughput matrix (workers x threads x fp32/int8) for the spoof model,
+plus score drift of int8 against fp32 on held-out frames.
+
+Each worker is a separate process with its own thread setting, like a
+gunicorn worker. Build the int8 model first with anti_spoofing.quantize.
+
+Run from the backend folder:
+    python tests/spoof_quantization_benchmark.py [--frames held_out_crops/]
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from anti_spoofing.backends import configure_threads, load_backend, preprocess, softmax
+from anti_spoofing.quantize import load_calibration_images
+
+DURATION = 3.0
+BATCH_SIZE = 8
+WORKERS = (1, 2, 4)
+THREADS = (1, 2, 4)
+MODES = {"fp32": "onnx", "int8": "onnx-int8"}
+THRESHOLD = 0.2
+
+
+def worker(backend_name, num_threads, start_at, result_queue):
+    configure_threads(num_threads, 1)
+    backend = load_backend(backend_name)
+
+    rng = np.random.default_rng(os.getpid())
+    batch = preprocess([rng.integers(0, 255, (80, 80, 3), dtype=np.uint8)
+                        for _ in range(BATCH_SIZE)])
+    backend.run(batch)
+
+    while time.time() < start_at:
+        time.sleep(0.001)
+
+    done = 0
+    while time.time() < start_at + DURATION:
+        backend.run(batch)
+        done += BATCH_SIZE
+
+    result_queue.put(done)
+
+
+def throughput(backend_name, workers, num_threads):
+    ctx = multiprocessing.get_context("fork")
+    results = ctx.Queue()
+    start_at = time.time() + 2.0
+
+    procs = [
+        ctx.Process(target=worker, args=(backend_name, num_threads, start_at, results))
+        for _ in range(workers)
+    ]
+    for proc in procs:
+        proc.start()
+    total = sum(results.get() for _ in procs)
+    for proc in procs:
+        proc.join()
+
+    return total / DURATION
+
+
+def drift(frames):
+    fp32 = load_backend(MODES["fp32"])
+    int8 = load_backend(MODES["int8"])
+
+    batch = preprocess(frames)
+    ref = softmax(fp32.run(batch))[:, 1]
+    quant = softmax(int8.run(batch))[:, 1]
+
+    diff = np.abs(ref - quant)
+    agree = np.mean((ref < THRESHOLD) == (quant < THRESHOLD))
+    print(
+        f"\nint8 drift over {len(frames)} frames: mean {diff.mean():.4f}  "
+        f"max {diff.max():.4f}  decision agreement {agree:.1%}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", help="folder of held-out face crops")
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPUs, batch {BATCH_SIZE}, {DURATION:.0f}s per cell\n")
+    print(f"{'workers':>7} {'threads':>7}" + "".join(f"{mode:>14}" for mode in MODES))
+
+    for workers in WORKERS:
+        for num_threads in THREADS:
+            cells = []
+            for backend_name in MODES.values():
+                try:
+                    cells.append(f"{throughput(backend_name, workers, num_threads):9.0f} img/s")
+                except FileNotFoundError:
+                    cells.append(f"{'missing':>14}")
+            print(f"{workers:>7} {num_threads:>7}" + "".join(f"{c:>14}" for c in cells))
+
+    if args.frames:
+        frames = load_calibration_images(args.frames)
+    else:
+        print("\nNo --frames given; drift is measured on synthetic crops")
+        rng = np.random.default_rng(1)
+        frames = [rng.integers(0, 255, (80, 80, 3), dtype=np.uint8) for _ in range(64)]
+
+    try:
+        drift(frames)
+    except FileNotFoundError as exc:
+        print(f"\nSkipping drift: {exc}")
+
+
+if __name__ == "__main__":
+    main()
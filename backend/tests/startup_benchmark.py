@@ -0,0 +1,72 @@
+"""
+Startup benchmark: django.setup() + URL resolution, with and without the
+face stack (torch / cv2 / face_recognition + model weights) loaded.
+
+Each scenario runs in a fresh interpreter so import caches do not leak
+between runs. Run from the backend folder:
+    python tests/startup_benchmark.py
+"""
+import json
+import os
+import subprocess
+import sys
+
+RUNS = 3
+
+CHILD = r"""
+import json, os, resource, sys, time
+
+start = time.perf_counter()
+
+import django
+django.setup()
+
+from django.urls import get_resolver, resolve
+
+resolver = get_resolver()
+resolver.url_patterns  # imports every app's urls.py and views.py
+for path in ["/api/accounts/login/", "/api/notices/teacher/", "/api/attendance/mark/"]:
+    resolve(path)
+
+setup_time = time.perf_counter() - start
+
+if sys.argv[1] == "face":
+    from apps.face_liveness import model_registry
+    model_registry.preload()
+
+total_time = time.perf_counter() - start
+
+print(json.dumps({
+    "setup": setup_time,
+    "total": total_time,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "torch_imported": "torch" in sys.modules,
+    "cv2_imported": "cv2" in sys.modules,
+    "face_recognition_imported": "face_recognition" in sys.modules,
+}))
+"""
+
+
+def run(scenario):
+    env = dict(os.environ)
+    env.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [os.getcwd(), env.get("PYTHONPATH")])
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD, scenario],
+        capture_output=True, text=True, env=env, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+for scenario in ("web", "face"):
+    results = [run(scenario) for _ in range(RUNS)]
+    best = min(results, key=lambda r: r["total"])
+    print(
+        f"{scenario:>4}: setup+urls={best['setup'] * 1000:7.0f}ms  "
+        f"total={best['total'] * 1000:7.0f}ms  "
+        f"max_rss={best['max_rss_mb']:6.0f}MB  "
+        f"torch={best['torch_imported']} cv2={best['cv2_imported']} "
+        f"face_recognition={best['face_recognition_imported']}"
+    )
@@ -0,0 +1,144 @@
+"""
+Bulk student import of a 5,000-row sheet: the old per-row path
+(exists() + create_user + StudentProfile.create per row, one
+transaction) against apps.teachers.bulk_import.
+
+Password hashing dominates both (PBKDF2 costs a fifth of a second per
+password), so it is measured on its own, serially and in the process
+pool, and the import itself is timed with a cheap hasher to compare the
+database work. Pass --full to also run the new import with the real
+hasher end to end.
+
+A throwaway test database is created and dropped; the real database is
+never touched. Emails are not sent.
+
+Run from the backend folder:
+    python tests/student_import_benchmark.py [--full]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+import django
+
+django.setup()
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test.utils import override_settings
+
+from apps.accounts.passwords import make_passwords
+from apps.students.models import StudentProfile
+from apps.teachers.bulk_import import import_students
+from apps.teachers.credentials import generate_temp_password
+
+User = get_user_model()
+
+ROWS = 5_000
+HASH_SAMPLE = 64
+
+CHEAP_HASHER = override_settings(
+    PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+    PASSWORD_HASH_WORKERS=1,
+)
+
+
+def sheet(prefix):
+    return [
+        (
+            n + 2,
+            {
+                "roll_no": f"{prefix}{n}",
+                "full_name": f"Student {n}",
+                "email": f"{prefix}{n}@example.com",
+                "phone": 9800000000 + n,
+                "batch": "2026",
+                "department": "Computer Science",
+            },
+        )
+        for n in range(ROWS)
+    ]
+
+
+def per_row_import(teacher_profile, rows):
+    """
+    The import as BulkStudentUploadAPIView did it before bulk_import.
+    """
+    with transaction.atomic():
+        for _, row in rows:
+            email = str(row["email"]).strip().lower()
+            if User.objects.filter(email=email).exists():
+                continue
+
+            user = User.objects.create_user(
+                username=email,
+                email=email,
+                password=generate_temp_password(),
+                role="STUDENT",
+            )
+            StudentProfile.objects.create(
+                user=user,
+                teacher=teacher_profile,
+                roll_no=str(row["roll_no"]).strip(),
+                full_name=row["full_name"],
+                phone=row["phone"],
+                batch=row["batch"],
+                department=row["department"],
+            )
+
+
+def timed(label, fn, *args):
+    queries = 0
+
+    def count(execute, sql, params, many, context):
+        nonlocal queries
+        queries += 1
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    with connection.execute_wrapper(count):
+        fn(*args)
+    elapsed = time.perf_counter() - start
+
+    print(f"{label:<34} {elapsed:>9.2f} s {queries:>8} queries")
+    return elapsed
+
+
+def main():
+    full = "--full" in sys.argv
+
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+
+    try:
+        teacher = User.objects.create_user(
+            username="bench-teacher", password="x", role="TEACHER"
+        )
+        teacher_profile = teacher.teacher_profile
+
+        passwords = [generate_temp_password() for _ in range(HASH_SAMPLE)]
+        workers = settings.PASSWORD_HASH_WORKERS or os.cpu_count() or 1
+        print(f"Password hashing, {HASH_SAMPLE} passwords ({workers} workers, {os.cpu_count()} CPUs):")
+        serial = timed("  serial", make_passwords, passwords, 1)
+        pooled = timed("  process pool", make_passwords, passwords)
+        print(f"  -> {ROWS} passwords: ~{serial / HASH_SAMPLE * ROWS:.0f} s serial, "
+              f"~{pooled / HASH_SAMPLE * ROWS:.0f} s pooled\n")
+
+        print(f"Import of {ROWS} rows with a cheap hasher:")
+        with CHEAP_HASHER:
+            timed("  per row (old)", per_row_import, teacher_profile, sheet("old"))
+            timed("  bulk_import", import_students, teacher_profile, sheet("new"))
+
+        if full:
+            print(f"\nImport of {ROWS} rows with the configured hasher:")
+            timed("  bulk_import", import_students, teacher_profile, sheet("full"))
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Spoof-score parity between the reference eager PyTorch + torchvision
+pipeline and every inference backend with NumPy preprocessing.
+
+Run from the backend folder:
+    python -m pytest tests/test_spoof_backend_parity.py
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from anti_spoofing.backends import (
+    build_model,
+    load_backend,
+    preprocess,
+    softmax,
+)
+
+TOLERANCE = 1e-4
+
+
+def face_crops(count=8, size=(80, 80)):
+    rng = np.random.default_rng(0)
+    # Smooth, face-sized gradients rather than pure noise
+    base = np.linspace(0, 255, size[0] * size[1] * 3).reshape(size[1], size[0], 3)
+    return [
+        np.clip(base + rng.normal(scale=20, size=base.shape), 0, 255).astype(np.uint8)
+        for _ in range(count)
+    ]
+
+
+def reference_scores(face_imgs):
+    import cv2
+    import torch
+    from PIL import Image
+    from torchvision import transforms
+
+    transform = transforms.Compose([
+        transforms.Resize((80, 80)),
+        transforms.ToTensor(),
+        transforms.Normalize(mean=[0.5, 0.5, 0.5], std=[0.5, 0.5, 0.5]),
+    ])
+    batch = torch.stack([
+        transform(Image.fromarray(cv2.cvtColor(img, cv2.COLOR_BGR2RGB)))
+        for img in face_imgs
+    ])
+
+    with torch.no_grad():
+        probs = torch.softmax(build_model()(batch), dim=1)
+
+    return probs[:, 1].numpy()
+
+
+def test_numpy_preprocess_matches_torchvision():
+    pytest.importorskip("torchvision")
+    import cv2
+    from PIL import Image
+    from torchvision import transforms
+
+    img = face_crops(count=1)[0]
+    expected = transforms.Normalize([0.5] * 3, [0.5] * 3)(
+        transforms.ToTensor()(Image.fromarray(cv2.cvtColor(img, cv2.COLOR_BGR2RGB)))
+    ).numpy()
+
+    np.testing.assert_allclose(preprocess([img])[0], expected, atol=1e-6)
+
+
+# onnx-int8 is lossy by design; its drift is measured by
+# tests/spoof_quantization_benchmark.py instead
+@pytest.mark.parametrize("name", ["torch", "torchscript", "onnx"])
+def test_backend_scores_match_reference(name):
+    if name == "onnx":
+        pytest.importorskip("onnxruntime")
+
+    crops = face_crops()
+    expected = reference_scores(crops)
+
+    backend = load_backend(name)
+    batched = softmax(backend.run(preprocess(crops)))[:, 1]
+    single = np.array([
+        softmax(backend.run(preprocess([crop])))[0, 1] for crop in crops
+    ])
+
+    np.testing.assert_allclose(batched, expected, atol=TOLERANCE)
+    np.testing.assert_allclose(single, expected, atol=TOLERANCE)
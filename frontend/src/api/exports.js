@@ -0,0 +1,44 @@
+import api from "./axios";
+
+const POLL_INTERVAL_MS = 1000;
+
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
+/*
+  Build a report on the server (reports/exports/) and download it.
+  The server builds the file in the background; poll the job until it
+  is done, reporting progress (0-100) along the way.
+*/
+export async function runExport({ kind = "report", format = "xlsx", start, end, onProgress }) {
+  let { data: job } = await api.post("reports/exports/", { kind, format, start, end });
+
+  while (job.status === "PENDING" || job.status === "RUNNING") {
+    onProgress?.(job.progress);
+    await sleep(POLL_INTERVAL_MS);
+    ({ data: job } = await api.get(`reports/exports/${job.id}/`));
+  }
+
+  if (job.status !== "DONE") {
+    throw new Error(job.error || "Export failed");
+  }
+  onProgress?.(100);
+
+  const response = await api.get(`reports/exports/${job.id}/download/`, {
+    responseType: "blob",
+  });
+
+  const filename =
+    response.headers["content-disposition"]?.match(/filename="(.+)"/)?.[1] ||
+    `attendance_${kind}.${format}`;
+
+  const url = window.URL.createObjectURL(response.data);
+  const link = document.createElement("a");
+
+  link.href = url;
+  link.download = filename;
+  document.body.appendChild(link);
+  link.click();
+
+  link.remove();
+  window.URL.revokeObjectURL(url);
+}
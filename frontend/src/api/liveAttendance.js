@@ -0,0 +1,130 @@
+import api from "./axios";
+
+const RECONNECT_DELAY_MS = 3000;
+const POLL_INTERVAL_MS = 3000;
+
+// The stream is served by the ASGI process (see backend/config/asgi.py);
+// point this at it when it is not routed under the API's own origin.
+const STREAM_URL =
+  import.meta.env.VITE_LIVE_STREAM_URL || `${api.defaults.baseURL}attendance/live/stream/`;
+
+/*
+  Subscribe to attendance/live/stream/ (server-sent events).
+  EventSource cannot send the Authorization header, so the stream is
+  read with fetch. Every (re)connect starts with a fresh "snapshot".
+  If the stream is unavailable (no ASGI server, or the backend refuses
+  it under WSGI) the roster is polled from attendance/live/ instead.
+  Returns a function that closes the stream.
+*/
+export function subscribeLiveAttendance({ onSnapshot, onMarked, onEnded, onError }) {
+  const controller = new AbortController();
+  const handlers = { snapshot: onSnapshot, marked: onMarked, ended: onEnded };
+
+  const connect = async () => {
+    while (!controller.signal.aborted) {
+      let res;
+      try {
+        res = await fetch(STREAM_URL, {
+          headers: {
+            Authorization: `Bearer ${localStorage.getItem("access")}`,
+            Accept: "text/event-stream",
+          },
+          signal: controller.signal,
+        });
+      } catch {
+        if (controller.signal.aborted) return;
+        // Stream server unreachable
+        return pollLiveAttendance(controller.signal, { onSnapshot, onEnded, onError });
+      }
+
+      try {
+        if (res.status === 401) {
+          // Let the axios interceptor refresh the access token, then retry
+          await api.get("attendance/active/");
+        } else if (res.status === 503 || res.status === 404) {
+          return pollLiveAttendance(controller.signal, { onSnapshot, onEnded, onError });
+        } else if (!res.headers.get("content-type")?.startsWith("text/event-stream")) {
+          // No active session
+          onSnapshot?.(await res.json());
+          return;
+        } else if (await readEvents(res.body, handlers)) {
+          return;
+        }
+      } catch (err) {
+        if (controller.signal.aborted) return;
+        onError?.(err);
+      }
+
+      await new Promise((resolve) => setTimeout(resolve, RECONNECT_DELAY_MS));
+    }
+  };
+
+  connect();
+  return () => controller.abort();
+}
+
+/*
+  Poll attendance/live/ with the record cursor, so each request after
+  the first only returns the new marks.
+*/
+async function pollLiveAttendance(signal, { onSnapshot, onEnded, onError }) {
+  let current = null;
+
+  while (!signal.aborted) {
+    try {
+      const res = await api.get("attendance/live/", {
+        params: current ? { since: current.cursor } : {},
+        signal,
+      });
+      const data = res.data;
+
+      if (!data.active) {
+        if (current) onEnded?.(data);
+        else onSnapshot?.(data);
+        return;
+      }
+
+      current = current && current.session_id === data.session_id
+        ? {
+            ...data,
+            present_students: [...current.present_students, ...data.present_students],
+          }
+        : data;
+      onSnapshot?.(current);
+    } catch (err) {
+      if (signal.aborted) return;
+      onError?.(err);
+    }
+
+    await new Promise((resolve) => setTimeout(resolve, POLL_INTERVAL_MS));
+  }
+}
+
+async function readEvents(body, handlers) {
+  const reader = body.pipeThrough(new TextDecoderStream()).getReader();
+  let buffer = "";
+
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) return false;
+
+    buffer += value;
+    const frames = buffer.split("\n\n");
+    buffer = frames.pop();
+
+    for (const frame of frames) {
+      let event = "message";
+      let data = "";
+
+      for (const line of frame.split("\n")) {
+        if (line.startsWith("event: ")) event = line.slice(7);
+        else if (line.startsWith("data: ")) data += line.slice(6);
+      }
+
+      if (!data) continue; // keepalive comment
+
+      handlers[event]?.(JSON.parse(data));
+      if (event === "ended") return true;
+    }
+  }
+}
@@ -2,6 +2,9 @@
   import api from "../api/axios";
   import { FaceLandmarker, FilesetResolver } from "@mediapipe/tasks-vision";
 
+  // JPEG lets the server decode the frame at reduced size
+  const JPEG_QUALITY = 0.9;
+
   export default function CameraCapture({ sessionId, onSuccess, onFaceMismatch }) {
     const videoRef = useRef(null);
     const canvasRef = useRef(null);
@@ -152,7 +155,7 @@
         const formData = new FormData();
         formData.append("session_id", sessionId);
         formData.append("method", "FACE");
-        formData.append("face_image", blob);
+        formData.append("face_image", blob, "face.jpg");
         formData.append("blink_ok", true);
         formData.append("head_ok", true);
         formData.append("latitude", coords.latitude);
@@ -176,7 +179,7 @@
         } finally {
           setLoading(false);
         }
-      }, "image/jpeg");
+      }, "image/jpeg", JPEG_QUALITY);
     };
 
     return (
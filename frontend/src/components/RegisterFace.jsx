@@ -1,6 +1,9 @@
 import { useEffect, useRef, useState } from "react";
 import api from "../api/axios";
 
+// JPEG lets the server decode the frame at reduced size
+const JPEG_QUALITY = 0.9;
+
 export default function RegisterFace() {
   const videoRef = useRef(null);
   const canvasRef = useRef(null);
@@ -47,7 +50,7 @@ export default function RegisterFace() {
       setLoading(true);
 
       const formData = new FormData();
-      formData.append("face_image", blob);
+      formData.append("face_image", blob, "face.jpg");
 
       try {
         await api.post("accounts/register-face/", formData);
@@ -67,7 +70,7 @@ export default function RegisterFace() {
       } finally {
         setLoading(false);
       }
-    }, "image/jpeg");
+    }, "image/jpeg", JPEG_QUALITY);
   };
 
   return (
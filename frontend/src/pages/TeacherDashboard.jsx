@@ -1,5 +1,7 @@
 import { useState, useEffect } from "react";
 import api from "../api/axios";
+import { subscribeLiveAttendance } from "../api/liveAttendance";
+import { runExport } from "../api/exports";
 import { QRCodeCanvas } from "qrcode.react";
 import "./TeacherDashboard.css";
 import NoticePanel from "../components/NoticePanel";
@@ -17,6 +19,7 @@ export default function TeacherDashboard() {
   const [students, setStudents] = useState([]);
   const [locationStatus, setLocationStatus] = useState("idle");
   const [remainingSeconds, setRemainingSeconds] = useState(null);
+  const [reportProgress, setReportProgress] = useState(null);
 
   /* ---------------- GET LOCATION ---------------- */
   const getLocation = () => {
@@ -104,34 +107,24 @@ export default function TeacherDashboard() {
       );
       setUploadResult(res.data);
       alert("Students uploaded successfully");
-    } catch {
-      alert("Upload failed");
+    } catch (err) {
+      const data = err.response?.data;
+      // The file broke part way through; the rows before it were imported
+      if (data?.students_created !== undefined) setUploadResult(data);
+      alert(data?.detail || "Upload failed");
     }
   };
 
   const downloadAttendanceReport = async () => {
-    try {
-      const response = await api.get("teachers/attendance-report/", {
-        responseType: "blob",
-      });
+    if (reportProgress !== null) return;
 
-      const blob = new Blob([response.data], {
-        type:
-          "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-      });
-
-      const url = window.URL.createObjectURL(blob);
-      const link = document.createElement("a");
-
-      link.href = url;
-      link.download = "attendance_report.xlsx";
-      document.body.appendChild(link);
-      link.click();
-
-      link.remove();
-      window.URL.revokeObjectURL(url);
+    setReportProgress(0);
+    try {
+      await runExport({ kind: "report", format: "xlsx", onProgress: setReportProgress });
     } catch {
       alert("❌ Failed to download report");
+    } finally {
+      setReportProgress(null);
     }
   };
 
@@ -139,34 +132,53 @@ export default function TeacherDashboard() {
   useEffect(() => {
     if (!session) return;
 
+    // Tokens rotate on fixed server windows; refresh as each one rolls over
+    // cancelled stops a request still in flight at cleanup from rescheduling
+    let timeout;
+    let cancelled = false;
     const fetchQR = async () => {
-      const res = await api.get("attendance/qr/");
-      setQrToken(res.data.qr_token);
+      let expiresIn = 5;
+      try {
+        const res = await api.get("attendance/qr/");
+        if (cancelled) return;
+        setQrToken(res.data.qr_token);
+        expiresIn = res.data.expires_in;
+      } finally {
+        if (!cancelled) timeout = setTimeout(fetchQR, expiresIn * 1000);
+      }
     };
 
     fetchQR();
-    const interval = setInterval(fetchQR, 5000);
-    return () => clearInterval(interval);
+    return () => {
+      cancelled = true;
+      clearTimeout(timeout);
+    };
   }, [session]);
 
   /* ---------------- LIVE ATTENDANCE ---------------- */
   useEffect(() => {
     if (!session) return;
 
-    const fetchLive = async () => {
-      try {
-        const res = await api.get("attendance/live/");
-        setLiveData(res.data);
-
-      } catch {
-        setLiveData(null);
-      }
-    };
-
-    fetchLive(); // initial call
-    const interval = setInterval(fetchLive, 3000);
+    // Snapshot on connect, then one event per mark (no polling)
+    const unsubscribe = subscribeLiveAttendance({
+      onSnapshot: (data) => setLiveData(data),
+      onMarked: (student) =>
+        setLiveData((prev) => {
+          if (!prev?.active || prev.session_id !== student.session_id) return prev;
+          if (prev.present_students.some((s) => s.student_id === student.student_id)) {
+            return prev;
+          }
+          return {
+            ...prev,
+            present_count: prev.present_count + 1,
+            present_students: [...prev.present_students, student],
+          };
+        }),
+      onEnded: () => setLiveData(null),
+      onError: () => setLiveData(null),
+    });
 
-    return () => clearInterval(interval);
+    return unsubscribe;
   }, [session]);
 
   /* ---------------- STUDENT LIST ---------------- */
@@ -259,7 +271,7 @@ export default function TeacherDashboard() {
           <h3>Bulk Student Upload</h3>
           <input
             type="file"
-            accept=".xlsx, .xls"
+            accept=".xlsx, .csv"
             onChange={(e) => setFile(e.target.files[0])}
           />
           <button onClick={uploadStudents}>📤 Upload Excel File</button>
@@ -548,8 +560,10 @@ export default function TeacherDashboard() {
         <div className="card">
           <h3>Reports & Analytics</h3>
           <div style={{display: 'flex', flexDirection: 'column', gap: '12px', marginTop: '15px'}}>
-            <button onClick={downloadAttendanceReport}>
-              📥 Download Attendance Report (Excel)
+            <button onClick={downloadAttendanceReport} disabled={reportProgress !== null}>
+              {reportProgress === null
+                ? "📥 Download Attendance Report (Excel)"
+                : `⏳ Preparing report… ${reportProgress}%`}
             </button>
             <button style={{background: 'linear-gradient(135deg, #8b5cf6, #7c3aed)'}}>
               📈 View Detailed Analytics